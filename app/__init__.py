@@ -2,10 +2,8 @@
 import logging
 import os
 
-import sentry_sdk
 from flask import Flask
 from flask_mongoengine import MongoEngine
-from sentry_sdk.integrations.flask import FlaskIntegration
 
 from .config import Config
 from .extensions import init_extensions  # import db and init_extensions
@@ -26,13 +24,16 @@ def create_app():
     Factory function to create and configure the Flask application.
 
     Steps:
-      1. Load configuration from Config.
-      2. Initialize the MongoDB connection via MongoEngine.
-      3. Configure Sentry for error monitoring.
+      1. Load configuration from Config, trust the configured reverse proxies and install
+         the fast JSON provider.
+      2. Initialize the MongoDB connection via MongoEngine (with command metrics, the
+         slow command log and the index auto-creation policy).
+      3. Configure Sentry for error monitoring and trace sampling (if SENTRY_DSN is set).
       4. Initialize third-party extensions: JWT, Mail, and OAuth.
       5. Register blueprints (e.g., authentication routes).
       6. Register global error handlers.
-      7. Log startup information.
+      7. Register CLI commands.
+      8. Log startup information (including whether gevent patching is complete).
 
     Returns:
         app (Flask): The configured Flask application instance.
@@ -41,16 +42,36 @@ def create_app():
     app.config.from_object(Config)
     assert app.config["MONGODB_SETTINGS"]["host"], "❌ MONGODB_URI is missing or not loaded!"
 
+    # Take the client address and scheme from the trusted reverse proxies' headers.
+    hops = app.config["TRUSTED_PROXY_HOPS"]
+    if hops:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
+    # Serialize responses and parse request bodies with orjson
+    from .json_provider import FastJSONProvider
+
+    app.json = FastJSONProvider(app)
+    app.json.compact = app.config["JSON_COMPACT"]
+
+    # Command listeners must be registered before MongoEngine creates its client.
+    from .extensions import metrics, query_monitor
+
+    metrics.register_command_listener(app)
+    query_monitor.register_command_listener(app)
+
     # Initialize MongoEngine with the Flask app
     db.init_app(app)
+    # Indexes are managed by `flask db ensure-indexes`; workers skip createIndexes unless enabled.
+    from .services.indexes import set_auto_create_index
+
+    set_auto_create_index(app.config["MONGODB_AUTO_CREATE_INDEX"])
+
+    # Initialize Sentry for error monitoring and sampled tracing (skipped without SENTRY_DSN).
+    from .services.tracing import init_sentry
 
-    # Initialize Sentry for error monitoring and logging.
-    # Replace the DSN below with your actual Sentry DSN in production.
-    sentry_sdk.init(
-        dsn="https://491d31c12ffd3d7e9f9607fd4f475b9b@o4509086856118272.ingest.us.sentry.io/4509086879842304",
-        integrations=[FlaskIntegration()],
-        traces_sample_rate=1.0,
-    )
+    init_sentry(app)
 
     # ✅ Initialize all extensions, including OAuth
     init_extensions(app)
@@ -60,13 +81,38 @@ def create_app():
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
 
+    from .routes.admin import admin_bp
+
+    app.register_blueprint(admin_bp, url_prefix="/api/admin")
+
+    from .routes.health import health_bp
+
+    app.register_blueprint(health_bp)
+
+    from .routes.metrics import metrics_bp
+
+    app.register_blueprint(metrics_bp)
+
     # Register global error handlers (from a separate module for clarity)
     from .register_error_handlers import register_error_handlers
 
     register_error_handlers(app)
 
+    # Register Flask CLI commands (e.g., `flask auth calibrate-bcrypt`)
+    from .commands import register_commands
+
+    register_commands(app)
+
     # Log startup information
     logger.info("Flask application created and configured.")
     logger.info("Environment: %s", os.getenv("FLASK_ENV", "development"))
+    from .services.cooperative import gevent_patched, unpatched_modules
+
+    if gevent_patched():
+        missing = unpatched_modules()
+        if missing:
+            logger.warning("gevent is active but %s not patched; waits may block.", missing)
+        else:
+            logger.info("gevent cooperative mode: blocking I/O yields between requests.")
 
     return app
@@ -0,0 +1,86 @@
+# File: app/commands.py
+"""
+Flask CLI commands for operating the backend.
+
+Commands:
+  - flask auth calibrate-bcrypt: Measure bcrypt on this host and suggest BCRYPT_ROUNDS.
+  - flask db ensure-indexes: Create (and rebuild) indexes so the database matches the models.
+"""
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.services.indexes import apply_plan, index_plan, managed_documents
+from app.services.passwords import calibrate_cost
+
+auth_cli = AppGroup("auth", help="Authentication maintenance commands.")
+db_cli = AppGroup("db", help="Database maintenance commands.")
+
+
+@auth_cli.command("calibrate-bcrypt")
+@click.option(
+    "--target-ms", default=250.0, show_default=True, help="Acceptable time per hash (ms)."
+)
+@click.option("--samples", default=3, show_default=True, help="Hashes timed per cost factor.")
+@click.option("--min-rounds", default=4, show_default=True, help="Lowest cost to measure.")
+@click.option("--max-rounds", default=16, show_default=True, help="Highest cost to measure.")
+def calibrate_bcrypt(target_ms, samples, min_rounds, max_rounds):
+    """Suggest a BCRYPT_ROUNDS value whose hash time fits TARGET_MS on this host."""
+    suggested, timings = calibrate_cost(target_ms, samples, min_rounds, max_rounds)
+    for rounds, elapsed in timings.items():
+        marker = "  <- suggested" if rounds == suggested else ""
+        click.echo(f"cost {rounds:>2}: {elapsed:8.1f} ms{marker}")
+    click.echo(
+        f"Suggested BCRYPT_ROUNDS={suggested} "
+        f"(currently {current_app.config['BCRYPT_ROUNDS']}, target {target_ms:.0f} ms)."
+    )
+
+
+@db_cli.command("ensure-indexes")
+@click.option("--dry-run", is_flag=True, help="Only show what would change.")
+@click.option("--drop-extra", is_flag=True, help="Also drop live indexes no model declares.")
+@click.option("--model", "models", multiple=True, help="Limit to these model classes.")
+def ensure_indexes(dry_run, drop_extra, models):
+    """
+    Diff declared indexes against the live collections and create the missing ones.
+
+    Indexes no model declares, and unique indexes whose options changed, are left alone
+    unless --drop-extra is given.
+    """
+    documents = [
+        document for document in managed_documents() if not models or document.__name__ in models
+    ]
+    changes = 0
+    for document in documents:
+        plan = index_plan(document, drop_extra=drop_extra)
+        if not drop_extra:
+            for name in plan["extra"]:
+                click.echo(f"{plan['collection']}: keep undeclared {name}")
+            for name in plan["protected"]:
+                click.echo(
+                    f"{plan['collection']}: keep unique {name} (options changed; rebuild it "
+                    "with --drop-extra)"
+                )
+        for name in plan["drop"]:
+            click.echo(f"{plan['collection']}: drop {name}")
+        for index in plan["create"]:
+            options = ", ".join(f"{key}={value}" for key, value in index["options"].items())
+            key = ", ".join(f"{field}:{direction}" for field, direction in index["key"])
+            click.echo(f"{plan['collection']}: create {index['name']} ({key}) {options}".rstrip())
+        changes += len(plan["drop"]) + len(plan["create"])
+        if not dry_run:
+            apply_plan(document, plan)
+
+    if not changes:
+        click.echo("Indexes are up to date.")
+    elif dry_run:
+        click.echo(f"{changes} change(s) pending (dry run, nothing applied).")
+    else:
+        click.echo(f"Applied {changes} change(s).")
+
+
+def register_commands(app):
+    """Attach the CLI command groups to the application."""
+    app.cli.add_command(auth_cli)
+    app.cli.add_command(db_cli)
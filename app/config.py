@@ -1,5 +1,6 @@
 # File: app/config.py
 import os
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -9,6 +10,10 @@ load_dotenv()
 
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-key")
+    # Previous secret keys still accepted for verifying links (comma-separated)
+    SECRET_KEY_FALLBACKS = [
+        key for key in os.getenv("SECRET_KEY_FALLBACKS", "").split(",") if key.strip()
+    ]
     FLASK_ENV = os.getenv("FLASK_ENV", "development")
 
     MONGODB_SETTINGS = {
@@ -16,7 +21,70 @@ class Config:
         "db": "ah-aihms-db",
         "tls": True,
         "uuidRepresentation": "standard",
+        # Connect on first use, so a preloaded gunicorn master never opens sockets before
+        # forking; workers re-create the client in post_fork (see gunicorn.conf.py).
+        "connect": False,
+        # Per-process pool: keep maxPoolSize >= gunicorn threads per worker.
+        "maxPoolSize": int(os.getenv("MONGODB_MAX_POOL_SIZE", 20)),
+        "minPoolSize": int(os.getenv("MONGODB_MIN_POOL_SIZE", 0)),
+        # Fail fast instead of queueing forever when every pooled connection is busy.
+        "waitQueueTimeoutMS": int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", 5000)),
+        # Wire compression, in order of preference (zstd/snappy need extra packages).
+        "compressors": os.getenv("MONGODB_COMPRESSORS", "zlib"),
     }
+    # Create model indexes on first use in each process. Off in production, where
+    # `flask db ensure-indexes` manages them as a deploy step.
+    MONGODB_AUTO_CREATE_INDEX = os.getenv(
+        "MONGODB_AUTO_CREATE_INDEX", "false" if FLASK_ENV == "production" else "true"
+    ).lower() in ["true", "1", "yes"]
+
+    # Compact JSON responses (false indents them; see app/json_provider.py)
+    JSON_COMPACT = os.getenv("JSON_COMPACT", "true").lower() in ["true", "1", "yes"]
+
+    # Brotli/gzip response compression (see app/services/compression.py)
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "true").lower() in ["true", "1", "yes"]
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+    COMPRESS_BR_LEVEL = int(os.getenv("COMPRESS_BR_LEVEL", 4))
+    COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", 5))
+
+    # /readyz probes (cached results, per-probe timeout, optional SMTP reachability)
+    READINESS_CACHE_TTL = float(os.getenv("READINESS_CACHE_TTL", 2))
+    READINESS_INDEX_CACHE_TTL = float(os.getenv("READINESS_INDEX_CACHE_TTL", 60))
+    READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", 2))
+    READINESS_CHECK_SMTP = os.getenv("READINESS_CHECK_SMTP", "false").lower() in [
+        "true",
+        "1",
+        "yes",
+    ]
+
+    # Prometheus metrics at /metrics, behind a bearer token. Without a token, scrapes are
+    # refused in production unless METRICS_PUBLIC allows them (e.g., on a private network).
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ["true", "1", "yes"]
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN") or None
+    METRICS_PUBLIC = os.getenv(
+        "METRICS_PUBLIC", "false" if FLASK_ENV == "production" else "true"
+    ).lower() in ["true", "1", "yes"]
+
+    # MongoDB command monitoring (slow command log, per-request DB time, request log)
+    DB_MONITORING_ENABLED = os.getenv("DB_MONITORING_ENABLED", "true").lower() in [
+        "true",
+        "1",
+        "yes",
+    ]
+    DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", 100))
+    DB_COMMANDS_WARN = int(os.getenv("DB_COMMANDS_WARN", 25))
+    DB_SERVER_TIMING = os.getenv("DB_SERVER_TIMING", "true").lower() in ["true", "1", "yes"]
+    REQUEST_LOG_ENABLED = os.getenv("REQUEST_LOG_ENABLED", "true").lower() in ["true", "1", "yes"]
+
+    # On-demand request profiling (admin header or sampling; results in PROFILER_DIR)
+    PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "true").lower() in ["true", "1", "yes"]
+    PROFILER_HEADER = os.getenv("PROFILER_HEADER", "X-Profile")
+    PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", 0))
+    PROFILER_MODE = os.getenv("PROFILER_MODE", "cprofile")  # "cprofile" or "sample"
+    PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", 5))
+    PROFILER_TOP_N = int(os.getenv("PROFILER_TOP_N", 30))
+    PROFILER_DIR = os.getenv("PROFILER_DIR", os.path.join(tempfile.gettempdir(), "profiles"))
+    PROFILER_KEEP = int(os.getenv("PROFILER_KEEP", 100))
 
     # JWT Configuration
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "jwt-secret-key")
@@ -32,7 +100,91 @@ class Config:
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")
 
+    # Email outbox (background delivery with SMTP connection reuse and retries)
+    MAIL_OUTBOX_ASYNC = os.getenv("MAIL_OUTBOX_ASYNC", "true").lower() in ["true", "1", "yes"]
+    MAIL_OUTBOX_PERSIST = os.getenv("MAIL_OUTBOX_PERSIST", "false").lower() in ["true", "1", "yes"]
+    MAIL_OUTBOX_BATCH_SIZE = int(os.getenv("MAIL_OUTBOX_BATCH_SIZE", 50))
+    MAIL_OUTBOX_MAX_RETRIES = int(os.getenv("MAIL_OUTBOX_MAX_RETRIES", 5))
+    MAIL_OUTBOX_RETRY_BACKOFF = float(os.getenv("MAIL_OUTBOX_RETRY_BACKOFF", 2))
+    MAIL_OUTBOX_IDLE_TIMEOUT = float(os.getenv("MAIL_OUTBOX_IDLE_TIMEOUT", 30))
+    # Seconds before persisted messages claimed by a dead dispatcher are taken over.
+    MAIL_OUTBOX_LEASE_SECONDS = int(os.getenv("MAIL_OUTBOX_LEASE_SECONDS", 900))
+
     # Google OAuth
     GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
     GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
     OAUTHLIB_INSECURE_TRANSPORT = os.getenv("OAUTHLIB_INSECURE_TRANSPORT", "1")
+    GOOGLE_SERVER_METADATA_URL = os.getenv(
+        "GOOGLE_SERVER_METADATA_URL", "https://accounts.google.com/.well-known/openid-configuration"
+    )
+    # Cached OAuth discovery metadata/JWKS (refresh interval, optional shared directory)
+    OAUTH_METADATA_TTL = float(os.getenv("OAUTH_METADATA_TTL", 3600))
+    OAUTH_METADATA_CACHE_DIR = os.getenv("OAUTH_METADATA_CACHE_DIR") or None
+
+    # bcrypt cost factor for new hashes (see `flask auth calibrate-bcrypt`)
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+    # Password hashing worker pool ("process", "thread" or "inline")
+    PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "process")
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+    PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 256))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 10))
+
+    # Expiring key-value store for 2FA codes, used links and rate-limit counters
+    # (memory://, sqlite:///<path>, redis://host:port/db). It must be shared by every
+    # worker, so production defaults to a SQLite file; use redis:// across hosts.
+    TTL_STORE_URL = os.getenv(
+        "TTL_STORE_URL",
+        (
+            "sqlite:///" + os.path.join(tempfile.gettempdir(), "ah-aihms-ttl.db")
+            if FLASK_ENV == "production"
+            else "memory://"
+        ),
+    )
+    TTL_STORE_MAX_ENTRIES = int(os.getenv("TTL_STORE_MAX_ENTRIES", 100_000))
+    TTL_STORE_SWEEP_INTERVAL = float(os.getenv("TTL_STORE_SWEEP_INTERVAL", 30))
+    OTP_TTL_SECONDS = int(os.getenv("OTP_TTL_SECONDS", 300))
+
+    # Sentry error monitoring and trace sampling (disabled when SENTRY_DSN is unset)
+    SENTRY_DSN = os.getenv("SENTRY_DSN")
+    SENTRY_ENVIRONMENT = os.getenv("SENTRY_ENVIRONMENT", os.getenv("FLASK_ENV", "development"))
+    SENTRY_TRACES_SAMPLE_RATE = float(os.getenv("SENTRY_TRACES_SAMPLE_RATE", 0.05))
+    # Per-blueprint/per-endpoint rates, e.g. "auth=0.2,auth.login=1.0"
+    # (health probes are polled constantly and are not traced by default)
+    SENTRY_TRACES_RATES = os.getenv("SENTRY_TRACES_RATES", "health=0")
+    # Tail sampling records spans for *every* request and decides at the end, so errors and
+    # slow requests are always kept, at the cost of full tracing overhead on each request.
+    # On in production, where those are the traces worth having; elsewhere the route rates
+    # are applied up front and unsampled requests are free.
+    SENTRY_TRACES_TAIL_SAMPLING = os.getenv(
+        "SENTRY_TRACES_TAIL_SAMPLING", "true" if FLASK_ENV == "production" else "false"
+    ).lower() in ["true", "1", "yes"]
+    SENTRY_TRACES_KEEP_ERRORS = os.getenv("SENTRY_TRACES_KEEP_ERRORS", "true").lower() in [
+        "true",
+        "1",
+        "yes",
+    ]
+    SENTRY_TRACES_SLOW_MS = float(os.getenv("SENTRY_TRACES_SLOW_MS", 1000))
+    SENTRY_TRACES_MAX_PER_SECOND = float(os.getenv("SENTRY_TRACES_MAX_PER_SECOND", 10))
+
+    # Admin bulk user import. Passwords are hashed on a pool of their own (not the request
+    # pool, which gunicorn.conf.py sizes at CPUs / workers); at BCRYPT_ROUNDS=12 each
+    # process manages about 4 hashes/s, so 100k users take ~50 minutes on 8 CPUs.
+    USER_IMPORT_HASH_WORKERS = int(os.getenv("USER_IMPORT_HASH_WORKERS", os.cpu_count() or 1))
+    USER_IMPORT_CHUNK_SIZE = int(os.getenv("USER_IMPORT_CHUNK_SIZE", 1000))
+    USER_IMPORT_MAX_ERRORS = int(os.getenv("USER_IMPORT_MAX_ERRORS", 1000))
+
+    # Login/password-reset throttling (counters live in the TTL store unless a URL is given).
+    # With a memory:// store every gunicorn worker counts separately, so the effective
+    # limit is the configured one times the number of workers; use sqlite:// or redis://
+    # to share counters.
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ["true", "1", "yes"]
+    RATE_LIMIT_STORAGE_URL = os.getenv("RATE_LIMIT_STORAGE_URL") or None
+    # Reverse proxies in front of the app whose X-Forwarded-For/-Proto headers are trusted
+    # (per-IP limits key on the client address). 0 when clients connect directly.
+    TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", 0))
+
+    # Process-local read-through cache for user lookups (identity fields only, no credentials)
+    USER_CACHE_ENABLED = os.getenv("USER_CACHE_ENABLED", "true").lower() in ["true", "1", "yes"]
+    USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 30))
+    USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", 10_000))
@@ -1,9 +1,11 @@
 # File: app/decorators.py
 from functools import wraps
 
-from flask import jsonify
+from flask import jsonify, request
 from flask_jwt_extended import get_jwt, verify_jwt_in_request
 
+from app.extensions import rate_limiter
+
 
 def role_required(*roles):
     """
@@ -23,3 +25,35 @@ def role_required(*roles):
         return wrapper
 
     return decorator
+
+
+def rate_limit(scope, per_ip=None, per_email=None):
+    """
+    Decorator to throttle an endpoint per client IP and per email in the JSON body.
+    Throttled requests get 429 with Retry-After before the view does any work.
+    Usage: @rate_limit('login', per_ip='30/minute', per_email='5/minute')
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if rate_limiter.enabled:
+                checks = []
+                if per_ip:
+                    checks.append((f"ip:{request.remote_addr}", per_ip))
+                data = request.get_json(silent=True)
+                email = data.get("email") if isinstance(data, dict) else None
+                if per_email and isinstance(email, str) and email:
+                    checks.append((f"email:{email.strip().lower()}", per_email))
+
+                for identity, limit in checks:
+                    retry_after = rate_limiter.hit(scope, identity, limit)
+                    if retry_after is not None:
+                        response = jsonify({"msg": "Too many requests. Please try again later."})
+                        response.headers["Retry-After"] = str(retry_after)
+                        return response, 429
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
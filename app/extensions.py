@@ -4,6 +4,8 @@ Initialize Flask extensions and OAuth providers.
 
 Environment Variables:
 - SECRET_KEY: Base secret key for Flask sessions and token signing.
+- SECRET_KEY_FALLBACKS: (optional) Comma-separated previous secret keys still accepted
+  when verifying email-verification and password-reset links (for key rotation).
 - JWT_SECRET_KEY: Secret key for JWT tokens (if not provided, uses SECRET_KEY).
 - JWT_ACCESS_TOKEN_EXPIRES: (optional) Access token expiration (in seconds, e.g. 900 for 15 min).
 - JWT_REFRESH_TOKEN_EXPIRES: (optional) Refresh token expiration (e.g. 2592000 for 30 days).
@@ -14,20 +16,115 @@ Environment Variables:
 - MAIL_USERNAME: SMTP username (for Gmail or SendGrid, e.g., 'apikey' for SendGrid).
 - MAIL_PASSWORD: SMTP password or API key (for SendGrid, use the API key as password).
 - MAIL_DEFAULT_SENDER: Default "From" email address for outgoing emails.
+- MAIL_OUTBOX_ASYNC: (optional) Deliver email from a background dispatcher (default True).
+- MAIL_OUTBOX_PERSIST: (optional) Persist queued email to MongoDB so it survives restarts.
+- MAIL_OUTBOX_BATCH_SIZE / MAIL_OUTBOX_MAX_RETRIES / MAIL_OUTBOX_RETRY_BACKOFF: (optional)
+  Dispatcher batch size, retry limit and base backoff in seconds.
 - SENDGRID_API_KEY: (optional) SendGrid API key (if using SendGrid Web API instead of SMTP).
 - GOOGLE_CLIENT_ID: Google OAuth Client ID.
 - GOOGLE_CLIENT_SECRET: Google OAuth Client Secret.
+- GOOGLE_SERVER_METADATA_URL: (optional) Google's OpenID discovery document (a file:// URL
+  to a local stub works too).
+- OAUTH_METADATA_TTL / OAUTH_METADATA_CACHE_DIR: (optional) Refresh interval for cached
+  OAuth discovery metadata and signing keys, and a directory to share them across workers.
+- PASSWORD_HASH_EXECUTOR: (optional) "process", "thread" or "inline" bcrypt execution.
+- PASSWORD_HASH_WORKERS: (optional) Size of the password hashing pool (defaults to CPU count).
+- PASSWORD_HASH_MAX_QUEUE: (optional) Jobs allowed in the hashing pool before rejecting work.
+- PASSWORD_HASH_TIMEOUT: (optional) Seconds to wait for a hashing job.
+- TTL_STORE_URL: (optional) Backend for expiring values such as 2FA codes
+  (memory://, sqlite:///<path> or redis://host:port/db). Must be shared by every worker;
+  production defaults to a SQLite file in the temp directory.
+- RATE_LIMIT_ENABLED: (optional) Throttle login and password-reset requests (default True).
+- RATE_LIMIT_STORAGE_URL: (optional) Dedicated backend for rate-limit counters
+  (defaults to the TTL store, so use sqlite:// or redis:// with several workers).
+- USER_CACHE_ENABLED / USER_CACHE_TTL / USER_CACHE_MAX_SIZE: (optional) Process-local
+  read-through cache for user credential lookups.
+- OTP_TTL_SECONDS: (optional) Lifetime of a 2FA code (default 300).
+- COMPRESS_ENABLED / COMPRESS_MIN_SIZE / COMPRESS_BR_LEVEL / COMPRESS_GZIP_LEVEL: (optional)
+  Brotli/gzip response compression, the smallest body worth compressing and the levels.
+- READINESS_CACHE_TTL / READINESS_TIMEOUT / READINESS_CHECK_SMTP: (optional) How long
+  /readyz reuses probe results, the per-probe timeout and whether SMTP is probed.
+- METRICS_ENABLED / METRICS_TOKEN: (optional) Prometheus metrics at /metrics and an
+  optional bearer token required to scrape them.
+- DB_MONITORING_ENABLED / DB_SLOW_QUERY_MS / DB_COMMANDS_WARN / DB_SERVER_TIMING: (optional)
+  MongoDB command monitoring: slow command log threshold, commands per request that
+  flag a likely N+1, and the per-request Server-Timing header.
+- REQUEST_LOG_ENABLED: (optional) One log line per request with its DB totals.
+- PROFILER_HEADER / PROFILER_SAMPLE_RATE / PROFILER_MODE / PROFILER_DIR: (optional)
+  On-demand request profiling, triggered by admins or by sampling.
+- PROMETHEUS_MULTIPROC_DIR: (optional) Directory where each worker's metrics are shared
+  (set by gunicorn.conf.py).
 """
+import importlib
 import os
 
-from authlib.integrations.flask_client import OAuth
 from flask_jwt_extended import JWTManager
 from flask_mail import Mail
 
+from app.services.compression import Compression
+from app.services.health import HealthChecks
+from app.services.metrics import Metrics
+from app.services.oauth_metadata import OAuthMetadataCache
+from app.services.outbox import EmailOutbox
+from app.services.passwords import PasswordHasher
+from app.services.profiler import RequestProfiler
+from app.services.query_log import QueryMonitor
+from app.services.rate_limit import RateLimiter
+from app.services.tokens import TokenService
+from app.services.ttl_store import TTLStore
+from app.services.user_cache import UserCache
+
+
+class LazyExtension:
+    """
+    Stand-in for an extension whose import is expensive and often not needed.
+
+    The real extension is imported and created on first attribute access; an app passed
+    to ``init_app`` before then is handed to it at that point.
+    """
+
+    def __init__(self, import_path: str):
+        self._import_path = import_path
+        self._instance = None
+        self._app = None
+
+    def init_app(self, app):
+        if self._instance is None:
+            self._app = app
+        else:
+            self._instance.init_app(app)
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        if self._instance is None:
+            module_name, _, class_name = self._import_path.partition(":")
+            instance = getattr(importlib.import_module(module_name), class_name)()
+            if self._app is not None:
+                instance.init_app(self._app)
+            self._instance = instance
+        return getattr(self._instance, name)
+
+
 # Instantiate extensions
 jwt = JWTManager()
 mail = Mail()
-oauth = OAuth()
+outbox = EmailOutbox(mail)
+# Authlib (and requests) is only imported once an OAuth provider is registered or used.
+oauth = LazyExtension("authlib.integrations.flask_client:OAuth")
+oauth_metadata = OAuthMetadataCache()
+password_hasher = PasswordHasher()
+ttl_store = TTLStore()
+tokens = TokenService(ttl_store)
+rate_limiter = RateLimiter(ttl_store)
+user_cache = UserCache()
+compression = Compression()
+health_checks = HealthChecks()
+metrics = Metrics(password_hasher, outbox, tokens, compression, user_cache)
+query_monitor = QueryMonitor()
+profiler = RequestProfiler()
 
 
 def init_extensions(app):
@@ -36,19 +133,34 @@ def init_extensions(app):
     """
     jwt.init_app(app)
     mail.init_app(app)
+    outbox.init_app(app)
     oauth.init_app(app)
+    oauth_metadata.init_app(app)
+    password_hasher.init_app(app)
+    ttl_store.init_app(app)
+    tokens.init_app(app)
+    rate_limiter.init_app(app)
+    user_cache.init_app(app)
+    compression.init_app(app)
+    health_checks.init_app(app)
+    metrics.init_app(app)
+    query_monitor.init_app(app)
+    profiler.init_app(app)
 
     client_id = os.environ.get("GOOGLE_CLIENT_ID")
     client_secret = os.environ.get("GOOGLE_CLIENT_SECRET")
 
     if client_id and client_secret:
-        oauth.register(
+        metadata_url = app.config["GOOGLE_SERVER_METADATA_URL"]
+        google = oauth.register(
             name="google",
             client_id=client_id,
             client_secret=client_secret,
-            server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
+            server_metadata_url=metadata_url,
             client_kwargs={"scope": "openid email profile"},
         )
+        # Load discovery metadata and signing keys now rather than on the first login.
+        oauth_metadata.register("google", google, metadata_url)
         app.logger.info("✅ Google OAuth client registered.")
     else:
         app.logger.warning("⚠️ Google OAuth credentials not set. Skipping OAuth registration.")
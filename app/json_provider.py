@@ -0,0 +1,106 @@
+# File: app/json_provider.py
+"""
+Fast JSON Provider
+
+Replaces Flask's default JSON provider, so ``jsonify``, error handlers and
+``request.get_json()`` all encode and decode through orjson.
+
+- ``ObjectId`` and ``Decimal`` (as strings, like Flask) are handled alongside what orjson
+  supports natively (datetime, UUID, dataclasses). Datetimes are ISO 8601; naive ones, as
+  MongoDB returns them, are UTC.
+- MongoEngine documents and querysets are refused (TypeError), as with Flask's provider:
+  their stored fields include password hashes and tokens, so routes build the public
+  fields they return themselves.
+- Responses are compact unless JSON_COMPACT is false (or it is unset and debug is on),
+  and are built from orjson's bytes without an intermediate ``str``.
+- Calls with stdlib-only arguments (e.g., ``dumps(obj, cls=...)``) and environments
+  without orjson fall back to the standard library with the same type handling.
+"""
+
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import UTC, date, datetime
+
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider
+from mongoengine.base import BaseDocument
+from mongoengine.queryset import QuerySet
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+if orjson is not None:
+    BASE_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+
+def _default(o):
+    """Convert types neither encoder handles natively."""
+    if isinstance(o, ObjectId):
+        return str(o)
+    if isinstance(o, (BaseDocument, QuerySet)):
+        raise TypeError(
+            f"Object of type {type(o).__name__} is not JSON serializable; return its public "
+            "fields instead"
+        )
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _stdlib_default(o):
+    # The types orjson serializes by itself, formatted the same way.
+    if isinstance(o, datetime):
+        return (o if o.tzinfo else o.replace(tzinfo=UTC)).isoformat()
+    if isinstance(o, date):
+        return o.isoformat()
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    return _default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (see module docstring)."""
+
+    # Key order is kept as built; sorting costs time on every response.
+    sort_keys = False
+    # orjson always writes UTF-8; the stdlib fallback matches it.
+    ensure_ascii = False
+
+    def dumps(self, obj, **kwargs) -> str:
+        if orjson is None or not kwargs.keys() <= {"indent", "sort_keys"}:
+            kwargs.setdefault("default", _stdlib_default)
+            kwargs.setdefault("sort_keys", self.sort_keys)
+            kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+            return json.dumps(obj, **kwargs)
+        return self._dumps_bytes(
+            obj, indent=kwargs.get("indent"), sort_keys=kwargs.get("sort_keys")
+        ).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        if orjson is None:
+            separators = None if indent else (",", ":")
+            body = self.dumps(obj, indent=indent, separators=separators) + "\n"
+        else:
+            body = self._dumps_bytes(obj, indent=indent) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+    def _dumps_bytes(self, obj, indent=None, sort_keys=None) -> bytes:
+        option = BASE_OPTIONS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_default, option=option)
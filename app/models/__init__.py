@@ -7,6 +7,7 @@ from .user import User
 from .analytics_data import AnalyticsData
 from .appointment import Appointment
 from .medical_record import MedicalRecord
+from .email_outbox import OutboxEmail
 
-__all__ = ["User", "Appointment", "MedicalRecord", "AnalyticsData"]
+__all__ = ["User", "Appointment", "MedicalRecord", "AnalyticsData", "OutboxEmail"]
 # fmt: on
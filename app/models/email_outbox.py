@@ -0,0 +1,66 @@
+"""
+OutboxEmail Schema
+
+Persists queued outgoing emails so they survive process restarts when the email outbox
+runs with MAIL_OUTBOX_PERSIST enabled. Each message is claimed by one dispatcher at a
+time through ``claimed_by``/``claimed_at``; claims older than the lease are recovered.
+
+Indexes:
+- Compound index on (status, claimed_at) for recovering stale queued messages.
+"""
+
+from datetime import UTC, datetime
+
+from app import db
+
+
+class OutboxEmail(db.Document):
+    """
+    MongoEngine document schema for queued outgoing emails.
+    """
+
+    STATUS_CHOICES = ("queued", "sent", "failed")
+
+    subject = db.StringField(required=True, help_text="Email subject line.")
+
+    recipients = db.ListField(
+        db.StringField(), required=True, help_text="Recipient email addresses."
+    )
+
+    body = db.StringField(required=True, help_text="Plain text email body.")
+
+    sender = db.StringField(help_text="From address (defaults to MAIL_DEFAULT_SENDER).")
+
+    status = db.StringField(
+        required=True,
+        choices=STATUS_CHOICES,
+        default="queued",
+        help_text="Delivery state of the message.",
+    )
+
+    attempts = db.IntField(default=0, help_text="Number of delivery attempts so far.")
+
+    last_error = db.StringField(help_text="Error from the most recent failed attempt.")
+
+    claimed_by = db.StringField(help_text="Dispatcher (host:pid) currently owning the message.")
+
+    claimed_at = db.DateTimeField(
+        default=lambda: datetime.now(UTC),
+        help_text="When the owning dispatcher last claimed or retried the message.",
+    )
+
+    created_at = db.DateTimeField(
+        default=lambda: datetime.now(UTC), help_text="When the message was enqueued."
+    )
+
+    sent_at = db.DateTimeField(help_text="When the message was handed to the SMTP server.")
+
+    meta = {
+        "indexes": [
+            {"fields": ["status", "claimed_at"], "name": "outbox_status_claimed_at_idx"},
+        ],
+        "collection": "email_outbox",
+    }
+
+    def __str__(self):
+        return f"OutboxEmail({self.id}): '{self.subject}' to {', '.join(self.recipients)}"
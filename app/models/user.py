@@ -76,3 +76,79 @@ class User(Document):
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.email})"
+
+
+class UserSummary:
+    """
+    Lightweight read model holding a user's identity and display fields.
+
+    Loaded with a projected raw query (``only()`` + ``as_pymongo``), so no MongoEngine
+    document, embedded EmergencyContact/InsuranceInfo, or field validation is built. This
+    is what the process-local user cache stores: it carries no password hash or account
+    state, which other workers could change while a cached copy is still live.
+    """
+
+    __slots__ = ("id", "email", "role", "first_name")
+
+    FIELDS = ("email", "role", "first_name")
+
+    def __init__(self, id, email, role, first_name):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.first_name = first_name
+
+    @classmethod
+    def from_son(cls, doc: dict) -> "UserSummary":
+        """Build the read model from a raw ``users`` document (missing fields use defaults)."""
+        return cls(
+            id=doc["_id"],
+            email=doc.get("email"),
+            role=doc.get("role"),
+            first_name=doc.get("first_name", ""),
+        )
+
+    @classmethod
+    def by_email(cls, email: str):
+        """Fetch the read model for ``email`` in one projected query, or None if no such user."""
+        doc = User.objects(email=email).only(*cls.FIELDS).as_pymongo().first()
+        return cls.from_son(doc) if doc else None
+
+    @classmethod
+    def by_id(cls, user_id):
+        """Fetch the read model by document id, or None if no such user."""
+        doc = User.objects(id=user_id).only(*cls.FIELDS).as_pymongo().first()
+        return cls.from_son(doc) if doc else None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.id}, {self.email}, role={self.role})"
+
+
+class UserCredentials(UserSummary):
+    """
+    ``UserSummary`` plus what the login flow checks: the password hash, email verification
+    and two-factor flags. Always read fresh from MongoDB, never cached.
+    """
+
+    __slots__ = ("password_hash", "verified", "two_factor_enabled")
+
+    FIELDS = UserSummary.FIELDS + ("password_hash", "verified", "two_factor_enabled")
+
+    def __init__(self, id, email, password_hash, role, verified, two_factor_enabled, first_name):
+        super().__init__(id, email, role, first_name)
+        self.password_hash = password_hash
+        self.verified = verified
+        self.two_factor_enabled = two_factor_enabled
+
+    @classmethod
+    def from_son(cls, doc: dict) -> "UserCredentials":
+        """Build credentials from a raw ``users`` document (missing fields use model defaults)."""
+        return cls(
+            id=doc["_id"],
+            email=doc.get("email"),
+            password_hash=doc.get("password_hash", ""),
+            role=doc.get("role"),
+            verified=doc.get("verified", False),
+            two_factor_enabled=doc.get("two_factor_enabled", False),
+            first_name=doc.get("first_name", ""),
+        )
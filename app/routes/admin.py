@@ -0,0 +1,138 @@
+# File: app/routes/admin.py
+"""
+Administration Routes
+
+This module defines admin-only endpoints for:
+  - Bulk user import from an NDJSON or CSV upload
+  - Reading request profiles recorded by the on-demand profiler
+
+Dependencies:
+  - Flask-JWT-Extended (via ``role_required``) for access control.
+  - The bulk import service for streaming validation, hashing and chunked inserts.
+  - The background email outbox for verification emails.
+"""
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from app.decorators import role_required
+from app.extensions import outbox, profiler
+from app.routes.auth import verification_email
+from app.services.user_import import (
+    IMPORT_FORMATS,
+    IMPORTABLE_ROLES,
+    ImportInterrupted,
+    import_users,
+    read_rows,
+)
+
+admin_bp = Blueprint("admin", __name__)
+
+# Content types accepted for each import format (``?format=`` overrides the header).
+IMPORT_CONTENT_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json": "ndjson",
+    "text/csv": "csv",
+}
+
+
+@admin_bp.route("/users/import", methods=["POST"])
+@role_required("admin")
+def import_users_route():
+    """
+    Import users in bulk from the request body.
+
+    The body is one JSON object per line (NDJSON) or CSV with a header row, using the
+    same fields as ``/api/auth/register/<role>``. Rows are processed as they stream in;
+    invalid rows and duplicate emails are reported without aborting the import.
+
+    Query parameters:
+      - format: "ndjson" or "csv" (defaults to the Content-Type).
+      - role: Role for rows without a ``role`` column ('patient' or 'doctor').
+      - send_email: Queue verification emails for imported users (default true).
+
+    Returns:
+        JSON report with total, imported and failed counts, per-row errors and the last
+        row processed. If password hashing fails part-way, the same report covers the rows
+        handled until then and comes with a 503.
+    """
+    fmt = request.args.get("format") or IMPORT_CONTENT_TYPES.get(request.mimetype)
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({"msg": "Upload NDJSON or CSV (set Content-Type or ?format=)."}), 415
+
+    default_role = request.args.get("role", "patient")
+    if default_role not in IMPORTABLE_ROLES:
+        return jsonify({"msg": "Invalid role specified."}), 400
+
+    on_inserted = None
+    if request.args.get("send_email", "true").lower() in ["true", "1", "yes"]:
+
+        def on_inserted(users):
+            outbox.enqueue_many(verification_email(user) for user in users)
+
+    try:
+        report = import_users(
+            read_rows(request.stream, fmt),
+            default_role=default_role,
+            chunk_size=current_app.config["USER_IMPORT_CHUNK_SIZE"],
+            max_errors=current_app.config["USER_IMPORT_MAX_ERRORS"],
+            on_inserted=on_inserted,
+            hash_workers=current_app.config["USER_IMPORT_HASH_WORKERS"],
+        )
+    except ImportInterrupted as e:
+        current_app.logger.warning(
+            "Bulk import interrupted after row %d: %d imported, %d failed",
+            e.report["last_row"],
+            e.report["imported"],
+            e.report["failed"],
+        )
+        body = {
+            "msg": "Import interrupted; password hashing failed. "
+            "Rows after last_row were not imported; upload them again.",
+            "error": str(e),
+            **e.report,
+        }
+        return jsonify(body), 503
+
+    current_app.logger.info(
+        "Bulk import: %d imported, %d failed", report["imported"], report["failed"]
+    )
+    return jsonify(report), 200
+
+
+@admin_bp.route("/profiles", methods=["GET"])
+@role_required("admin")
+def list_profiles():
+    """
+    List stored request profiles, newest first.
+
+    Query parameters:
+      - limit: Maximum number of profiles (default 50).
+
+    Returns:
+        JSON with ``profiles``: id, request, trigger, mode, duration and sample count.
+    """
+    limit = request.args.get("limit", 50, type=int)
+    return jsonify({"profiles": profiler.list_profiles(limit)}), 200
+
+
+@admin_bp.route("/profiles/<profile_id>", methods=["GET"])
+@role_required("admin")
+def get_profile(profile_id):
+    """
+    Return one request profile.
+
+    Query parameters:
+      - format: "json" (default) for the summary with the top functions by cumulative
+        time, or "collapsed" for the flamegraph-compatible collapsed stacks.
+
+    Returns:
+        The profile (200) or 404 if it does not exist (or has been pruned).
+    """
+    collapsed = request.args.get("format") == "collapsed"
+    profile = profiler.load(profile_id, collapsed=collapsed)
+    if profile is None:
+        return jsonify({"msg": "Profile not found."}), 404
+    if collapsed:
+        return Response(profile, content_type="text/plain; charset=utf-8")
+    return jsonify(profile), 200
@@ -12,18 +12,17 @@ This module defines endpoints for:
 
 Dependencies:
   - Flask and Flask-JWT-Extended for routing and JWT management.
-  - itsdangerous for secure token generation and confirmation.
-  - bcrypt for password hashing.
-  - Flask-Mail for sending emails.
+  - itsdangerous (via the token service) for secure token generation and confirmation.
+  - bcrypt (via the password hashing worker pool) for password hashing.
+  - Flask-Mail (through the background email outbox) for sending emails.
   - Authlib for OAuth support.
   - MongoEngine for database interactions.
 """
 
 import random
 import string
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, datetime
 
-import bcrypt
 from flask import Blueprint, current_app, jsonify, request, url_for
 from flask_jwt_extended import (
     create_access_token,
@@ -32,19 +31,31 @@ from flask_jwt_extended import (
     get_jwt_identity,
     jwt_required,
 )
-from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
-
-from app.extensions import mail, oauth
-from app.models.user import User
+from mongoengine import NotUniqueError
+
+from app.decorators import rate_limit
+from app.extensions import (
+    oauth,
+    oauth_metadata,
+    outbox,
+    password_hasher,
+    tokens,
+    ttl_store,
+    user_cache,
+)
+from app.models.user import User, UserCredentials
+from app.services.passwords import PasswordHashingError
 
 auth_bp = Blueprint("auth", __name__)
 
 # Error messages
 USER_NOT_FOUND_MSG = "User not found."
+USER_EXISTS_MSG = "User with this email already exists."
+HASHING_UNAVAILABLE_MSG = "Server is busy, please try again shortly."
 
-# In-memory store for 2FA codes (for demonstration purposes only).
-# For production, use a persistent store (e.g., Redis) with expiration.
-two_factor_store = {}
+# Pending 2FA codes live in the shared TTL store under this prefix, so a /verify-2fa
+# request can be served by a different worker than the /login that issued the code.
+OTP_KEY_PREFIX = "otp:"
 
 
 def generate_token(email: str, salt: str) -> str:
@@ -58,11 +69,12 @@ def generate_token(email: str, salt: str) -> str:
     Returns:
         str: The generated token.
     """
-    serializer = URLSafeTimedSerializer(current_app.config["SECRET_KEY"])
-    return serializer.dumps(email, salt=salt)
+    return tokens.issue(email, salt=salt)
 
 
-def confirm_token(token: str, salt: str, expiration: int = 3600) -> str | None:
+def confirm_token(
+    token: str, salt: str, expiration: int = 3600, single_use: bool = False
+) -> str | None:
     """
     Confirm the token's validity and retrieve the associated email.
 
@@ -70,31 +82,75 @@ def confirm_token(token: str, salt: str, expiration: int = 3600) -> str | None:
         token (str): The token to validate.
         salt (str): The salt used during token generation.
         expiration (int, optional): Token validity period in seconds (default is 3600).
+        single_use (bool, optional): Reject tokens that were already accepted once.
 
     Returns:
         str | None: The email if valid; otherwise, None.
     """
-    serializer = URLSafeTimedSerializer(current_app.config["SECRET_KEY"])
-    try:
-        email = serializer.loads(token, salt=salt, max_age=expiration)
-    except (SignatureExpired, BadSignature):
-        return None
-    return email
+    return tokens.verify(token, salt=salt, max_age=expiration, single_use=single_use)
+
+
+def release_token(token: str, salt: str) -> None:
+    """
+    Make a single-use token usable again after the action it authorized failed.
+
+    Args:
+        token (str): The token accepted by ``confirm_token``.
+        salt (str): The salt used during token generation.
+    """
+    tokens.release(token, salt=salt)
+
+
+def upgrade_password_hash(user, password: str) -> None:
+    """
+    Rehash a password at the configured BCRYPT_ROUNDS in the background and store it.
+
+    The update is conditional on the old hash, so a password reset that lands while the
+    rehash is running is never overwritten.
+
+    Args:
+        user (UserCredentials): The user whose stored hash uses an outdated cost.
+        password (str): The plain-text password that just verified successfully.
+    """
+    old_hash = user.password_hash
+
+    def store(new_hash):
+        User.objects(id=user.id, password_hash=old_hash).update_one(set__password_hash=new_hash)
+        user_cache.invalidate(user_id=user.id, email=user.email)
+
+    password_hasher.rehash_in_background(password, store)
 
 
 def send_email(subject: str, recipients: list, body: str) -> None:
     """
-    Send an email using Flask-Mail.
+    Queue an email on the outbox; delivery happens on the background dispatcher.
 
     Args:
         subject (str): Email subject line.
         recipients (list): List of recipient email addresses.
         body (str): Plain text email body.
     """
-    from flask_mail import Message
+    outbox.enqueue(subject, recipients, body)
+
+
+def verification_email(user) -> dict:
+    """
+    Build the email-verification message for a newly registered user.
+
+    Args:
+        user (User): The user to verify (needs ``email`` and ``first_name``).
 
-    msg = Message(subject=subject, recipients=recipients, body=body)
-    mail.send(msg)
+    Returns:
+        dict: Message with subject, recipients and body, as accepted by the outbox.
+    """
+    token = generate_token(user.email, salt="email-confirm")
+    verification_link = url_for("auth.verify_email", token=token, _external=True)
+    body = (
+        f"Hi {user.first_name},\n\n"
+        f"Please verify your email by clicking the link below:\n{verification_link}\n\n"
+        "If you did not sign up, please ignore this email."
+    )
+    return {"subject": "Verify Your Email", "recipients": [user.email], "body": body}
 
 
 @auth_bp.route("/status", methods=["GET"])
@@ -144,12 +200,11 @@ def register(role: str):
     if not data or not all(field in data for field in required_fields):
         return jsonify({"msg": "Missing required fields."}), 400
 
-    if User.objects(email=data["email"]).first():
-        return jsonify({"msg": "User with this email already exists."}), 400
-
-    # Hash the password using bcrypt.
-    password_bytes = data["password"].encode("utf-8")
-    hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt()).decode("utf-8")
+    # Hash the password using bcrypt on the hashing worker pool.
+    try:
+        hashed = password_hasher.hash_password(data["password"])
+    except PasswordHashingError:
+        return jsonify({"msg": HASHING_UNAVAILABLE_MSG}), 503
 
     # Create the user instance.
     user = User(
@@ -162,22 +217,18 @@ def register(role: str):
         address=data["address"],
         emergency_contact=data["emergency_contact"],
     )
+    # A single insert; the unique email index rejects duplicates atomically.
     try:
-        user.save()
+        user.save(force_insert=True)
+    except NotUniqueError:
+        return jsonify({"msg": USER_EXISTS_MSG}), 400
     except Exception as e:
         return jsonify({"msg": "Error creating user", "error": str(e)}), 500
 
     # Generate and send email verification token.
-    token = generate_token(user.email, salt="email-confirm")
-    verification_link = url_for("auth.verify_email", token=token, _external=True)
-    subject = "Verify Your Email"
-    body = (
-        f"Hi {user.first_name},\n\n"
-        f"Please verify your email by clicking the link below:\n{verification_link}\n\n"
-        "If you did not sign up, please ignore this email."
-    )
+    message = verification_email(user)
     try:
-        send_email(subject, [user.email], body)
+        send_email(message["subject"], message["recipients"], message["body"])
     except Exception as e:
         current_app.logger.error(f"Failed to send verification email: {e}")
 
@@ -198,23 +249,31 @@ def verify_email(token: str):
     Returns:
         JSON response indicating the verification status.
     """
-    email = confirm_token(token, salt="email-confirm")
+    email = confirm_token(token, salt="email-confirm", single_use=True)
     if not email:
         return jsonify({"msg": "Verification link is invalid or expired."}), 400
 
-    user = User.objects(email=email).first()
-    if not user:
+    # One targeted update; only when nothing matched do we look at why.
+    try:
+        updated = User.objects(email=email, verified=False).update_one(
+            set__verified=True, set__updated_at=datetime.now(UTC)
+        )
+        exists = updated or User.objects(email=email).only("id").first()
+    except Exception:
+        release_token(token, salt="email-confirm")
+        raise
+    if updated:
+        user_cache.invalidate(email=email)
+        return jsonify({"msg": "Email verified successfully."}), 200
+
+    if not exists:
+        release_token(token, salt="email-confirm")
         return jsonify({"msg": USER_NOT_FOUND_MSG}), 404
-
-    if user.verified:
-        return jsonify({"msg": "Account already verified."}), 200
-
-    user.verified = True
-    user.save()
-    return jsonify({"msg": "Email verified successfully."}), 200
+    return jsonify({"msg": "Account already verified."}), 200
 
 
 @auth_bp.route("/login", methods=["POST"])
+@rate_limit("login", per_ip="30/minute", per_email="10/minute")
 def login():
     """
     Authenticate the user and issue JWT tokens.
@@ -233,22 +292,30 @@ def login():
     if not data or "email" not in data or "password" not in data:
         return jsonify({"msg": "Email and password required."}), 400
 
-    user = User.objects(email=data["email"]).first()
-    if not user or not bcrypt.checkpw(
-        data["password"].encode("utf-8"), user.password_hash.encode("utf-8")
-    ):
+    # Credentials are read fresh, never from the user cache (see app/services/user_cache.py).
+    user = UserCredentials.by_email(data["email"])
+    try:
+        valid = user is not None and password_hasher.check_password(
+            data["password"], user.password_hash
+        )
+    except PasswordHashingError:
+        return jsonify({"msg": HASHING_UNAVAILABLE_MSG}), 503
+    if not valid:
         return jsonify({"msg": "Invalid credentials."}), 401
 
+    # Transparently move the stored hash to the configured cost factor.
+    if password_hasher.needs_rehash(user.password_hash):
+        upgrade_password_hash(user, data["password"])
+
     if not user.verified:
         return jsonify({"msg": "Email not verified. Please verify your email."}), 403
 
     # If 2FA is enabled, generate and send a one-time password (OTP).
     if user.two_factor_enabled:
         otp = "".join(random.choices(string.digits, k=6))
-        two_factor_store[user.email] = {
-            "otp": otp,
-            "expires_at": datetime.now(UTC) + timedelta(minutes=5),
-        }
+        ttl_store.set(
+            OTP_KEY_PREFIX + user.email, {"otp": otp}, current_app.config["OTP_TTL_SECONDS"]
+        )
         subject = "Your 2FA Code"
         body = f"Your Two-Factor Authentication code is: {otp}"
         try:
@@ -281,21 +348,20 @@ def verify_2fa():
     if not data or "email" not in data or "otp" not in data:
         return jsonify({"msg": "Email and OTP required."}), 400
 
-    record = two_factor_store.get(data["email"])
+    # Expired codes are dropped by the store, so they read as missing.
+    otp_key = OTP_KEY_PREFIX + data["email"]
+    record = ttl_store.get(otp_key)
     if not record:
-        return jsonify({"msg": "No 2FA request found. Please login again."}), 400
-
-    if datetime.now(UTC) > record["expires_at"]:
-        del two_factor_store[data["email"]]
-        return jsonify({"msg": "OTP expired. Please login again."}), 400
+        return jsonify({"msg": "No 2FA request found or OTP expired. Please login again."}), 400
 
     if data["otp"] != record["otp"]:
         return jsonify({"msg": "Invalid OTP."}), 400
 
-    # Clear the OTP record after successful verification.
-    del two_factor_store[data["email"]]
+    # Consume the OTP atomically so a code can only complete one login.
+    if not ttl_store.pop(otp_key):
+        return jsonify({"msg": "No 2FA request found or OTP expired. Please login again."}), 400
 
-    user = User.objects(email=data["email"]).first()
+    user = user_cache.by_email(data["email"])
     if not user:
         return jsonify({"msg": USER_NOT_FOUND_MSG}), 404
 
@@ -322,6 +388,7 @@ def token_refresh():
 
 
 @auth_bp.route("/password-reset-request", methods=["POST"])
+@rate_limit("password-reset", per_ip="10/minute", per_email="3/minute")
 def password_reset_request():
     """
     Initiate a password reset by sending an email with a reset link.
@@ -336,7 +403,7 @@ def password_reset_request():
     if not data or "email" not in data:
         return jsonify({"msg": "Email required."}), 400
 
-    user = User.objects(email=data["email"]).first()
+    user = user_cache.by_email(data["email"])
     if user:
         token = generate_token(user.email, salt="password-reset")
         reset_link = url_for("auth.password_reset", token=token, _external=True)
@@ -367,22 +434,31 @@ def password_reset(token: str):
     Returns:
         JSON response indicating success or failure of the password reset.
     """
-    email = confirm_token(token, salt="password-reset")
-    if not email:
-        return jsonify({"msg": "Reset link is invalid or expired."}), 400
-
     data = request.get_json()
     if not data or "new_password" not in data:
         return jsonify({"msg": "New password required."}), 400
 
-    user = User.objects(email=email).first()
-    if not user:
-        return jsonify({"msg": USER_NOT_FOUND_MSG}), 404
+    # Validate the payload first so a malformed request does not burn the link.
+    email = confirm_token(token, salt="password-reset", single_use=True)
+    if not email:
+        return jsonify({"msg": "Reset link is invalid or expired."}), 400
 
-    new_password_bytes = data["new_password"].encode("utf-8")
-    new_hashed = bcrypt.hashpw(new_password_bytes, bcrypt.gensalt()).decode("utf-8")
-    user.password_hash = new_hashed
-    user.save()
+    # Every failure below releases the link again, so the user can retry it.
+    try:
+        new_hashed = password_hasher.hash_password(data["new_password"])
+        updated = User.objects(email=email).update_one(
+            set__password_hash=new_hashed, set__updated_at=datetime.now(UTC)
+        )
+    except PasswordHashingError:
+        release_token(token, salt="password-reset")
+        return jsonify({"msg": HASHING_UNAVAILABLE_MSG}), 503
+    except Exception:
+        release_token(token, salt="password-reset")
+        raise
+    if not updated:
+        release_token(token, salt="password-reset")
+        return jsonify({"msg": USER_NOT_FOUND_MSG}), 404
+    user_cache.invalidate(email=email)
     return jsonify({"msg": "Password reset successful."}), 200
 
 
@@ -394,6 +470,7 @@ def oauth_google():
     Returns:
         A redirection to the Google OAuth authorization URL.
     """
+    oauth_metadata.ensure_fresh("google")
     redirect_uri = url_for("auth.oauth_google_callback", _external=True)
     return oauth.google.authorize_redirect(redirect_uri)
 
@@ -406,6 +483,7 @@ def oauth_google_callback():
     Returns:
         JSON response containing JWT tokens upon successful authentication.
     """
+    oauth_metadata.ensure_fresh("google")
     token = oauth.google.authorize_access_token()
     user_info = oauth.google.parse_id_token(token)
     if not user_info:
@@ -414,10 +492,24 @@ def oauth_google_callback():
     email = user_info.get("email")
     if not email:
         return jsonify({"msg": "Google account does not provide an email."}), 400
+    oauth_id = user_info.get("sub")
+    if not oauth_id:
+        return jsonify({"msg": "Google account does not provide an identifier."}), 400
 
-    # Look for an existing user; if not found, create a new one with default role 'patient'
-    user = User.objects(email=email).first()
+    # Returning Google users resolve through the sparse (oauth_provider, oauth_id) index.
+    user = User.objects(oauth_provider="google", oauth_id=oauth_id).only("id", "role").first()
+    if not user:
+        # An account registered with this email is linked on its first Google login.
+        user = User.objects(email=email).only("id", "role", "oauth_id").first()
+        if user and not user.oauth_id:
+            User.objects(id=user.id, oauth_id=None).update_one(
+                set__oauth_provider="google",
+                set__oauth_id=oauth_id,
+                set__updated_at=datetime.now(UTC),
+            )
+            user_cache.invalidate(user_id=user.id, email=email)
     if not user:
+        # Otherwise create a new one with default role 'patient'.
         user = User(
             email=email,
             password_hash="",  # OAuth users do not have a local password.
@@ -429,7 +521,7 @@ def oauth_google_callback():
             emergency_contact={"name": "", "relationship": "", "phone_number": ""},
             verified=True,
             oauth_provider="google",
-            oauth_id=user_info.get("sub"),
+            oauth_id=oauth_id,
         )
         user.save()
 
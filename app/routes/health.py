@@ -0,0 +1,45 @@
+# File: app/routes/health.py
+"""
+Health Routes
+
+This module defines the endpoints an orchestrator (or load balancer) polls:
+  - /healthz: Liveness. The process is up and serving requests; no dependencies touched.
+  - /readyz: Readiness. MongoDB answers, indexes are in place and (optionally) SMTP is
+    reachable; 503 until then, so no traffic reaches a worker that cannot serve it.
+
+Probe results are cached briefly by the health checks service, so polling /readyz often
+does not load the database.
+"""
+
+from flask import Blueprint, jsonify
+
+from app.extensions import health_checks
+from app.services.health import public_checks
+
+health_bp = Blueprint("health", __name__)
+
+
+@health_bp.route("/healthz", methods=["GET"])
+def healthz():
+    """
+    Liveness check.
+
+    Returns:
+        JSON response with status "ok" (200).
+    """
+    return jsonify({"status": "ok"}), 200
+
+
+@health_bp.route("/readyz", methods=["GET"])
+def readyz():
+    """
+    Readiness check with per-dependency results and latency.
+
+    Returns:
+        JSON response with status "ready" (200) or "unavailable" (503) and a ``checks``
+        object: ``ok``, ``latency_ms``, ``critical`` and ``age_s`` (seconds since the probe
+        ran) for each dependency. Failure details go to the log only.
+    """
+    ready, checks = health_checks.readiness()
+    status = "ready" if ready else "unavailable"
+    return jsonify({"status": status, "checks": public_checks(checks)}), 200 if ready else 503
@@ -0,0 +1,41 @@
+# File: app/routes/metrics.py
+"""
+Metrics Route
+
+This module defines the Prometheus scrape endpoint:
+  - /metrics: Request, password hashing, email outbox and MongoDB metrics in the
+    Prometheus text format, aggregated over all gunicorn workers.
+
+Set METRICS_TOKEN to require ``Authorization: Bearer <token>`` on scrapes. Without a token
+the endpoint is refused unless METRICS_PUBLIC is on (the default outside production).
+"""
+
+import hmac
+
+from flask import Blueprint, Response, jsonify, request
+
+from app.extensions import metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def scrape():
+    """
+    Render the current metrics.
+
+    Returns:
+        Prometheus text exposition (200), 401 without a valid token when METRICS_TOKEN is
+        set, 403 when no token is set and METRICS_PUBLIC is off, or 404 when metrics are
+        disabled.
+    """
+    if not metrics.enabled:
+        return jsonify({"msg": "Metrics are disabled."}), 404
+    if not metrics.token and not metrics.public:
+        return jsonify({"msg": "Set METRICS_TOKEN to scrape metrics."}), 403
+    if metrics.token:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(supplied.encode(), metrics.token.encode()):
+            return jsonify({"msg": "Invalid metrics token."}), 401
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
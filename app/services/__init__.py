@@ -0,0 +1,8 @@
+# File: app/services/__init__.py
+"""
+Application services shared by the route blueprints.
+
+Each service follows the Flask extension pattern: it is instantiated once in
+``app/extensions.py`` and bound to the application through ``init_app`` inside
+``init_extensions``.
+"""
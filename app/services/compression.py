@@ -0,0 +1,252 @@
+# File: app/services/compression.py
+"""
+Response Compression
+
+WSGI middleware (installed around ``app.wsgi_app``) that compresses responses with brotli
+or gzip, whichever the client prefers in ``Accept-Encoding`` (brotli on a tie).
+
+A response is compressed only when:
+- Its mimetype is text-like (COMPRESS_MIMETYPES) and it has no Content-Encoding yet.
+- It has a Content-Length of at least COMPRESS_MIN_SIZE bytes. Streamed responses
+  (no Content-Length) are passed through untouched, so they keep streaming.
+- The request is not HEAD, the status has a body (not 1xx/204/206/304), and the response
+  does not forbid it with ``Cache-Control: no-transform``.
+- The compressed body is actually smaller.
+
+Responses of compressible types get ``Vary: Accept-Encoding`` whether or not they were
+compressed, so shared caches keep the variants apart. Strong ETags become weak, since
+the compressed bytes differ from the original representation.
+
+Levels default to fast settings (brotli 4, gzip 5): on API payloads they keep most of the
+size win for a fraction of the CPU of the maximum levels. Counters (``stats()``) report
+bytes in/out, the overall ratio and time spent compressing; ``timing_hooks`` receive the
+same per response for /metrics (app/services/metrics.py).
+
+Configuration:
+- COMPRESS_ENABLED: Install the middleware (default True).
+- COMPRESS_MIN_SIZE: Smallest body, in bytes, worth compressing.
+- COMPRESS_BR_LEVEL / COMPRESS_GZIP_LEVEL: Brotli quality (0-11) and gzip level (1-9).
+- COMPRESS_MIMETYPES: Mimetypes to compress.
+"""
+
+import gzip
+import threading
+import time
+
+DEFAULT_MIMETYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/css",
+    "text/csv",
+    "text/html",
+    "text/plain",
+    "text/xml",
+)
+# Statuses that never carry a body (or carry a byte range that must not be re-encoded).
+SKIP_STATUSES = frozenset({204, 206, 304})
+
+_brotli = None
+
+
+def _load_brotli():
+    """Import brotli on first use; None when it is not installed."""
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+        except ImportError:
+            brotli = False
+        _brotli = brotli
+    return _brotli or None
+
+
+def negotiate_encoding(accept_encoding: str, brotli_available: bool = True) -> str | None:
+    """
+    Pick "br" or "gzip" from an ``Accept-Encoding`` header, or None for neither.
+
+    Quality values are honoured (``q=0`` refuses an encoding); ``*`` stands for any
+    encoding not listed. Between equal qualities brotli wins.
+    """
+    qualities = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name] = quality
+
+    wildcard = qualities.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli_available else ["gzip"]
+    best, best_quality = None, 0.0
+    for name in candidates:
+        quality = qualities.get(name, wildcard)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+class Compression:
+    """Flask extension installing the compression middleware and keeping its counters."""
+
+    def __init__(self, app=None):
+        self.min_size = 1024
+        self.br_level = 4
+        self.gzip_level = 5
+        self.mimetypes = frozenset(DEFAULT_MIMETYPES)
+        self._lock = threading.Lock()
+        self._counters = {
+            "compressed": 0,
+            "br": 0,
+            "gzip": 0,
+            "skipped_small": 0,
+            "skipped_streamed": 0,
+            "skipped_not_smaller": 0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+            "compress_seconds": 0.0,
+        }
+        # Callables receiving (encoding, bytes in, bytes sent, seconds) for every body that
+        # was compressed, including ones sent uncompressed because they did not shrink.
+        self.timing_hooks = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("COMPRESS_ENABLED", True)
+        app.config.setdefault("COMPRESS_MIN_SIZE", 1024)
+        app.config.setdefault("COMPRESS_BR_LEVEL", 4)
+        app.config.setdefault("COMPRESS_GZIP_LEVEL", 5)
+        app.config.setdefault("COMPRESS_MIMETYPES", DEFAULT_MIMETYPES)
+        self.min_size = app.config["COMPRESS_MIN_SIZE"]
+        self.br_level = app.config["COMPRESS_BR_LEVEL"]
+        self.gzip_level = app.config["COMPRESS_GZIP_LEVEL"]
+        self.mimetypes = frozenset(app.config["COMPRESS_MIMETYPES"])
+        if app.config["COMPRESS_ENABLED"]:
+            app.wsgi_app = CompressionMiddleware(app.wsgi_app, self)
+        app.extensions["compression"] = self
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        """Compress ``body`` with "br" or "gzip" at the configured level."""
+        if encoding == "br":
+            return _load_brotli().compress(body, quality=self.br_level)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def stats(self) -> dict:
+        """Return counters plus the overall compression ratio (bytes in / bytes out)."""
+        with self._lock:
+            stats = dict(self._counters)
+        stats["ratio"] = stats["bytes_in"] / stats["bytes_out"] if stats["bytes_out"] else None
+        return stats
+
+    def _count(self, name: str, **amounts):
+        with self._lock:
+            self._counters[name] += 1
+            for key, value in amounts.items():
+                self._counters[key] += value
+
+    def _observe(self, encoding: str, bytes_in: int, bytes_out: int, seconds: float):
+        for hook in self.timing_hooks:
+            hook(encoding, bytes_in, bytes_out, seconds)
+
+
+class CompressionMiddleware:
+    """WSGI wrapper applying ``Compression`` to every response (see module docstring)."""
+
+    def __init__(self, wsgi_app, compression: Compression):
+        self.wsgi_app = wsgi_app
+        self.compression = compression
+
+    def __call__(self, environ, start_response):
+        if environ.get("REQUEST_METHOD") == "HEAD":
+            return self.wsgi_app(environ, start_response)
+        encoding = negotiate_encoding(
+            environ.get("HTTP_ACCEPT_ENCODING", ""), brotli_available=_load_brotli() is not None
+        )
+        pending = {}
+
+        def capture(status, headers, exc_info=None):
+            if exc_info is None and self._should_buffer(status, headers, encoding):
+                pending.update(status=status, headers=headers)
+                return pending.setdefault("chunks", []).append
+            return start_response(status, self._vary(headers), exc_info)
+
+        app_iter = self.wsgi_app(environ, capture)
+        if not pending:
+            return app_iter
+        try:
+            pending["chunks"].extend(app_iter)
+        finally:
+            if hasattr(app_iter, "close"):
+                app_iter.close()
+        return self._compressed(pending, encoding, start_response)
+
+    def _should_buffer(self, status: str, headers: list, encoding: str | None) -> bool:
+        """Decide from the headers alone whether this response gets compressed."""
+        names = {name.lower(): value for name, value in headers}
+        mimetype = names.get("content-type", "").split(";")[0].strip().lower()
+        if mimetype not in self.compression.mimetypes:
+            return False
+        if encoding is None or "content-encoding" in names:
+            return False
+        if int(status.split(" ", 1)[0]) in SKIP_STATUSES or status.startswith("1"):
+            return False
+        if "no-transform" in names.get("cache-control", "").lower():
+            return False
+        if "content-length" not in names:
+            self.compression._count("skipped_streamed")
+            return False
+        if int(names["content-length"]) < self.compression.min_size:
+            self.compression._count("skipped_small")
+            return False
+        return True
+
+    def _vary(self, headers: list) -> list:
+        names = {name.lower(): value for name, value in headers}
+        mimetype = names.get("content-type", "").split(";")[0].strip().lower()
+        if mimetype not in self.compression.mimetypes:
+            return headers
+        vary = names.get("vary", "")
+        if "accept-encoding" in vary.lower() or vary.strip() == "*":
+            return headers
+        headers = [(name, value) for name, value in headers if name.lower() != "vary"]
+        headers.append(("Vary", f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"))
+        return headers
+
+    def _compressed(self, pending: dict, encoding: str, start_response):
+        body = b"".join(pending["chunks"])
+        started = time.perf_counter()
+        compressed = self.compression.compress(body, encoding)
+        elapsed = time.perf_counter() - started
+        headers = self._vary(pending["headers"])
+        if len(compressed) >= len(body):
+            self.compression._count("skipped_not_smaller", compress_seconds=elapsed)
+            self.compression._observe(encoding, len(body), len(body), elapsed)
+            start_response(pending["status"], headers)
+            return [body]
+
+        self.compression._count(
+            "compressed", bytes_in=len(body), bytes_out=len(compressed), compress_seconds=elapsed
+        )
+        self.compression._observe(encoding, len(body), len(compressed), elapsed)
+        self.compression._count(encoding)
+        rewritten = []
+        for name, value in headers:
+            lowered = name.lower()
+            if lowered == "content-length":
+                value = str(len(compressed))
+            elif lowered == "etag" and not value.startswith("W/"):
+                value = f"W/{value}"
+            rewritten.append((name, value))
+        rewritten.append(("Content-Encoding", encoding))
+        start_response(pending["status"], rewritten)
+        return [compressed]
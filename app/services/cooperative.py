@@ -0,0 +1,84 @@
+# File: app/services/cooperative.py
+"""
+Cooperative (gevent) Worker Support
+
+Under gunicorn's gevent worker (GUNICORN_WORKER_CLASS=gevent) the standard library is
+monkey-patched before the app is imported (in gunicorn.conf.py and run.py), so waiting on
+MongoDB (pymongo), SMTP (Flask-Mail/smtplib) and HTTP (Authlib/requests) yields to other
+requests instead of blocking the worker.
+
+CPU-bound work does not yield. Patched ``threading`` turns ordinary threads into
+greenlets, so password hashing uses ``real_thread_pool`` instead: gevent's pool of native
+threads, on which bcrypt runs in parallel because it releases the GIL. Background
+samplers that must keep running while a greenlet computes use ``native_thread``.
+"""
+
+import sys
+import threading
+import time
+
+# Modules that must be patched for network waits to yield.
+REQUIRED_PATCHES = ("socket", "ssl", "select", "threading", "time")
+
+
+def gevent_patched() -> bool:
+    """True when gevent has monkey-patched ``threading`` in this process."""
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("threading")
+
+
+def unpatched_modules() -> list[str]:
+    """Modules from REQUIRED_PATCHES that gevent has not patched (all of them without gevent)."""
+    monkey = sys.modules.get("gevent.monkey")
+    if monkey is None:
+        return list(REQUIRED_PATCHES)
+    return [name for name in REQUIRED_PATCHES if not monkey.is_module_patched(name)]
+
+
+def real_thread_pool(max_workers: int):
+    """A ``concurrent.futures`` executor on native threads whose futures block only a greenlet."""
+    from gevent.threadpool import ThreadPoolExecutor
+
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+def native_thread(target) -> None:
+    """
+    Run ``target()`` on a new OS thread (a daemon thread), even when ``threading`` is
+    patched. ``target`` should wait with ``native_sleep``: a patched ``time.sleep`` would
+    start a gevent hub on that thread.
+    """
+    if gevent_patched():
+        from gevent import monkey
+
+        monkey.get_original("_thread", "start_new_thread")(target, ())
+    else:
+        threading.Thread(target=target, daemon=True).start()
+
+
+def native_sleep(seconds: float) -> None:
+    """``time.sleep`` as it was before gevent patched it."""
+    if gevent_patched():
+        from gevent import monkey
+
+        monkey.get_original("time", "sleep")(seconds)
+    else:
+        time.sleep(seconds)
+
+
+def native_thread_id() -> int:
+    """Identifier of the calling OS thread (``threading.get_ident`` names the greenlet)."""
+    if gevent_patched():
+        from gevent import monkey
+
+        return monkey.get_original("_thread", "get_ident")()
+    return threading.get_ident()
+
+
+def native_lock():
+    """A lock that blocks the OS thread, shared safely with a ``native_thread``."""
+    if gevent_patched():
+        from gevent import monkey
+
+        return monkey.get_original("_thread", "allocate_lock")()
+    return threading.Lock()
@@ -0,0 +1,173 @@
+# File: app/services/health.py
+"""
+Readiness Probes
+
+Checks the dependencies a worker needs before it should receive traffic, for
+``/readyz`` (app/routes/health.py):
+
+- ``mongo``: a ``ping`` on the default connection, bounded by READINESS_TIMEOUT.
+- ``indexes``: every declared model index exists. Only enforced when workers do not
+  create indexes themselves (MONGODB_AUTO_CREATE_INDEX off); see ``flask db ensure-indexes``.
+- ``smtp``: a TCP connection to MAIL_SERVER:MAIL_PORT, when READINESS_CHECK_SMTP is on. Not
+  critical: email is queued and retried, so an unreachable server is reported without
+  making the worker unready.
+
+Failures are logged with their exception; ``/readyz`` is public, so it only reports
+``public_checks``: whether each probe passed, its latency and age, never error text
+(which can name hosts, databases and indexes).
+
+Each result is cached (READINESS_CACHE_TTL seconds; the index check, which lists every
+collection's indexes, for READINESS_INDEX_CACHE_TTL), so frequent orchestrator probes
+do not turn into database load. Concurrent requests for an expired result wait for a
+single probe instead of each running their own.
+"""
+
+import logging
+import socket
+import threading
+import time
+
+import pymongo
+from flask import current_app
+from mongoengine.connection import get_db
+
+from app.services.indexes import index_plan, managed_documents
+
+logger = logging.getLogger(__name__)
+
+# Probe result fields that are safe to show to unauthenticated callers.
+PUBLIC_FIELDS = ("ok", "latency_ms", "critical", "age_s")
+
+
+def public_checks(checks: dict) -> dict:
+    """Per-probe results reduced to ``PUBLIC_FIELDS``."""
+    return {
+        name: {key: result[key] for key in PUBLIC_FIELDS if key in result}
+        for name, result in checks.items()
+    }
+
+
+def probe_mongo(timeout: float) -> dict:
+    """Round-trip a ``ping`` to MongoDB, giving up after ``timeout`` seconds."""
+    with pymongo.timeout(timeout):
+        get_db().command("ping")
+    return {}
+
+
+def probe_indexes(timeout: float) -> dict:
+    """Fail if declared indexes are missing and nothing would create them on first use."""
+    if current_app.config["MONGODB_AUTO_CREATE_INDEX"]:
+        return {"detail": "created on first use"}
+    with pymongo.timeout(timeout):
+        missing = [
+            f"{plan['collection']}.{index['name']}"
+            for plan in (index_plan(document) for document in managed_documents())
+            for index in plan["create"]
+        ]
+    if missing:
+        raise RuntimeError(f"Missing indexes: {', '.join(missing)}")
+    return {}
+
+
+def probe_smtp(timeout: float) -> dict:
+    """Open (and close) a TCP connection to the configured SMTP server."""
+    config = current_app.config
+    with socket.create_connection((config["MAIL_SERVER"], config["MAIL_PORT"]), timeout=timeout):
+        pass
+    return {}
+
+
+class HealthChecks:
+    """Flask extension running and caching readiness probes."""
+
+    def __init__(self, app=None):
+        self.ttl = 2.0
+        self.timeout = 2.0
+        self._probes = {}  # name -> {"name", "probe", "ttl", "critical", "lock", "result"}
+        self._lock = threading.Lock()
+        self._counters = {"probes": 0, "cache_hits": 0, "failures": 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("READINESS_CACHE_TTL", 2.0)
+        app.config.setdefault("READINESS_INDEX_CACHE_TTL", 60.0)
+        app.config.setdefault("READINESS_TIMEOUT", 2.0)
+        app.config.setdefault("READINESS_CHECK_SMTP", False)
+        self.ttl = app.config["READINESS_CACHE_TTL"]
+        self.timeout = app.config["READINESS_TIMEOUT"]
+        self._probes.clear()
+        self.register("mongo", probe_mongo)
+        self.register("indexes", probe_indexes, ttl=app.config["READINESS_INDEX_CACHE_TTL"])
+        if app.config["READINESS_CHECK_SMTP"]:
+            self.register("smtp", probe_smtp, critical=False)
+        app.extensions["health_checks"] = self
+
+    def register(self, name: str, probe, ttl: float | None = None, critical: bool = True):
+        """
+        Add a probe: a callable taking the timeout that returns a dict of extra details
+        and raises if the dependency is unusable.
+        """
+        self._probes[name] = {
+            "name": name,
+            "probe": probe,
+            "ttl": ttl,
+            "critical": critical,
+            "lock": threading.Lock(),
+            "result": None,
+        }
+
+    def readiness(self) -> tuple[bool, dict]:
+        """
+        Run (or reuse) every probe.
+
+        Returns:
+            tuple[bool, dict]: Whether all critical probes passed, and per-probe results
+            with ``ok``, ``latency_ms``, ``critical``, ``age_s`` and ``error`` or details.
+        """
+        checks = {name: self.check(name) for name in self._probes}
+        ready = all(
+            result["ok"] for name, result in checks.items() if self._probes[name]["critical"]
+        )
+        return ready, checks
+
+    def check(self, name: str) -> dict:
+        """Return the cached result of probe ``name``, probing again once it has expired."""
+        entry = self._probes[name]
+        ttl = self.ttl if entry["ttl"] is None else entry["ttl"]
+        with entry["lock"]:
+            result = entry["result"]
+            if result is None or time.monotonic() - result["checked_at"] >= ttl:
+                result = entry["result"] = self._run(entry)
+            else:
+                with self._lock:
+                    self._counters["cache_hits"] += 1
+        report = {key: value for key, value in result.items() if key != "checked_at"}
+        report["age_s"] = round(time.monotonic() - result["checked_at"], 3)
+        return report
+
+    def clear(self) -> None:
+        """Forget cached results, so the next check probes again."""
+        for entry in self._probes.values():
+            entry["result"] = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def _run(self, entry) -> dict:
+        started = time.perf_counter()
+        try:
+            details = entry["probe"](self.timeout) or {}
+            result = {"ok": True, **details}
+        except Exception as e:
+            result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            logger.warning("Readiness probe %s failed: %s", entry["name"], result["error"])
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        result["critical"] = entry["critical"]
+        result["checked_at"] = time.monotonic()
+        with self._lock:
+            self._counters["probes"] += 1
+            if not result["ok"]:
+                self._counters["failures"] += 1
+        return result
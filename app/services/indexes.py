@@ -0,0 +1,170 @@
+# File: app/services/indexes.py
+"""
+Index Management
+
+Compares the indexes declared in each model's ``meta["indexes"]`` (and unique fields)
+with the indexes that exist on the live collections, and creates or drops the
+difference explicitly (``flask db ensure-indexes``).
+
+This lets runtime workers run with MongoEngine's ``auto_create_index`` turned off
+(MONGODB_AUTO_CREATE_INDEX), so no worker issues ``createIndexes`` on its first query
+and index builds never happen on the request path.
+
+Indexes are matched by key; an index whose key matches but whose options differ
+(unique, sparse, TTL or partial filter) is rebuilt. Live indexes that no model declares
+(e.g. ones created by hand for ops queries) are reported but only dropped when asked for
+(``--drop-extra``), and so are unique indexes that would be rebuilt: the collection
+loses that constraint while the replacement builds.
+
+Changes are applied create-first. New indexes are built before anything is dropped, and
+a rebuilt index is covered by a temporary stand-in (its key plus ``_id``, named
+``<name>_rebuild``) while the old one is dropped and the replacement built, so queries
+never run without an index.
+"""
+
+# Index options that change an index's behaviour and are therefore compared.
+COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+# Suffix of the stand-in index that serves queries while an index is rebuilt.
+REBUILD_SUFFIX = "_rebuild"
+
+
+def managed_documents() -> list:
+    """Every document class exported from ``app.models``."""
+    from app import models
+
+    return [getattr(models, name) for name in models.__all__]
+
+
+def set_auto_create_index(enabled: bool) -> None:
+    """Turn MongoEngine's create-indexes-on-first-use on or off for every managed model."""
+    for document in managed_documents():
+        document._meta["auto_create_index"] = enabled
+
+
+def _collection(document):
+    # Bypasses Document._get_collection(), which would auto-create indexes itself.
+    return document._get_db()[document._get_collection_name()]
+
+
+def _index_name(key) -> str:
+    """MongoDB's default index name, e.g. ``oauth_provider_1_oauth_id_1``."""
+    return "_".join(f"{field}_{direction}" for field, direction in key)
+
+
+def _compared(options: dict) -> dict:
+    return {
+        name: options[name] for name in COMPARED_OPTIONS if options.get(name) not in (None, False)
+    }
+
+
+def declared_indexes(document) -> list[dict]:
+    """
+    Indexes a document class declares, as dicts with ``name``, ``key`` and ``options``.
+    """
+    index_opts = document._meta.get("index_opts") or {}
+    indexes = []
+    for spec in document._meta.get("index_specs") or []:
+        spec = dict(index_opts, **spec)
+        key = [tuple(item) for item in spec.pop("fields")]
+        spec.pop("cls", None)
+        name = spec.pop("name", None) or _index_name(key)
+        indexes.append({"name": name, "key": key, "options": spec})
+    return indexes
+
+
+def live_indexes(collection) -> list[dict]:
+    """Indexes present on a collection (excluding ``_id_``), in the same shape."""
+    indexes = []
+    for name, info in collection.index_information().items():
+        if name == "_id_":
+            continue
+        options = {key: value for key, value in info.items() if key not in ("key", "v", "ns")}
+        indexes.append(
+            {"name": name, "key": [tuple(item) for item in info["key"]], "options": options}
+        )
+    return indexes
+
+
+def index_plan(document, drop_extra: bool = False) -> dict:
+    """
+    Work out what ``ensure-indexes`` would change for one document class.
+
+    Args:
+        document: A MongoEngine Document class.
+        drop_extra (bool): Also drop live indexes that are not declared, and rebuild
+            unique indexes whose options changed.
+
+    Returns:
+        dict: ``collection``, ``create`` (declared indexes), ``drop``, ``unchanged``,
+        ``extra`` and ``protected`` (index names; ``extra`` lists undeclared live indexes
+        and ``protected`` unique indexes left as they are, both also in ``drop`` when
+        ``drop_extra`` is set).
+    """
+    collection = _collection(document)
+    present = live_indexes(collection)
+    live_by_key = {
+        tuple(index["key"]): index
+        for index in present
+        if not index["name"].endswith(REBUILD_SUFFIX)
+    }
+    plan = {
+        "collection": collection.name,
+        "create": [],
+        # Stand-ins left behind by an interrupted rebuild are always cleaned up.
+        "drop": [index["name"] for index in present if index["name"].endswith(REBUILD_SUFFIX)],
+        "unchanged": [],
+        "extra": [],
+        "protected": [],
+    }
+
+    for index in declared_indexes(document):
+        live = live_by_key.pop(tuple(index["key"]), None)
+        if live is None:
+            plan["create"].append(index)
+        elif _compared(live["options"]) == _compared(index["options"]):
+            plan["unchanged"].append(live["name"])
+        elif live["options"].get("unique") and not drop_extra:
+            plan["protected"].append(live["name"])
+        else:
+            plan["drop"].append(live["name"])
+            plan["create"].append(index)
+
+    plan["extra"] = [index["name"] for index in live_by_key.values()]
+    if drop_extra:
+        plan["drop"].extend(plan["extra"])
+    return plan
+
+
+def apply_plan(document, plan: dict) -> None:
+    """
+    Apply ``plan``, building indexes before dropping the ones they replace.
+
+    Brand-new indexes are created first. An index that replaces one being dropped (same
+    key or same name, which MongoDB does not allow twice) gets a stand-in on its key plus
+    ``_id`` that keeps serving queries until the replacement is built. Remaining drops
+    come last.
+    """
+    collection = _collection(document)
+    dropping = [index for index in live_indexes(collection) if index["name"] in plan["drop"]]
+    replaced = set()
+
+    def conflict(index):
+        for live in dropping:
+            if live["name"] == index["name"] or live["key"] == index["key"]:
+                return live["name"]
+        return None
+
+    for index in sorted(plan["create"], key=lambda index: conflict(index) is not None):
+        old = conflict(index)
+        if old is None:
+            collection.create_index(index["key"], name=index["name"], **index["options"])
+            continue
+        stand_in = index["name"] + REBUILD_SUFFIX
+        collection.create_index(index["key"] + [("_id", 1)], name=stand_in)
+        collection.drop_index(old)
+        collection.create_index(index["key"], name=index["name"], **index["options"])
+        collection.drop_index(stand_in)
+        replaced.update((old, stand_in))
+    for name in plan["drop"]:
+        if name not in replaced:
+            collection.drop_index(name)
@@ -0,0 +1,306 @@
+# File: app/services/metrics.py
+"""
+Prometheus Metrics
+
+Records request, compression, password hashing, email outbox, user cache, link token and
+MongoDB command metrics and renders them for ``/metrics`` (app/routes/metrics.py) in the
+Prometheus text format:
+
+- ``http_requests_total{method, blueprint, endpoint, status}``
+- ``http_request_duration_seconds{method, blueprint, endpoint}`` (histogram)
+- ``password_hash_duration_seconds{operation}`` (histogram; "hash" or "check", including
+  time queued for the pool) and ``password_hash_in_flight``
+- ``email_outbox_queue_depth``
+- ``http_compression_input_bytes_total{encoding}`` / ``http_compression_output_bytes_total``
+  (their ratio is the compression ratio) and ``http_compression_duration_seconds{encoding}``
+  (histogram)
+- ``user_cache_events_total{event}`` (hits, misses, evictions, invalidations) and
+  ``user_cache_entries``
+- ``link_token_duration_seconds{operation}`` (histogram; "issue" or "verify") and
+  ``link_tokens_total{operation, outcome}`` for email-verification and password-reset
+  links (outcome "issued", "verified", "rejected" or "replayed")
+- ``mongodb_command_duration_seconds{collection, command}`` (histogram) and
+  ``mongodb_command_failures_total{collection, command}``
+
+Endpoints are labelled by Flask endpoint name (``auth.login``), never by raw path, so
+the number of series stays bounded; unmatched URLs share the ``<unmatched>`` endpoint.
+
+Multiple processes: when PROMETHEUS_MULTIPROC_DIR is set (gunicorn.conf.py sets it up),
+every worker writes its values to memory-mapped files in that directory and a scrape
+of any worker aggregates all of them. Gauges report the sum over live workers.
+
+Configuration:
+- METRICS_ENABLED: Record metrics and serve /metrics (default True).
+- METRICS_TOKEN: If set, /metrics requires ``Authorization: Bearer <token>``.
+- METRICS_PUBLIC: Serve /metrics without a token when none is set (default: off in
+  production, where the endpoint names, collections and traffic volumes would leak).
+"""
+
+import os
+import time
+
+from flask import request
+from pymongo import monitoring
+
+from app.services.mongo import command_collection
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COMPRESS_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+TOKEN_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+MONGO_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# WSGI environ key holding the request start time.
+_STARTED_KEY = "app.metrics.started"
+
+
+def multiprocess_dir() -> str | None:
+    """The shared metrics directory, or None when running as a single process."""
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or None
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener timing every command by collection and command name."""
+
+    def __init__(self, duration, failures):
+        self.duration = duration
+        self.failures = failures
+        self._collections = {}  # (request_id, connection_id) -> collection name
+
+    def started(self, event):
+        self._collections[(event.request_id, event.connection_id)] = command_collection(
+            event.command_name, event.command
+        )
+
+    def succeeded(self, event):
+        collection = self._collections.pop((event.request_id, event.connection_id), "-")
+        self.duration.labels(collection, event.command_name).observe(
+            event.duration_micros / 1_000_000
+        )
+
+    def failed(self, event):
+        collection = self._collections.pop((event.request_id, event.connection_id), "-")
+        self.duration.labels(collection, event.command_name).observe(
+            event.duration_micros / 1_000_000
+        )
+        self.failures.labels(collection, event.command_name).inc()
+
+
+class Metrics:
+    """Flask extension owning the metric objects and the hooks that feed them."""
+
+    def __init__(
+        self,
+        password_hasher=None,
+        outbox=None,
+        tokens=None,
+        compression=None,
+        user_cache=None,
+        app=None,
+    ):
+        self.password_hasher = password_hasher
+        self.outbox = outbox
+        self.tokens = tokens
+        self.compression = compression
+        self.user_cache = user_cache
+        self.enabled = False
+        self.token = None
+        self.registry = None
+        self._listener = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("METRICS_ENABLED", True)
+        app.config.setdefault("METRICS_TOKEN", None)
+        app.config.setdefault("METRICS_PUBLIC", False)
+        self.enabled = app.config["METRICS_ENABLED"]
+        self.token = app.config["METRICS_TOKEN"]
+        self.public = app.config["METRICS_PUBLIC"]
+        app.extensions["metrics"] = self
+        if not self.enabled:
+            return
+        self._build()
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        if self.password_hasher is not None and self._observe_hash not in (
+            self.password_hasher.timing_hooks
+        ):
+            self.password_hasher.timing_hooks.append(self._observe_hash)
+        if self.tokens is not None and self._observe_token not in self.tokens.timing_hooks:
+            self.tokens.timing_hooks.append(self._observe_token)
+        if (
+            self.compression is not None
+            and self._observe_compression not in self.compression.timing_hooks
+        ):
+            self.compression.timing_hooks.append(self._observe_compression)
+        if self.user_cache is not None and self._count_cache not in self.user_cache.event_hooks:
+            self.user_cache.event_hooks.append(self._count_cache)
+
+    def register_command_listener(self, app) -> None:
+        """
+        Time MongoDB commands. Must run before MongoEngine creates its client: pymongo
+        copies the global listeners when a client is constructed.
+        """
+        app.config.setdefault("METRICS_ENABLED", True)
+        if not app.config["METRICS_ENABLED"] or self._listener is not None:
+            return
+        self._build()
+        self._listener = MongoCommandMetrics(self.mongo_duration, self.mongo_failures)
+        monitoring.register(self._listener)
+
+    def render(self) -> tuple[bytes, str]:
+        """Return the current metrics (aggregated over workers) and their content type."""
+        from prometheus_client import (
+            CONTENT_TYPE_LATEST,
+            CollectorRegistry,
+            generate_latest,
+        )
+
+        self._update_gauges()
+        registry = self.registry
+        if multiprocess_dir():
+            from prometheus_client import multiprocess
+
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    def _build(self):
+        if self.registry is not None:
+            return
+        # Imported on first use; the client checks PROMETHEUS_MULTIPROC_DIR on import.
+        from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+        self.registry = registry = CollectorRegistry()
+        request_labels = ("method", "blueprint", "endpoint")
+        self.requests = Counter(
+            "http_requests_total",
+            "HTTP requests by endpoint and status code.",
+            (*request_labels, "status"),
+            registry=registry,
+        )
+        self.request_duration = Histogram(
+            "http_request_duration_seconds",
+            "Time from the start of a request to its response.",
+            request_labels,
+            buckets=REQUEST_BUCKETS,
+            registry=registry,
+        )
+        self.hash_duration = Histogram(
+            "password_hash_duration_seconds",
+            "bcrypt hashing and verification time, including time queued for the pool.",
+            ("operation",),
+            buckets=HASH_BUCKETS,
+            registry=registry,
+        )
+        self.hash_in_flight = Gauge(
+            "password_hash_in_flight",
+            "Password jobs queued or running in the hashing pool.",
+            registry=registry,
+            multiprocess_mode="livesum",
+        )
+        self.outbox_depth = Gauge(
+            "email_outbox_queue_depth",
+            "Emails waiting to be delivered (queued or retrying).",
+            registry=registry,
+            multiprocess_mode="livesum",
+        )
+        self.compress_in = Counter(
+            "http_compression_input_bytes",
+            "Response bytes handed to the compressor.",
+            ("encoding",),
+            registry=registry,
+        )
+        self.compress_out = Counter(
+            "http_compression_output_bytes",
+            "Response bytes sent after compression (uncompressed when it did not help).",
+            ("encoding",),
+            registry=registry,
+        )
+        self.compress_duration = Histogram(
+            "http_compression_duration_seconds",
+            "Time spent compressing one response body.",
+            ("encoding",),
+            buckets=COMPRESS_BUCKETS,
+            registry=registry,
+        )
+        self.cache_events = Counter(
+            "user_cache_events",
+            "User cache lookups and removals: hits, misses, evictions, invalidations.",
+            ("event",),
+            registry=registry,
+        )
+        self.cache_entries = Gauge(
+            "user_cache_entries",
+            "Keys held in the per-process user cache (two per user).",
+            registry=registry,
+            multiprocess_mode="livesum",
+        )
+        self.token_duration = Histogram(
+            "link_token_duration_seconds",
+            "Time to sign or verify an email-verification or password-reset token.",
+            ("operation",),
+            buckets=TOKEN_BUCKETS,
+            registry=registry,
+        )
+        self.token_outcomes = Counter(
+            "link_tokens_total",
+            "Link tokens issued and verified, by outcome.",
+            ("operation", "outcome"),
+            registry=registry,
+        )
+        self.mongo_duration = Histogram(
+            "mongodb_command_duration_seconds",
+            "MongoDB command round-trip time by collection and command.",
+            ("collection", "command"),
+            buckets=MONGO_BUCKETS,
+            registry=registry,
+        )
+        self.mongo_failures = Counter(
+            "mongodb_command_failures_total",
+            "MongoDB commands that returned an error.",
+            ("collection", "command"),
+            registry=registry,
+        )
+
+    def _start_request(self):
+        request.environ[_STARTED_KEY] = time.perf_counter()
+
+    def _finish_request(self, response):
+        started = request.environ.get(_STARTED_KEY)
+        if started is None:
+            return response
+        endpoint = request.endpoint or "<unmatched>"
+        blueprint = request.blueprint or "-"
+        self.requests.labels(request.method, blueprint, endpoint, str(response.status_code)).inc()
+        self.request_duration.labels(request.method, blueprint, endpoint).observe(
+            time.perf_counter() - started
+        )
+        self._update_gauges()
+        return response
+
+    def _observe_hash(self, operation: str, seconds: float):
+        self.hash_duration.labels(operation).observe(seconds)
+
+    def _observe_compression(self, encoding: str, bytes_in: int, bytes_out: int, seconds: float):
+        self.compress_in.labels(encoding).inc(bytes_in)
+        self.compress_out.labels(encoding).inc(bytes_out)
+        self.compress_duration.labels(encoding).observe(seconds)
+
+    def _count_cache(self, event: str, amount: int):
+        self.cache_events.labels(event).inc(amount)
+
+    def _observe_token(self, operation: str, outcome: str, seconds: float):
+        self.token_duration.labels(operation).observe(seconds)
+        self.token_outcomes.labels(operation, outcome).inc()
+
+    def _update_gauges(self):
+        # Gauges are refreshed as requests finish (and on scrape), so each worker's
+        # mmap file holds its latest value for the cross-worker sum.
+        if self.password_hasher is not None:
+            self.hash_in_flight.set(self.password_hasher.stats()["in_flight"])
+        if self.outbox is not None:
+            self.outbox_depth.set(self.outbox.stats()["queue_depth"])
+        if self.user_cache is not None:
+            self.cache_entries.set(self.user_cache.stats()["size"])
@@ -0,0 +1,58 @@
+# File: app/services/mongo.py
+"""
+MongoDB Connection Lifecycle
+
+A ``MongoClient`` owns sockets and monitor threads and must not be shared between
+processes. With gunicorn's ``preload_app`` the application (and its MongoEngine
+connection) is created once in the master and then forked into every worker, so each
+worker calls ``reconnect`` from the ``post_fork`` hook (see ``gunicorn.conf.py``) to
+replace the inherited client with its own pool.
+
+Pool sizing comes from MONGODB_SETTINGS (``maxPoolSize``, ``minPoolSize``,
+``waitQueueTimeoutMS``, ``compressors``). The settings include ``connect=False``, so the
+master never opens a connection before forking.
+"""
+
+import logging
+
+from mongoengine.connection import DEFAULT_CONNECTION_NAME, connect, disconnect
+
+logger = logging.getLogger(__name__)
+
+
+def reconnect(app, alias: str = DEFAULT_CONNECTION_NAME):
+    """
+    Drop this process's MongoEngine connection and register a fresh one.
+
+    Documents cached against the old client are reset by ``disconnect``, so they pick up
+    the new client on their next query.
+
+    Args:
+        app (Flask): Application whose MONGODB_SETTINGS describe the connection.
+        alias (str): MongoEngine connection alias to replace.
+
+    Returns:
+        MongoClient: The new (lazily connecting) client.
+    """
+    settings = dict(app.config["MONGODB_SETTINGS"])
+    settings.setdefault("connect", False)
+    disconnect(alias=alias)
+    client = connect(alias=alias, **settings)
+    logger.info(
+        "MongoDB connection %r re-created (maxPoolSize=%s, minPoolSize=%s)",
+        alias,
+        settings.get("maxPoolSize"),
+        settings.get("minPoolSize"),
+    )
+    return client
+
+
+def command_collection(command_name: str, command: dict) -> str:
+    """
+    Collection a command runs against, as found in its first field (``{"find": "users"}``)
+    or, for ``getMore``, its ``collection`` field; "-" for database-level commands.
+    """
+    target = command.get("collection") if command_name == "getMore" else None
+    target = target or command.get(command_name)
+    # Database-level commands (ping, hello, ...) carry a number instead of a collection.
+    return target if isinstance(target, str) else "-"
@@ -0,0 +1,190 @@
+# File: app/services/oauth_metadata.py
+"""
+OAuth Provider Metadata Cache
+
+Keeps each OpenID provider's discovery document and signing keys (JWKS) loaded into its
+Authlib client, so no request pays for fetching them.
+
+- Metadata is fetched when the provider is registered (at app creation) and injected
+  into the Authlib client, which then never fetches it lazily on its own.
+- Entries older than OAUTH_METADATA_TTL are refreshed on a background thread; requests
+  keep using the previous copy until the new one arrives, and a failed refresh keeps it
+  (retrying at most once a minute).
+- With OAUTH_METADATA_CACHE_DIR set, fetched documents are written to disk and reused by
+  every worker (and by restarts) while they are younger than the TTL.
+
+Metadata URLs may use ``file://`` (e.g., a local stub document in tests); a stub may
+embed its keys under ``jwks`` instead of pointing to a ``jwks_uri``.
+
+Configuration:
+- OAUTH_METADATA_TTL: Seconds before metadata and keys are refreshed.
+- OAUTH_METADATA_CACHE_DIR: Optional directory for the shared on-disk copy.
+- OAUTH_METADATA_TIMEOUT: Seconds to wait for a provider's HTTP response.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+
+class OAuthMetadataCache:
+    """Flask extension caching discovery metadata and JWKS for registered OAuth clients."""
+
+    def __init__(self, app=None):
+        self.ttl = 3600.0
+        self.cache_dir = None
+        self.timeout = 5.0
+        self._providers = {}  # name -> {"client", "url", "loaded_at", "retry_at", "refreshing"}
+        self._lock = threading.Lock()
+        self._counters = {"fetches": 0, "disk_hits": 0, "refreshes": 0, "errors": 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("OAUTH_METADATA_TTL", 3600.0)
+        app.config.setdefault("OAUTH_METADATA_CACHE_DIR", None)
+        app.config.setdefault("OAUTH_METADATA_TIMEOUT", 5.0)
+        self.ttl = app.config["OAUTH_METADATA_TTL"]
+        self.cache_dir = app.config["OAUTH_METADATA_CACHE_DIR"]
+        self.timeout = app.config["OAUTH_METADATA_TIMEOUT"]
+        app.extensions["oauth_metadata"] = self
+
+    def register(self, name: str, client, metadata_url: str, prewarm: bool = True) -> None:
+        """
+        Manage the metadata of an Authlib client and (optionally) load it right away.
+
+        A failed prewarm is logged, not raised; the next ``ensure_fresh`` retries it.
+        """
+        with self._lock:
+            self._providers[name] = {
+                "client": client,
+                "url": metadata_url,
+                "loaded_at": None,
+                "retry_at": 0.0,
+                "refreshing": False,
+            }
+        if prewarm:
+            try:
+                self.refresh(name)
+            except Exception as e:
+                logger.warning("Could not prewarm %s OAuth metadata: %s", name, e)
+
+    def ensure_fresh(self, name: str) -> None:
+        """
+        Make sure ``name`` has metadata before a request uses its client.
+
+        Loads synchronously only if nothing was ever loaded; stale metadata is served as is
+        while a background thread refreshes it.
+        """
+        provider = self._providers.get(name)
+        if provider is None:
+            return
+        if provider["loaded_at"] is None:
+            self.refresh(name)
+            return
+        now = time.time()
+        if now - provider["loaded_at"] < self.ttl or now < provider["retry_at"]:
+            return
+        with self._lock:
+            if provider["refreshing"]:
+                return
+            provider["refreshing"] = True
+        thread = threading.Thread(
+            target=self._refresh_in_background, args=(name,), name="oauth-metadata", daemon=True
+        )
+        thread.start()
+
+    def refresh(self, name: str) -> dict:
+        """Load metadata and keys for ``name`` (from disk if fresh there) into its client."""
+        provider = self._providers[name]
+        document = self._read_disk(name)
+        if document is None:
+            document = self._fetch(provider["url"])
+            self._write_disk(name, document)
+        else:
+            with self._lock:
+                self._counters["disk_hits"] += 1
+
+        metadata = dict(document["metadata"], jwks=document["jwks"], _loaded_at=time.time())
+        # Authlib skips its own discovery request once "_loaded_at" is present.
+        provider["client"].server_metadata.update(metadata)
+        provider["loaded_at"] = document["fetched_at"]
+        return metadata
+
+    def stats(self) -> dict:
+        """Return fetch/refresh counters and the age of each provider's metadata."""
+        now = time.time()
+        with self._lock:
+            ages = {
+                name: (now - provider["loaded_at"]) if provider["loaded_at"] else None
+                for name, provider in self._providers.items()
+            }
+            return dict(self._counters, age_seconds=ages)
+
+    def _refresh_in_background(self, name: str):
+        try:
+            self.refresh(name)
+            with self._lock:
+                self._counters["refreshes"] += 1
+        except Exception as e:
+            # Keep serving the previous metadata and retry after a short pause.
+            self._providers[name]["retry_at"] = time.time() + min(self.ttl, 60.0)
+            logger.warning("Refreshing %s OAuth metadata failed: %s", name, e)
+        finally:
+            self._providers[name]["refreshing"] = False
+
+    def _fetch(self, url: str) -> dict:
+        try:
+            metadata = self._get_json(url)
+            jwks = metadata.pop("jwks", None)
+            if jwks is None and metadata.get("jwks_uri"):
+                jwks = self._get_json(metadata["jwks_uri"])
+        except Exception:
+            with self._lock:
+                self._counters["errors"] += 1
+            raise
+        with self._lock:
+            self._counters["fetches"] += 1
+        return {"fetched_at": time.time(), "metadata": metadata, "jwks": jwks}
+
+    def _get_json(self, url: str) -> dict:
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            return json.load(response)
+
+    def _disk_path(self, name: str) -> str | None:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"oauth-metadata-{name}.json")
+
+    def _read_disk(self, name: str) -> dict | None:
+        path = self._disk_path(name)
+        if path is None:
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                document = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - document.get("fetched_at", 0) >= self.ttl:
+            return None
+        return document
+
+    def _write_disk(self, name: str, document: dict):
+        path = self._disk_path(name)
+        if path is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temporary file and rename, so readers never see a partial file.
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(document, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not write OAuth metadata cache %s: %s", path, e)
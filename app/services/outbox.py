@@ -0,0 +1,376 @@
+# File: app/services/outbox.py
+"""
+Email Outbox
+
+Queues outgoing email in-process and delivers it from a background dispatcher thread,
+so request handlers return as soon as a message is enqueued.
+
+The dispatcher:
+- Drains the queue in batches of up to MAIL_OUTBOX_BATCH_SIZE messages.
+- Keeps one open SMTP connection per sender (via ``mail.connect()``) and reuses it across
+  batches until it has been idle for MAIL_OUTBOX_IDLE_TIMEOUT seconds.
+- Retries failed messages with exponential backoff, up to MAIL_OUTBOX_MAX_RETRIES times.
+- Optionally persists every message to the ``email_outbox`` collection
+  (MAIL_OUTBOX_PERSIST) and recovers messages whose dispatcher died (claimed more than
+  MAIL_OUTBOX_LEASE_SECONDS ago).
+
+With MAIL_OUTBOX_ASYNC disabled, ``enqueue`` sends synchronously through Flask-Mail.
+
+For local debugging, point MAIL_SERVER/MAIL_PORT at a debugging SMTP server, e.g.
+``python -m smtpd -n -c DebuggingServer localhost:1025`` with MAIL_USE_TLS=false.
+"""
+
+import atexit
+import heapq
+import itertools
+import logging
+import os
+import queue
+import smtplib
+import socket
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+
+from flask import current_app
+from flask_mail import Message
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the SMTP server itself is unreachable, as opposed to one bad message.
+CONNECTION_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    socket.gaierror,
+    smtplib.SMTPConnectError,
+    smtplib.SMTPServerDisconnected,
+)
+
+
+class EmailOutbox:
+    """Flask extension that owns the outbox queue and its dispatcher thread."""
+
+    def __init__(self, mail, app=None):
+        self.mail = mail
+        self.app = None
+        self._queue = queue.Queue()
+        self._retries = []  # heap of (ready_at, sequence, item)
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._connections = {}  # sender -> [Connection, last_used]; dispatcher thread only
+        self._dispatcher_pid = None
+        self._stop = threading.Event()
+        self._next_recovery = 0.0
+        self._atexit_registered = False
+        self._counters = {
+            "enqueued": 0,
+            "sent": 0,
+            "retried": 0,
+            "failed": 0,
+            "batches": 0,
+            "connections": 0,
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("MAIL_OUTBOX_ASYNC", True)
+        app.config.setdefault("MAIL_OUTBOX_PERSIST", False)
+        app.config.setdefault("MAIL_OUTBOX_BATCH_SIZE", 50)
+        app.config.setdefault("MAIL_OUTBOX_MAX_RETRIES", 5)
+        app.config.setdefault("MAIL_OUTBOX_RETRY_BACKOFF", 2.0)
+        app.config.setdefault("MAIL_OUTBOX_IDLE_TIMEOUT", 30.0)
+        app.config.setdefault("MAIL_OUTBOX_LEASE_SECONDS", 900)
+        self.app = app
+        app.extensions["email_outbox"] = self
+        # One handler per process, however many apps the outbox is initialised with.
+        if not self._atexit_registered:
+            atexit.register(self.close)
+            self._atexit_registered = True
+
+    @property
+    def owner(self) -> str:
+        """Identifier stored on persisted messages claimed by this process."""
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def enqueue(self, subject: str, recipients: list, body: str, sender: str | None = None):
+        """
+        Queue one plain-text email for delivery.
+
+        Args:
+            subject (str): Email subject line.
+            recipients (list): List of recipient email addresses.
+            body (str): Plain text email body.
+            sender (str, optional): From address (defaults to MAIL_DEFAULT_SENDER).
+        """
+        self.enqueue_many(
+            [{"subject": subject, "recipients": recipients, "body": body, "sender": sender}]
+        )
+
+    def enqueue_many(self, messages) -> int:
+        """
+        Queue several emails at once (persisted with a single bulk insert).
+
+        Args:
+            messages (iterable): Dicts with subject, recipients, body and optional sender.
+
+        Returns:
+            int: Number of messages queued.
+        """
+        config = current_app.config
+        items = [
+            {
+                "subject": message["subject"],
+                "recipients": list(message["recipients"]),
+                "body": message["body"],
+                "sender": message.get("sender") or config["MAIL_DEFAULT_SENDER"],
+                "attempts": 0,
+            }
+            for message in messages
+        ]
+        if not items:
+            return 0
+
+        if not config["MAIL_OUTBOX_ASYNC"]:
+            for item in items:
+                self.mail.send(self._build_message(item))
+            return len(items)
+
+        if config["MAIL_OUTBOX_PERSIST"]:
+            self._persist(items)
+
+        self._ensure_dispatcher()
+        with self._lock:
+            self._pending += len(items)
+            self._counters["enqueued"] += len(items)
+        for item in items:
+            self._queue.put(item)
+        return len(items)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every queued message is sent or has failed; return False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def stats(self) -> dict:
+        """Return delivery counters and the current queue depth."""
+        with self._lock:
+            return dict(self._counters, queue_depth=self._pending)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Give queued mail a chance to go out, then stop the dispatcher."""
+        if self._dispatcher_pid == os.getpid():
+            self.flush(timeout)
+        self._stop.set()
+
+    # -- dispatcher ---------------------------------------------------------------
+
+    def _ensure_dispatcher(self):
+        with self._lock:
+            if self._dispatcher_pid == os.getpid():
+                return
+            # A dispatcher inherited through fork does not exist in this process.
+            self._dispatcher_pid = os.getpid()
+            self._connections = {}
+            self._stop.clear()
+        thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        thread.start()
+
+    def _run(self):
+        with self.app.app_context():
+            while not self._stop.is_set():
+                try:
+                    if self.app.config["MAIL_OUTBOX_PERSIST"]:
+                        self._recover_stale()
+                    batch = self._next_batch()
+                    if batch:
+                        self._deliver(batch)
+                    self._close_idle_connections()
+                except Exception:
+                    logger.exception("Email outbox dispatcher error")
+                    time.sleep(1.0)
+            self._close_idle_connections(force=True)
+
+    def _next_batch(self) -> list:
+        batch_size = self.app.config["MAIL_OUTBOX_BATCH_SIZE"]
+        now = time.monotonic()
+        batch = []
+        with self._lock:
+            while self._retries and self._retries[0][0] <= now and len(batch) < batch_size:
+                batch.append(heapq.heappop(self._retries)[2])
+            wait = min(1.0, self._retries[0][0] - now) if self._retries else 1.0
+        if not batch:
+            try:
+                batch.append(self._queue.get(timeout=max(wait, 0.01)))
+            except queue.Empty:
+                return batch
+        while len(batch) < batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _deliver(self, batch):
+        with self._lock:
+            self._counters["batches"] += 1
+        by_sender = {}
+        for item in batch:
+            by_sender.setdefault(item["sender"], []).append(item)
+
+        for sender, items in by_sender.items():
+            for index, item in enumerate(items):
+                try:
+                    connection = self._connection_for(sender)
+                    connection.send(self._build_message(item))
+                except Exception as e:
+                    self._drop_connection(sender)
+                    self._retry_later(item, e)
+                    if isinstance(e, CONNECTION_ERRORS):
+                        # The server is unreachable; don't burn attempts on the rest now.
+                        for remaining in items[index + 1 :]:
+                            self._retry_later(remaining, e)
+                        break
+                else:
+                    self._connections[sender][1] = time.monotonic()
+                    self._mark_sent(item)
+
+    def _connection_for(self, sender):
+        entry = self._connections.get(sender)
+        if entry is None:
+            connection = self.mail.connect()
+            connection.__enter__()
+            entry = self._connections[sender] = [connection, time.monotonic()]
+            with self._lock:
+                self._counters["connections"] += 1
+        return entry[0]
+
+    def _drop_connection(self, sender):
+        entry = self._connections.pop(sender, None)
+        if entry is not None:
+            try:
+                entry[0].__exit__(None, None, None)
+            except Exception:
+                pass
+
+    def _close_idle_connections(self, force: bool = False):
+        cutoff = time.monotonic() - self.app.config["MAIL_OUTBOX_IDLE_TIMEOUT"]
+        for sender, (_, last_used) in list(self._connections.items()):
+            if force or last_used <= cutoff:
+                self._drop_connection(sender)
+
+    @staticmethod
+    def _build_message(item) -> Message:
+        return Message(
+            subject=item["subject"],
+            recipients=item["recipients"],
+            body=item["body"],
+            sender=item["sender"],
+        )
+
+    def _mark_sent(self, item):
+        from app.models.email_outbox import OutboxEmail
+
+        if "id" in item:
+            OutboxEmail.objects(id=item["id"]).update_one(
+                set__status="sent",
+                set__sent_at=datetime.now(UTC),
+                set__attempts=item["attempts"] + 1,
+            )
+        self._finish("sent")
+
+    def _retry_later(self, item, error):
+        from app.models.email_outbox import OutboxEmail
+
+        item["attempts"] += 1
+        max_retries = self.app.config["MAIL_OUTBOX_MAX_RETRIES"]
+        persisted = "id" in item
+        if item["attempts"] > max_retries:
+            logger.error(
+                "Giving up on email '%s' to %s after %d attempts: %s",
+                item["subject"],
+                item["recipients"],
+                item["attempts"],
+                error,
+            )
+            if persisted:
+                OutboxEmail.objects(id=item["id"]).update_one(
+                    set__status="failed", set__attempts=item["attempts"], set__last_error=str(error)
+                )
+            self._finish("failed")
+            return
+
+        delay = min(self.app.config["MAIL_OUTBOX_RETRY_BACKOFF"] * 2 ** (item["attempts"] - 1), 300)
+        logger.warning(
+            "Email to %s failed (%s); retrying in %.1fs", item["recipients"], error, delay
+        )
+        if persisted:
+            OutboxEmail.objects(id=item["id"]).update_one(
+                set__attempts=item["attempts"],
+                set__last_error=str(error),
+                set__claimed_at=datetime.now(UTC),
+            )
+        with self._lock:
+            self._counters["retried"] += 1
+            heapq.heappush(self._retries, (time.monotonic() + delay, next(self._sequence), item))
+
+    def _finish(self, outcome: str):
+        with self._idle:
+            self._counters[outcome] += 1
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.notify_all()
+
+    # -- persistence --------------------------------------------------------------
+
+    def _persist(self, items):
+        from app.models.email_outbox import OutboxEmail
+
+        now = datetime.now(UTC)
+        documents = [
+            OutboxEmail(
+                subject=item["subject"],
+                recipients=item["recipients"],
+                body=item["body"],
+                sender=item["sender"],
+                claimed_by=self.owner,
+                claimed_at=now,
+                created_at=now,
+            )
+            for item in items
+        ]
+        ids = OutboxEmail.objects.insert(documents, load_bulk=False)
+        for item, document_id in zip(items, ids):
+            item["id"] = document_id
+
+    def _recover_stale(self):
+        """Claim queued messages whose dispatcher stopped renewing its lease."""
+        now = time.monotonic()
+        if now < self._next_recovery:
+            return
+        lease = self.app.config["MAIL_OUTBOX_LEASE_SECONDS"]
+        self._next_recovery = now + lease / 2
+
+        from app.models.email_outbox import OutboxEmail
+
+        cutoff = datetime.now(UTC) - timedelta(seconds=lease)
+        while True:
+            document = OutboxEmail.objects(status="queued", claimed_at__lt=cutoff).modify(
+                set__claimed_by=self.owner, set__claimed_at=datetime.now(UTC), new=True
+            )
+            if document is None:
+                break
+            with self._lock:
+                self._pending += 1
+            self._queue.put(
+                {
+                    "id": document.id,
+                    "subject": document.subject,
+                    "recipients": list(document.recipients),
+                    "body": document.body,
+                    "sender": document.sender,
+                    "attempts": document.attempts,
+                }
+            )
@@ -0,0 +1,374 @@
+# File: app/services/passwords.py
+"""
+Password Hashing Service
+
+Runs bcrypt hashing and verification on a bounded worker pool instead of the request
+thread, so password work scales with CPU cores rather than with the WSGI worker count.
+
+Configuration (read from ``current_app.config`` on every call):
+- PASSWORD_HASH_EXECUTOR: "process" (default), "thread", or "inline" (run on the caller).
+  Pool processes are started by a forkserver (spawned where that is unavailable), never
+  forked from the threaded worker. Under gevent workers both pool kinds use native
+  threads (see app/services/cooperative.py).
+- PASSWORD_HASH_WORKERS: Pool size per process (defaults to the number of CPU cores;
+  gunicorn.conf.py divides the cores between its workers).
+- PASSWORD_HASH_MAX_QUEUE: Maximum jobs queued or running before new work is rejected.
+- PASSWORD_HASH_TIMEOUT: Seconds to wait for a result before giving up.
+- BCRYPT_ROUNDS: bcrypt cost factor for new hashes (``flask auth calibrate-bcrypt``
+  suggests one for the current host). Hashes made with a different cost are reported by
+  ``needs_rehash`` so they can be upgraded in the background after a successful login.
+
+Bulk jobs (``hash_many`` with ``workers``, used by the admin user import) run on a
+separate pool of that size, so a long import neither waits behind nor delays logins.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import bcrypt
+from flask import current_app
+
+from app.services.cooperative import gevent_patched, real_thread_pool
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashingError(Exception):
+    """Base error raised when password work cannot be completed."""
+
+
+class HashingQueueFull(PasswordHashingError):
+    """Raised when the pool already holds PASSWORD_HASH_MAX_QUEUE jobs."""
+
+
+class HashingTimeout(PasswordHashingError):
+    """Raised when a job does not finish within PASSWORD_HASH_TIMEOUT seconds."""
+
+
+def _hashpw(password: bytes, rounds: int = 12) -> bytes:
+    """Hash a password with a fresh salt (module-level so process pools can pickle it)."""
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+
+def hash_cost(password_hash: str) -> int | None:
+    """Return the cost factor encoded in a bcrypt hash (``$2b$<cost>$...``), or None."""
+    parts = password_hash.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def calibrate_cost(
+    target_ms: float, samples: int = 3, min_rounds: int = 4, max_rounds: int = 16
+) -> tuple[int, dict]:
+    """
+    Time bcrypt on this host and suggest the highest cost that fits a latency target.
+
+    Each extra round doubles the work, so measuring stops at the first cost whose median
+    exceeds ``target_ms``.
+
+    Returns:
+        tuple[int, dict]: The suggested cost and a {cost: median milliseconds} mapping.
+    """
+    timings = {}
+    suggested = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        runs = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            _hashpw(b"calibration-password", rounds)
+            runs.append((time.perf_counter() - started) * 1000)
+        timings[rounds] = sorted(runs)[len(runs) // 2]
+        if timings[rounds] > target_ms:
+            break
+        suggested = rounds
+    return suggested, timings
+
+
+def _checkpw(password: bytes, password_hash: bytes) -> bool:
+    """Check a password against a bcrypt hash (module-level for process pools)."""
+    try:
+        return bcrypt.checkpw(password, password_hash)
+    except ValueError:
+        # Empty or malformed hashes (e.g., OAuth-only accounts) never match.
+        return False
+
+
+def _operation(fn) -> str:
+    return "check" if fn is _checkpw else "hash"
+
+
+class PasswordHasher:
+    """
+    Submits bcrypt work to lazily created, per-process executors and tracks queue depth.
+
+    Executors are created on first use in each process, so a hasher that was initialized
+    before a gunicorn fork never shares a pool with its parent. Request work uses the
+    "requests" pool; bulk hashing can ask for a separate "bulk" pool.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._executors = {}  # pool name -> (key, executor)
+        self._in_flight = 0
+        # Callables receiving ("hash" | "check", seconds) for every finished job (metrics).
+        self.timing_hooks = []
+        self._counters = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "rehashes": 0,
+            "max_in_flight": 0,
+            "total_seconds": 0.0,
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Register default settings and attach the hasher to the app."""
+        app.config.setdefault("PASSWORD_HASH_EXECUTOR", "process")
+        app.config.setdefault("PASSWORD_HASH_WORKERS", os.cpu_count() or 1)
+        app.config.setdefault("PASSWORD_HASH_MAX_QUEUE", 256)
+        app.config.setdefault("PASSWORD_HASH_TIMEOUT", 10.0)
+        app.config.setdefault("BCRYPT_ROUNDS", 12)
+        app.extensions["password_hasher"] = self
+
+    def hash_password(self, password: str) -> str:
+        """
+        Hash a plain-text password.
+
+        Raises:
+            PasswordHashingError: If the pool is saturated or the job times out.
+        """
+        rounds = current_app.config["BCRYPT_ROUNDS"]
+        return self._run(_hashpw, password.encode("utf-8"), rounds).decode("utf-8")
+
+    def hash_many(self, passwords, window: int | None = None, workers: int | None = None):
+        """
+        Hash an iterable of passwords on the pool, yielding hashes in input order.
+
+        Up to ``window`` jobs (default: four per worker) are kept in flight, so the pool
+        stays busy while the caller consumes results. Bulk jobs do not count against
+        PASSWORD_HASH_MAX_QUEUE; the window bounds them instead.
+
+        Args:
+            passwords: Iterable of plain-text passwords.
+            window (int, optional): Jobs kept in flight.
+            workers (int, optional): Hash on a separate bulk pool of this size instead of
+                the request pool (PASSWORD_HASH_WORKERS).
+
+        Raises:
+            PasswordHashingError: If a job times out.
+        """
+        config = current_app.config
+        kind, rounds = config["PASSWORD_HASH_EXECUTOR"], config["BCRYPT_ROUNDS"]
+        pool = "bulk" if workers else "requests"
+        workers = workers or config["PASSWORD_HASH_WORKERS"]
+        if kind == "inline":
+            for password in passwords:
+                started = time.perf_counter()
+                with self._lock:
+                    self._counters["submitted"] += 1
+                hashed = _hashpw(password.encode("utf-8"), rounds)
+                self._finish(time.perf_counter() - started)
+                yield hashed.decode("utf-8")
+            return
+
+        executor = self._get_executor(kind, workers, pool)
+        window = window or workers * 4
+        pending = deque()
+        try:
+            for password in passwords:
+                pending.append(
+                    (
+                        time.perf_counter(),
+                        executor.submit(_hashpw, password.encode("utf-8"), rounds),
+                    )
+                )
+                with self._lock:
+                    self._counters["submitted"] += 1
+                if len(pending) >= window:
+                    yield self._collect(*pending.popleft())
+            while pending:
+                yield self._collect(*pending.popleft())
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    def check_password(self, password: str, password_hash: str) -> bool:
+        """
+        Verify a plain-text password against a stored bcrypt hash.
+
+        Raises:
+            PasswordHashingError: If the pool is saturated or the job times out.
+        """
+        return self._run(_checkpw, password.encode("utf-8"), password_hash.encode("utf-8"))
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """True if ``password_hash`` is bcrypt with a cost other than BCRYPT_ROUNDS."""
+        cost = hash_cost(password_hash or "")
+        return cost is not None and cost != current_app.config["BCRYPT_ROUNDS"]
+
+    def rehash_in_background(self, password: str, on_hashed) -> None:
+        """
+        Hash ``password`` at the configured cost without waiting for the result.
+
+        ``on_hashed(new_hash)`` is called from a pool callback thread (outside any app
+        context) once the hash is ready. Rehashing is best effort: it is skipped when the
+        pool is busy, and failures are only logged.
+        """
+        config = current_app.config
+        args = (password.encode("utf-8"), config["BCRYPT_ROUNDS"])
+        if config["PASSWORD_HASH_EXECUTOR"] == "inline":
+            self._rehashed(on_hashed, _hashpw(*args))
+            return
+
+        with self._lock:
+            if self._in_flight >= config["PASSWORD_HASH_MAX_QUEUE"]:
+                return
+            self._in_flight += 1
+        try:
+            future = self._get_executor(
+                config["PASSWORD_HASH_EXECUTOR"], config["PASSWORD_HASH_WORKERS"]
+            ).submit(_hashpw, *args)
+        except Exception:
+            self._release()
+            logger.exception("Could not schedule password rehash")
+            return
+
+        def done(finished):
+            self._release()
+            if finished.cancelled():
+                return
+            error = finished.exception()
+            if error is not None:
+                logger.warning("Password rehash failed: %s", error)
+                return
+            self._rehashed(on_hashed, finished.result())
+
+        future.add_done_callback(done)
+
+    def _rehashed(self, on_hashed, new_hash: bytes):
+        try:
+            on_hashed(new_hash.decode("utf-8"))
+        except Exception:
+            logger.exception("Storing rehashed password failed")
+            return
+        with self._lock:
+            self._counters["rehashes"] += 1
+
+    def stats(self) -> dict:
+        """Return a snapshot of queue depth and job counters."""
+        with self._lock:
+            return dict(self._counters, in_flight=self._in_flight)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker pools (new ones are created on next use)."""
+        with self._lock:
+            executors, self._executors = self._executors, {}
+        for _, executor in executors.values():
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, fn, *args):
+        config = current_app.config
+        kind = config["PASSWORD_HASH_EXECUTOR"]
+        if kind == "inline":
+            started = time.perf_counter()
+            with self._lock:
+                self._counters["submitted"] += 1
+            result = fn(*args)
+            self._finish(time.perf_counter() - started, _operation(fn))
+            return result
+
+        with self._lock:
+            if self._in_flight >= config["PASSWORD_HASH_MAX_QUEUE"]:
+                self._counters["rejected"] += 1
+                raise HashingQueueFull("Password hashing queue is full.")
+            self._in_flight += 1
+            self._counters["submitted"] += 1
+            self._counters["max_in_flight"] = max(self._counters["max_in_flight"], self._in_flight)
+
+        started = time.perf_counter()
+        try:
+            future = self._get_executor(kind, config["PASSWORD_HASH_WORKERS"]).submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        # Release the slot only when the job actually leaves the pool, not when we stop waiting.
+        future.add_done_callback(lambda _: self._release())
+
+        try:
+            result = future.result(timeout=config["PASSWORD_HASH_TIMEOUT"])
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self._counters["timeouts"] += 1
+            raise HashingTimeout("Password hashing timed out.") from None
+        self._finish(time.perf_counter() - started, _operation(fn))
+        return result
+
+    def _collect(self, started: float, future) -> str:
+        try:
+            result = future.result(timeout=current_app.config["PASSWORD_HASH_TIMEOUT"])
+        except FutureTimeoutError:
+            with self._lock:
+                self._counters["timeouts"] += 1
+            raise HashingTimeout("Password hashing timed out.") from None
+        self._finish(time.perf_counter() - started)
+        return result.decode("utf-8")
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _finish(self, elapsed: float, operation: str = "hash"):
+        with self._lock:
+            self._counters["completed"] += 1
+            self._counters["total_seconds"] += elapsed
+        for hook in self.timing_hooks:
+            hook(operation, elapsed)
+
+    def _get_executor(self, kind: str, workers: int, pool: str = "requests"):
+        key = (os.getpid(), kind, workers)
+        with self._lock:
+            current_key, executor = self._executors.get(pool, (None, None))
+            if current_key != key:
+                # A stale pool belongs to a parent process (after fork) or an old config;
+                # only a pool created in this process may be shut down from here.
+                if executor is not None and current_key[0] == key[0]:
+                    executor.shutdown(wait=False)
+                if gevent_patched():
+                    # Patched threads are greenlets and forking under gevent is unsafe;
+                    # native threads keep bcrypt off the event loop (it releases the GIL).
+                    executor = real_thread_pool(workers)
+                elif kind == "process":
+                    # Imported on demand: multiprocessing is costly to import at startup.
+                    import multiprocessing
+                    from concurrent.futures import ProcessPoolExecutor
+
+                    # Never fork: this runs inside a threaded worker, and a forked child
+                    # inherits whatever locks (logging, pymongo) other threads hold.
+                    # forkserver children come from a clean single-threaded server.
+                    method = (
+                        "forkserver"
+                        if "forkserver" in multiprocessing.get_all_start_methods()
+                        else "spawn"
+                    )
+                    executor = ProcessPoolExecutor(
+                        max_workers=workers, mp_context=multiprocessing.get_context(method)
+                    )
+                elif kind == "thread":
+                    executor = ThreadPoolExecutor(
+                        max_workers=workers, thread_name_prefix=f"password-hasher-{pool}"
+                    )
+                else:
+                    raise ValueError(f"Unknown PASSWORD_HASH_EXECUTOR: {kind!r}")
+                self._executors[pool] = (key, executor)
+            return executor
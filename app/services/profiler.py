@@ -0,0 +1,372 @@
+# File: app/services/profiler.py
+"""
+On-Demand Request Profiling
+
+Profiles single requests in production, without a debugger or redeploy:
+
+- An admin (JWT ``role`` claim) sends the PROFILER_HEADER header (``X-Profile``). Its value
+  may pick the mode (``cprofile`` or ``sample``); the response carries ``X-Profile-Id``.
+  The header is ignored for anyone else.
+- Or PROFILER_SAMPLE_RATE (default 0) picks a random fraction of all requests.
+
+Every profiled request is sampled by a native thread that records its Python stack every
+PROFILER_INTERVAL_MS, giving a flamegraph-compatible collapsed-stack file
+(``flamegraph.pl``, speedscope). In ``cprofile`` mode (PROFILER_MODE, the default) the
+request also runs under ``cProfile`` for exact call counts; in ``sample`` mode the top
+functions are estimated from the samples, with far less overhead.
+
+Results go to PROFILER_DIR as ``<id>.json`` (request details and the PROFILER_TOP_N
+functions by cumulative time), ``<id>.collapsed`` and, for cProfile, ``<id>.prof``
+(``pstats``/snakeviz). Only the newest PROFILER_KEEP profiles are kept. Admins can read
+them from ``/api/admin/profiles``. Requests are recorded by their route, never by their
+raw path, so tokens in URLs are not stored.
+
+A worker profiles one request at a time; triggers arriving meanwhile are skipped. Requests
+that are not profiled pay for one header lookup (and a random draw when sampling is on).
+Under gevent, greenlets that run while a profiled request waits show up in its profile.
+"""
+
+import functools
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+
+from flask import request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+
+from app.services.cooperative import (
+    native_lock,
+    native_sleep,
+    native_thread,
+    native_thread_id,
+)
+from app.services.query_log import route_path
+
+logger = logging.getLogger(__name__)
+
+PROFILER_MODES = ("cprofile", "sample")
+
+# WSGI environ key holding the active profile of a request.
+_SESSION_KEY = "app.profiler.session"
+_PROFILE_ID = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+@functools.lru_cache(maxsize=4096)
+def short_path(filename: str) -> str:
+    """A source path relative to the ``sys.path`` entry it was imported from."""
+    for prefix in sorted((p for p in sys.path if p), key=len, reverse=True):
+        if filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1 :]
+    return filename
+
+
+def frame_label(code) -> str:
+    return f"{code.co_qualname} ({short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse(frame) -> str:
+    """A stack as one line of ``;``-separated frames, outermost first."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def sampled_top(stacks: Counter, interval: float, limit: int) -> list[dict]:
+    """Functions by cumulative (on the stack) and own (running) time, estimated from samples."""
+    cumulative, own = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        for label in set(frames):
+            cumulative[label] += count
+        own[frames[-1]] += count
+    return [
+        {
+            "function": label,
+            "samples": count,
+            "cumulative_ms": round(count * interval * 1000, 2),
+            "own_ms": round(own[label] * interval * 1000, 2),
+        }
+        for label, count in cumulative.most_common(limit)
+    ]
+
+
+def cprofile_top(profile, limit: int) -> list[dict]:
+    """Functions by cumulative time, as measured by a ``cProfile.Profile``."""
+    import pstats
+
+    rows = sorted(pstats.Stats(profile).stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [
+        {
+            "function": f"{name} ({short_path(filename)}:{line})",
+            "calls": calls,
+            "cumulative_ms": round(cumulative * 1000, 3),
+            "own_ms": round(own * 1000, 3),
+        }
+        for (filename, line, name), (_, calls, own, cumulative, _) in rows[:limit]
+    ]
+
+
+class StackSampler:
+    """Records the stack of one thread every ``interval`` seconds, from a native thread."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread_id = None
+        self._running = False
+        self._done = native_lock()
+
+    def start(self):
+        self._thread_id = native_thread_id()
+        self._running = True
+        self._done.acquire()
+        native_thread(self._run)
+
+    def stop(self) -> Counter:
+        self._running = False
+        with self._done:  # wait for the sampling thread to finish its last sample
+            pass
+        return self.stacks
+
+    def _run(self):
+        try:
+            while self._running:
+                frame = sys._current_frames().get(self._thread_id)
+                if frame is not None:
+                    self.stacks[collapse(frame)] += 1
+                    del frame
+                native_sleep(self.interval)
+        finally:
+            self._done.release()
+
+
+class ProfileSession:
+    """One profiled request: the stack sampler, plus cProfile in ``cprofile`` mode."""
+
+    def __init__(self, mode: str, interval: float, trigger: str):
+        self.mode = mode
+        self.trigger = trigger
+        self.sampler = StackSampler(interval)
+        self.profile = None
+        if mode == "cprofile":
+            # Imported on first use: only profiled requests need cProfile (and pstats).
+            import cProfile
+
+            self.profile = cProfile.Profile()
+        self.started = None
+        self.elapsed = 0.0
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.sampler.start()
+        if self.profile is not None:
+            self.profile.enable()
+
+    def stop(self):
+        if self.profile is not None:
+            self.profile.disable()
+        self.sampler.stop()
+        self.elapsed = time.perf_counter() - self.started
+
+
+class RequestProfiler:
+    """Flask extension profiling requests picked by the admin header or random sampling."""
+
+    def __init__(self, app=None, rng=random.random):
+        self.enabled = False
+        self.header = "X-Profile"
+        self.sample_rate = 0.0
+        self.mode = "cprofile"
+        self.interval = 0.005
+        self.top_n = 30
+        self.directory = None
+        self.keep = 100
+        self.rng = rng
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+        self._counters = {"profiles": 0, "skipped_busy": 0, "denied": 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("PROFILER_ENABLED", True)
+        app.config.setdefault("PROFILER_HEADER", "X-Profile")
+        app.config.setdefault("PROFILER_SAMPLE_RATE", 0.0)
+        app.config.setdefault("PROFILER_MODE", "cprofile")
+        app.config.setdefault("PROFILER_INTERVAL_MS", 5.0)
+        app.config.setdefault("PROFILER_TOP_N", 30)
+        app.config.setdefault("PROFILER_DIR", os.path.join(tempfile.gettempdir(), "profiles"))
+        app.config.setdefault("PROFILER_KEEP", 100)
+        if app.config["PROFILER_MODE"] not in PROFILER_MODES:
+            raise ValueError(f"PROFILER_MODE must be one of {PROFILER_MODES}.")
+        self.enabled = app.config["PROFILER_ENABLED"]
+        self.header = app.config["PROFILER_HEADER"]
+        self.sample_rate = app.config["PROFILER_SAMPLE_RATE"]
+        self.mode = app.config["PROFILER_MODE"]
+        self.interval = app.config["PROFILER_INTERVAL_MS"] / 1000
+        self.top_n = app.config["PROFILER_TOP_N"]
+        self.directory = app.config["PROFILER_DIR"]
+        self.keep = app.config["PROFILER_KEEP"]
+        app.extensions["profiler"] = self
+        if not self.enabled:
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._end_request)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def load(self, profile_id: str, collapsed: bool = False):
+        """A stored profile's summary (dict) or collapsed stacks (str); None if unknown."""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.{'collapsed' if collapsed else 'json'}")
+        try:
+            with open(path, encoding="utf-8") as f:
+                return f.read() if collapsed else json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def list_profiles(self, limit: int = 50) -> list[dict]:
+        """Stored profiles, newest first, without their function tables."""
+        summaries = []
+        for profile_id in self._stored_ids()[:limit]:
+            summary = self.load(profile_id)
+            if summary is not None:
+                summary.pop("top", None)
+                summaries.append(summary)
+        return summaries
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _trigger(self) -> tuple[str, str] | None:
+        """The (trigger, mode) to profile this request with, or None."""
+        requested = request.headers.get(self.header)
+        if requested is not None:
+            if not self._is_admin():
+                self._count("denied")
+                return None
+            return "header", requested if requested in PROFILER_MODES else self.mode
+        if self.sample_rate and self.rng() < self.sample_rate:
+            return "sample_rate", self.mode
+        return None
+
+    @staticmethod
+    def _is_admin() -> bool:
+        try:
+            verify_jwt_in_request(optional=True)
+        except Exception:
+            return False
+        return get_jwt().get("role") == "admin"
+
+    def _start_request(self):
+        trigger = self._trigger()
+        if trigger is None:
+            return
+        if not self._busy.acquire(blocking=False):
+            self._count("skipped_busy")
+            return
+        session = ProfileSession(trigger[1], self.interval, trigger[0])
+        request.environ[_SESSION_KEY] = session
+        session.start()
+
+    def _finish_request(self, response):
+        session = request.environ.pop(_SESSION_KEY, None)
+        if session is None:
+            return response
+        try:
+            session.stop()
+            profile_id = self._save(session, response.status_code)
+        except Exception:
+            logger.exception("Could not save the profile of %s %s", request.method, route_path())
+            return response
+        finally:
+            self._busy.release()
+        if session.trigger == "header":
+            response.headers["X-Profile-Id"] = profile_id
+        return response
+
+    def _end_request(self, exc=None):
+        # The request failed before its response was finalized.
+        session = request.environ.pop(_SESSION_KEY, None)
+        if session is not None:
+            session.stop()
+            self._busy.release()
+
+    def _save(self, session: ProfileSession, status: int) -> str:
+        endpoint = request.endpoint or "unmatched"
+        now = time.time()
+        stamp = (
+            time.strftime("%Y%m%dT%H%M%S", time.localtime(now)) + f"{int(now * 1000) % 1000:03d}"
+        )
+        profile_id = "-".join((stamp, endpoint.replace(".", "_"), uuid.uuid4().hex[:8]))
+        stacks = session.sampler.stacks
+        if session.profile is not None:
+            top = cprofile_top(session.profile, self.top_n)
+        else:
+            top = sampled_top(stacks, self.interval, self.top_n)
+        summary = {
+            "id": profile_id,
+            "method": request.method,
+            "path": route_path(),
+            "endpoint": endpoint,
+            "status": status,
+            "trigger": session.trigger,
+            "mode": session.mode,
+            "duration_ms": round(session.elapsed * 1000, 2),
+            "samples": sum(stacks.values()),
+            "interval_ms": self.interval * 1000,
+            "top": top,
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, profile_id)
+        with open(f"{base}.collapsed", "w", encoding="utf-8") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in stacks.items())
+        if session.profile is not None:
+            session.profile.dump_stats(f"{base}.prof")
+        # Written last: a profile is listed once its summary exists.
+        with open(f"{base}.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f)
+        self._count("profiles")
+        self._prune()
+        logger.info(
+            "Profiled %s %s (%s, %s) in %.1f ms: %s",
+            request.method,
+            route_path(),
+            session.trigger,
+            session.mode,
+            session.elapsed * 1000,
+            profile_id,
+        )
+        return profile_id
+
+    def _stored_ids(self) -> list[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        # IDs start with a timestamp, so they sort by age.
+        return sorted((name[:-5] for name in names if name.endswith(".json")), reverse=True)
+
+    def _prune(self):
+        for profile_id in self._stored_ids()[self.keep :]:
+            for suffix in (".json", ".collapsed", ".prof"):
+                try:
+                    os.remove(os.path.join(self.directory, profile_id + suffix))
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,266 @@
+# File: app/services/query_log.py
+"""
+MongoDB Command Monitoring
+
+A pymongo command listener (registered by the app factory before MongoEngine creates
+its client) that:
+
+- Times every command and records its collection, operation and reply size (documents
+  returned or affected), per request and in the process-wide ``stats()``.
+- Logs commands slower than DB_SLOW_QUERY_MS at WARNING, with the reply size in bytes
+  (measured for slow commands only, since it means re-encoding the reply) and the
+  *shape* of the filter: keys and operators are kept, values are replaced by ``"?"``,
+  so no user data reaches the log (``{"email": "?"}``, ``{"age": {"$gt": "?"}}``).
+- Adds up DB time, command and document count per request. The totals go out as a
+  ``Server-Timing: db;dur=<ms>;desc="<n> commands"`` header (DB_SERVER_TIMING) and into a
+  one-line request log entry, together with the most repeated collection/operation pair,
+  so N+1 patterns stand out. Requests issuing at least DB_COMMANDS_WARN commands are
+  logged at WARNING. The request is logged by its route (``/api/auth/password-reset/
+  <token>``), never by its raw path, so tokens in URLs stay out of the log.
+
+Commands issued outside a request (e.g., by the outbox dispatcher) are slow-logged but
+not attributed to any request.
+
+Configuration:
+- DB_MONITORING_ENABLED: Register the listener and per-request accounting (default True).
+- DB_SLOW_QUERY_MS: Threshold for the slow command log.
+- DB_COMMANDS_WARN: Commands per request that flag a request as a likely N+1.
+- DB_SERVER_TIMING: Send the Server-Timing header.
+- REQUEST_LOG_ENABLED: Log one line per request with its DB totals.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter
+
+import bson
+from flask import request
+from pymongo import monitoring
+
+from app.services.mongo import command_collection
+
+logger = logging.getLogger(__name__)
+request_logger = logging.getLogger("app.requests")
+
+# Fields holding query filters, per command (update/delete carry one per statement).
+FILTER_FIELDS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "aggregate": "pipeline",
+}
+STATEMENT_FIELDS = {"update": "updates", "delete": "deletes"}
+
+_STARTED_KEY = "app.query_log.started"
+
+
+class RequestDBStats:
+    """DB totals of one request."""
+
+    __slots__ = ("commands", "micros", "documents", "operations")
+
+    def __init__(self):
+        self.commands = 0
+        self.micros = 0
+        self.documents = 0  # returned or affected, over all replies
+        self.operations = Counter()  # (collection, operation) -> count
+
+    @property
+    def milliseconds(self) -> float:
+        return self.micros / 1000
+
+
+_current = contextvars.ContextVar("request_db_stats", default=None)
+
+
+def current_request_stats() -> RequestDBStats | None:
+    """DB totals of the request being handled in this context, if any."""
+    return _current.get()
+
+
+def route_path() -> str:
+    """The URL rule the current request matched, with placeholders instead of values."""
+    return request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+
+
+def redact_shape(value):
+    """Replace every value in a filter with "?", keeping field names and operators."""
+    if isinstance(value, dict):
+        return {key: redact_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # Keep the structure of $and/$or/pipeline lists; collapse lists of values.
+        if any(isinstance(item, (dict, list, tuple)) for item in value):
+            return [redact_shape(item) for item in value]
+        return ["?"] if value else []
+    return "?"
+
+
+def filter_shape(command_name: str, command: dict):
+    """The redacted filter(s) of a command, or None for commands without one."""
+    if command_name in FILTER_FIELDS:
+        return redact_shape(command.get(FILTER_FIELDS[command_name], {}))
+    if command_name in STATEMENT_FIELDS:
+        statements = command.get(STATEMENT_FIELDS[command_name]) or []
+        shapes = []
+        for statement in statements:
+            shape = redact_shape(statement.get("q", {}))
+            if shape not in shapes:
+                shapes.append(shape)
+        return shapes[0] if len(shapes) == 1 else shapes
+    return None
+
+
+def reply_documents(command_name: str, reply: dict) -> int:
+    """Documents returned (queries) or affected (writes) by a reply."""
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    if command_name == "findAndModify":
+        return 1 if reply.get("value") is not None else 0
+    n = reply.get("n")
+    return n if isinstance(n, int) else 0
+
+
+class CommandLogger(monitoring.CommandListener):
+    """pymongo listener feeding the slow command log and per-request totals."""
+
+    def __init__(self, monitor: "QueryMonitor"):
+        self.monitor = monitor
+        self._pending = {}  # (request_id, connection_id) -> (collection, command)
+
+    def started(self, event):
+        collection = command_collection(event.command_name, event.command)
+        self._pending[(event.request_id, event.connection_id)] = (collection, event.command)
+
+    def succeeded(self, event):
+        self._finished(event, event.reply, failed=False)
+
+    def failed(self, event):
+        self._finished(event, {}, failed=True)
+
+    def _finished(self, event, reply: dict, failed: bool):
+        collection, command = self._pending.pop((event.request_id, event.connection_id), ("-", {}))
+        operation = event.command_name
+        documents = reply_documents(operation, reply)
+        stats = _current.get()
+        if stats is not None:
+            stats.commands += 1
+            stats.micros += event.duration_micros
+            stats.documents += documents
+            stats.operations[(collection, operation)] += 1
+        self.monitor._count(event.duration_micros, documents)
+
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.monitor.slow_ms:
+            return
+        self.monitor._count_slow()
+        logger.warning(
+            "Slow MongoDB %s on %s: %.1f ms, %s docs, %s bytes%s, filter=%s",
+            operation,
+            collection,
+            duration_ms,
+            documents,
+            len(bson.encode(reply)) if reply else 0,
+            " (failed)" if failed else "",
+            filter_shape(operation, command),
+        )
+
+
+class QueryMonitor:
+    """Flask extension owning the command listener and per-request DB accounting."""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.slow_ms = 100.0
+        self.commands_warn = 25
+        self.server_timing = True
+        self.request_log = True
+        self._listener = None
+        self._lock = threading.Lock()
+        self._counters = {"commands": 0, "total_micros": 0, "documents": 0, "slow": 0}
+        if app is not None:
+            self.init_app(app)
+
+    def register_command_listener(self, app) -> None:
+        """Register the listener; must run before MongoEngine creates its client."""
+        app.config.setdefault("DB_MONITORING_ENABLED", True)
+        if not app.config["DB_MONITORING_ENABLED"] or self._listener is not None:
+            return
+        self._listener = CommandLogger(self)
+        monitoring.register(self._listener)
+
+    def init_app(self, app):
+        app.config.setdefault("DB_MONITORING_ENABLED", True)
+        app.config.setdefault("DB_SLOW_QUERY_MS", 100.0)
+        app.config.setdefault("DB_COMMANDS_WARN", 25)
+        app.config.setdefault("DB_SERVER_TIMING", True)
+        app.config.setdefault("REQUEST_LOG_ENABLED", True)
+        self.enabled = app.config["DB_MONITORING_ENABLED"]
+        self.slow_ms = app.config["DB_SLOW_QUERY_MS"]
+        self.commands_warn = app.config["DB_COMMANDS_WARN"]
+        self.server_timing = app.config["DB_SERVER_TIMING"]
+        self.request_log = app.config["REQUEST_LOG_ENABLED"]
+        app.extensions["query_monitor"] = self
+        if not self.enabled:
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._end_request)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def _count(self, micros: int, documents: int):
+        with self._lock:
+            self._counters["commands"] += 1
+            self._counters["total_micros"] += micros
+            self._counters["documents"] += documents
+
+    def _count_slow(self):
+        with self._lock:
+            self._counters["slow"] += 1
+
+    def _start_request(self):
+        request.environ[_STARTED_KEY] = (time.perf_counter(), _current.set(RequestDBStats()))
+
+    def _finish_request(self, response):
+        stats = _current.get()
+        started = request.environ.get(_STARTED_KEY)
+        if stats is None or started is None:
+            return response
+        if self.server_timing:
+            response.headers.add(
+                "Server-Timing", f'db;dur={stats.milliseconds:.1f};desc="{stats.commands} commands"'
+            )
+        if self.request_log or stats.commands >= self.commands_warn:
+            self._log_request(response, stats, (time.perf_counter() - started[0]) * 1000)
+        return response
+
+    def _log_request(self, response, stats: RequestDBStats, total_ms: float):
+        repeated = ""
+        if stats.operations:
+            (collection, operation), count = stats.operations.most_common(1)[0]
+            if count > 1:
+                repeated = f", most repeated: {collection}.{operation} x{count}"
+        level = logging.WARNING if stats.commands >= self.commands_warn else logging.INFO
+        request_logger.log(
+            level,
+            "%s %s %s in %.1f ms (db: %d commands, %d docs, %.1f ms%s)",
+            request.method,
+            route_path(),
+            response.status_code,
+            total_ms,
+            stats.commands,
+            stats.documents,
+            stats.milliseconds,
+            repeated,
+        )
+
+    def _end_request(self, exc=None):
+        started = request.environ.pop(_STARTED_KEY, None)
+        if started is not None:
+            _current.reset(started[1])
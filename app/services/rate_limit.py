@@ -0,0 +1,119 @@
+# File: app/services/rate_limit.py
+"""
+Rate Limiter
+
+Sliding-window request counters used to throttle expensive endpoints (login, password
+reset) per client IP and per account email.
+
+Each limit of N requests per P seconds keeps one counter per fixed window of P seconds.
+The sliding count is the current window's counter plus the previous window's counter
+weighted by how much of it still overlaps the last P seconds, which approximates a true
+sliding log with two integers per key.
+
+Counters live in an ExpiringStore:
+- By default the shared TTL store (TTL_STORE_URL) is used, so ``memory://`` keeps them in
+  the worker process and ``sqlite://``/``redis://`` share them across workers. With
+  ``memory://`` each gunicorn worker enforces its own limits, so a client may get up to
+  the limit times the number of workers.
+- RATE_LIMIT_STORAGE_URL selects a dedicated backend instead.
+
+Per-IP limits key on ``request.remote_addr``. Behind a reverse proxy that is the proxy's
+address unless TRUSTED_PROXY_HOPS is set, in which case the app factory installs
+Werkzeug's ProxyFix and the client address is taken from X-Forwarded-For.
+
+Configuration:
+- RATE_LIMIT_ENABLED: Turn throttling on or off.
+- RATE_LIMIT_STORAGE_URL: Optional backend URL (same format as TTL_STORE_URL).
+- TRUSTED_PROXY_HOPS: Number of reverse proxies whose forwarded headers are trusted.
+"""
+
+import math
+import threading
+import time
+
+from app.services.ttl_store import create_store
+
+RATE_LIMIT_PREFIX = "rate:"
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_limit(limit: str) -> tuple[int, int]:
+    """
+    Parse a limit such as ``"5/minute"`` or ``"20/300"`` into (requests, period seconds).
+
+    Raises:
+        ValueError: If the limit is malformed.
+    """
+    count, _, period = limit.partition("/")
+    period = period.strip().lower().rstrip("s") or "second"
+    seconds = int(period) if period.isdigit() else PERIODS.get(period)
+    if not count.strip().isdigit() or not seconds:
+        raise ValueError(f"Invalid rate limit: {limit!r}")
+    return int(count), seconds
+
+
+class RateLimiter:
+    """Flask extension holding sliding-window counters in an ExpiringStore."""
+
+    def __init__(self, store, app=None):
+        self.store = store
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._counters = {"allowed": 0, "throttled": 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("RATE_LIMIT_ENABLED", True)
+        app.config.setdefault("RATE_LIMIT_STORAGE_URL", None)
+        self.enabled = app.config["RATE_LIMIT_ENABLED"]
+        if app.config["RATE_LIMIT_STORAGE_URL"]:
+            self.store = create_store(app.config["RATE_LIMIT_STORAGE_URL"])
+        app.extensions["rate_limiter"] = self
+
+    def hit(self, scope: str, identity: str, limit: str) -> int | None:
+        """
+        Count one request for ``identity`` and check it against ``limit``.
+
+        Args:
+            scope (str): Name of the protected action (e.g., "login").
+            identity (str): What is being limited (e.g., "ip:10.0.0.1").
+            limit (str): Allowed rate, e.g. "5/minute".
+
+        Returns:
+            int | None: Seconds until a request would be allowed again, or None if allowed.
+        """
+        allowed, period = parse_limit(limit)
+        now = time.time()
+        window, elapsed = divmod(now, period)
+        key = f"{RATE_LIMIT_PREFIX}{scope}:{identity}:"
+        # Keep each window around long enough to serve as the next window's "previous".
+        current = self.store.incr(key + str(int(window)), period * 2)
+        previous = self.store.get(key + str(int(window) - 1)) or 0
+
+        if previous * (1 - elapsed / period) + current <= allowed:
+            self._count("allowed")
+            return None
+        self._count("throttled")
+        return self._retry_after(allowed, period, elapsed, previous, current)
+
+    def stats(self) -> dict:
+        """Return allowed/throttled counters for this process."""
+        with self._lock:
+            return dict(self._counters)
+
+    @staticmethod
+    def _retry_after(allowed, period, elapsed, previous, current) -> int:
+        """Seconds until one more request fits under the sliding count."""
+        if current + 1 <= allowed and previous:
+            # The previous window's weight decays enough within the current window.
+            wait = period * (1 - (allowed - current - 1) / previous) - elapsed
+        else:
+            # Wait for the next window, until this window's weight has decayed enough.
+            wait = period - elapsed + max(period * (1 - (allowed - 1) / current), 0)
+        return max(math.ceil(wait), 1)
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
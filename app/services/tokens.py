@@ -0,0 +1,142 @@
+# File: app/services/tokens.py
+"""
+Token Service
+
+Issues and verifies the signed, timestamped tokens used in email-verification and
+password-reset links.
+
+- Serializers are built once per (secrets, salt) pair and reused, instead of deriving
+  the signing key on every call.
+- Tokens are signed with SECRET_KEY and verified against SECRET_KEY plus every entry in
+  SECRET_KEY_FALLBACKS, so the secret can be rotated without invalidating outstanding
+  links. Keep the old key in the fallbacks for at least the longest token lifetime.
+- Single-use tokens are recorded in the shared TTL store until they would have expired
+  anyway, so a link cannot be replayed. The record is claimed atomically on verify, so
+  two concurrent requests cannot both use a link; callers ``release`` it again when the
+  action fails, so the link can be retried. This only holds when every worker shares the
+  store, so in production the app refuses to start with a per-process (memory://) one.
+- Issue and verify counts and latencies are kept in ``stats()`` and passed to
+  ``timing_hooks`` (exported by app/services/metrics.py).
+"""
+
+import hashlib
+import threading
+import time
+
+from flask import current_app
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+USED_TOKEN_PREFIX = "used-token:"
+
+
+class TokenService:
+    """Flask extension wrapping cached itsdangerous serializers and a replay cache."""
+
+    def __init__(self, store, app=None):
+        self.store = store
+        self._serializers = {}
+        self._lock = threading.Lock()
+        # Callables receiving ("issue" | "verify", outcome, seconds) for every call (metrics).
+        self.timing_hooks = []
+        self._counters = {
+            "issued": 0,
+            "verified": 0,
+            "rejected": 0,
+            "replayed": 0,
+            "issue_seconds": 0.0,
+            "verify_seconds": 0.0,
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("SECRET_KEY_FALLBACKS", [])
+        if app.config.get("FLASK_ENV") == "production" and not self.store.shared:
+            raise RuntimeError(
+                "Single-use links need a TTL store shared by every worker; set TTL_STORE_URL "
+                "to a sqlite:// or redis:// URL instead of memory://."
+            )
+        app.extensions["token_service"] = self
+
+    def issue(self, value: str, salt: str) -> str:
+        """
+        Sign ``value`` with the current SECRET_KEY.
+
+        Args:
+            value (str): Payload to embed (e.g., the user's email).
+            salt (str): Token purpose (e.g., "email-confirm", "password-reset").
+
+        Returns:
+            str: URL-safe token.
+        """
+        started = time.perf_counter()
+        token = self._serializer(salt).dumps(value)
+        self._record("issue", "issued", started)
+        return token
+
+    def verify(
+        self, token: str, salt: str, max_age: int = 3600, single_use: bool = False
+    ) -> str | None:
+        """
+        Check a token's signature and age against the current and fallback secrets.
+
+        Args:
+            token (str): The token to validate.
+            salt (str): The salt used when the token was issued.
+            max_age (int): Maximum token age in seconds.
+            single_use (bool): Reject the token if it was already accepted once.
+
+        Returns:
+            str | None: The embedded value if valid; otherwise, None.
+        """
+        started = time.perf_counter()
+        try:
+            value = self._serializer(salt).loads(token, max_age=max_age)
+        except (SignatureExpired, BadSignature):
+            self._record("verify", "rejected", started)
+            return None
+
+        if single_use:
+            if not self.store.add(self._used_key(token, salt), 1, max_age):
+                self._record("verify", "replayed", started)
+                return None
+
+        self._record("verify", "verified", started)
+        return value
+
+    def release(self, token: str, salt: str) -> None:
+        """
+        Forget that a single-use token was accepted, so it can be used again.
+
+        Call this when the action the token authorizes failed after ``verify``.
+        """
+        self.store.delete(self._used_key(token, salt))
+
+    def stats(self) -> dict:
+        """Return issue/verify counters and cumulative latency in seconds."""
+        with self._lock:
+            return dict(self._counters)
+
+    @staticmethod
+    def _used_key(token: str, salt: str) -> str:
+        return USED_TOKEN_PREFIX + hashlib.sha256(f"{salt}:{token}".encode("utf-8")).hexdigest()
+
+    def _serializer(self, salt: str) -> URLSafeTimedSerializer:
+        config = current_app.config
+        # itsdangerous signs with the last key and accepts any of them when verifying.
+        secrets = (*config["SECRET_KEY_FALLBACKS"], config["SECRET_KEY"])
+        key = (secrets, salt)
+        serializer = self._serializers.get(key)
+        if serializer is None:
+            serializer = URLSafeTimedSerializer(list(secrets), salt=salt)
+            with self._lock:
+                self._serializers[key] = serializer
+        return serializer
+
+    def _record(self, operation: str, outcome: str, started: float):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._counters[outcome] += 1
+            self._counters[f"{operation}_seconds"] += elapsed
+        for hook in self.timing_hooks:
+            hook(operation, outcome, elapsed)
@@ -0,0 +1,186 @@
+# File: app/services/tracing.py
+"""
+Sentry Trace Sampling
+
+Decides which request transactions are sent to Sentry, instead of tracing everything.
+
+- Each transaction gets a sample rate from SENTRY_TRACES_RATES, matched by endpoint
+  (e.g. ``auth.login``) first and blueprint (e.g. ``auth``) second, falling back to
+  SENTRY_TRACES_SAMPLE_RATE.
+- Without tail sampling the route rate is applied up front and unsampled requests are not
+  recorded at all. With tail sampling on (SENTRY_TRACES_TAIL_SAMPLING, the default in
+  production), every request is recorded and the decision is made once it finishes, so
+  failed requests (SENTRY_TRACES_KEEP_ERRORS) and requests slower than
+  SENTRY_TRACES_SLOW_MS are always sent; this costs full span recording on every request.
+- SENTRY_TRACES_MAX_PER_SECOND caps how many non-error transactions each worker sends.
+
+Without SENTRY_DSN, Sentry is neither imported nor initialized.
+"""
+
+import random
+import threading
+import time
+
+# Trace statuses Sentry assigns to failed requests (5xx responses or unhandled errors).
+ERROR_STATUSES = frozenset(
+    {"internal_error", "unknown_error", "unknown", "unavailable", "data_loss", "aborted"}
+)
+
+
+def parse_rates(value) -> dict:
+    """
+    Parse per-route rates from a dict or a ``"auth=0.2,auth.login=1"`` string.
+
+    Raises:
+        ValueError: If a rate is not a number between 0 and 1.
+    """
+    if isinstance(value, dict):
+        items = value.items()
+    else:
+        items = (pair.split("=", 1) for pair in (value or "").split(",") if pair.strip())
+    rates = {}
+    for name, rate in items:
+        rate = float(rate)
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(f"Sample rate for {name!r} must be between 0 and 1.")
+        rates[name.strip()] = rate
+    return rates
+
+
+class TraceSampler:
+    """
+    Sampling decisions for Sentry's ``traces_sampler`` and ``before_send_transaction``.
+
+    Both hooks are plain functions of their inputs (plus the injected ``clock`` and
+    ``rng``), so they can be exercised without a Sentry client or network access.
+    """
+
+    def __init__(
+        self,
+        default_rate: float = 0.0,
+        rates: dict | None = None,
+        tail: bool = False,
+        keep_errors: bool = True,
+        slow_ms: float = 0.0,
+        max_per_second: float = 0.0,
+        resolve_endpoint=None,
+        clock=time.monotonic,
+        rng=random.random,
+    ):
+        self.default_rate = default_rate
+        self.rates = rates or {}
+        self.tail = tail
+        self.keep_errors = keep_errors
+        self.slow_ms = slow_ms
+        self.max_per_second = max_per_second
+        self.resolve_endpoint = resolve_endpoint
+        self.clock = clock
+        self.rng = rng
+        self._lock = threading.Lock()
+        self._tokens = max_per_second
+        self._refilled_at = clock()
+
+    @classmethod
+    def from_config(cls, config, resolve_endpoint=None) -> "TraceSampler":
+        return cls(
+            default_rate=config["SENTRY_TRACES_SAMPLE_RATE"],
+            rates=parse_rates(config["SENTRY_TRACES_RATES"]),
+            tail=config["SENTRY_TRACES_TAIL_SAMPLING"],
+            keep_errors=config["SENTRY_TRACES_KEEP_ERRORS"],
+            slow_ms=config["SENTRY_TRACES_SLOW_MS"],
+            max_per_second=config["SENTRY_TRACES_MAX_PER_SECOND"],
+            resolve_endpoint=resolve_endpoint,
+        )
+
+    def rate_for(self, endpoint: str | None) -> float:
+        """Sample rate for an endpoint: its own rate, else its blueprint's, else the default."""
+        if endpoint:
+            if endpoint in self.rates:
+                return self.rates[endpoint]
+            blueprint = endpoint.rpartition(".")[0]
+            if blueprint and blueprint in self.rates:
+                return self.rates[blueprint]
+        return self.default_rate
+
+    def traces_sampler(self, sampling_context: dict) -> float:
+        """Sentry ``traces_sampler`` hook: decide whether to record a transaction."""
+        parent_sampled = sampling_context.get("parent_sampled")
+        if parent_sampled is not None:
+            # Follow the decision of an upstream service so distributed traces stay whole.
+            return 1.0 if parent_sampled else 0.0
+        if self.tail:
+            return 1.0
+        environ = sampling_context.get("wsgi_environ") or {}
+        endpoint = None
+        if self.resolve_endpoint and environ:
+            endpoint = self.resolve_endpoint(
+                environ.get("PATH_INFO", "/"), environ.get("REQUEST_METHOD", "GET")
+            )
+        return self._allow(self.rate_for(endpoint))
+
+    def before_send_transaction(self, event: dict, hint: dict):
+        """Sentry ``before_send_transaction`` hook: keep, or drop (return None) a transaction."""
+        if not self.tail:
+            return event
+        status = ((event.get("contexts") or {}).get("trace") or {}).get("status")
+        if self.keep_errors and status in ERROR_STATUSES:
+            return event
+        if self.slow_ms:
+            duration_ms = (event.get("timestamp", 0) - event.get("start_timestamp", 0)) * 1000
+            if duration_ms >= self.slow_ms and self._take_token():
+                return event
+        if self._allow(self.rate_for(event.get("transaction"))):
+            return event
+        return None
+
+    def _allow(self, rate: float) -> float:
+        if rate <= 0 or (rate < 1 and self.rng() >= rate):
+            return 0.0
+        return 1.0 if self._take_token() else 0.0
+
+    def _take_token(self) -> bool:
+        """Token bucket enforcing SENTRY_TRACES_MAX_PER_SECOND (0 means unlimited)."""
+        if not self.max_per_second:
+            return True
+        with self._lock:
+            now = self.clock()
+            elapsed, self._refilled_at = now - self._refilled_at, now
+            self._tokens = min(self.max_per_second, self._tokens + elapsed * self.max_per_second)
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+def init_sentry(app) -> TraceSampler | None:
+    """
+    Initialize Sentry with the configured sampler; a no-op when SENTRY_DSN is not set.
+
+    Returns:
+        TraceSampler | None: The sampler in use, or None when Sentry is disabled.
+    """
+    config = app.config
+    if not config.get("SENTRY_DSN"):
+        app.logger.info("SENTRY_DSN not set; Sentry is disabled.")
+        return None
+
+    # Imported here so apps without a DSN never pay for loading the SDK.
+    import sentry_sdk
+    from sentry_sdk.integrations.flask import FlaskIntegration
+
+    def resolve_endpoint(path, method):
+        try:
+            return app.url_map.bind("").match(path, method=method)[0]
+        except Exception:
+            return None
+
+    sampler = TraceSampler.from_config(config, resolve_endpoint=resolve_endpoint)
+    sentry_sdk.init(
+        dsn=config["SENTRY_DSN"],
+        environment=config.get("SENTRY_ENVIRONMENT"),
+        integrations=[FlaskIntegration(transaction_style="endpoint")],
+        traces_sampler=sampler.traces_sampler,
+        before_send_transaction=sampler.before_send_transaction,
+    )
+    app.extensions["trace_sampler"] = sampler
+    return sampler
@@ -0,0 +1,517 @@
+# File: app/services/ttl_store.py
+"""
+Expiring Key-Value Store
+
+A small pluggable store for short-lived values such as 2FA codes. Every backend offers
+O(1) ``get``/``set``/``add``/``incr``/``pop``/``delete`` on JSON-serializable values with a
+per-key TTL:
+
+- MemoryStore: per-process ``OrderedDict`` capped at a maximum size, with a background
+  thread that sweeps expired entries on a timer.
+- SQLiteStore: a WAL-mode SQLite file shared by every worker process on the host.
+- RedisStore: a minimal RESP client for Redis (or any Redis-protocol server).
+
+The backend is chosen by ``TTL_STORE_URL``:
+- ``memory://`` (default outside production)
+- ``sqlite:////var/run/ah-aihms/ttl.db`` (absolute path after the third slash; the
+  production default is a file in the temp directory)
+- ``redis://[:password@]host[:port][/db]``
+
+A 2FA code written by one gunicorn worker must be readable by the worker that serves the
+``/verify-2fa`` request, so ``memory://`` only works with a single worker process; a
+warning is logged when it is used with more (WEB_CONCURRENCY, set by gunicorn.conf.py).
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from urllib.parse import unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class ExpiringStore(ABC):
+    """Interface shared by all TTL store backends."""
+
+    # Whether every worker process sees the same values.
+    shared = True
+
+    @abstractmethod
+    def get(self, key: str):
+        """Return the value stored under ``key``, or None if missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value, ttl: float) -> None:
+        """Store ``value`` under ``key`` for ``ttl`` seconds."""
+
+    @abstractmethod
+    def add(self, key: str, value, ttl: float) -> bool:
+        """Store ``value`` only if ``key`` is absent or expired; return True if stored."""
+
+    @abstractmethod
+    def incr(self, key: str, ttl: float) -> int:
+        """
+        Atomically increment an integer counter and return its new value.
+
+        A missing or expired counter starts at 1 and expires ``ttl`` seconds later; later
+        increments do not extend its lifetime.
+        """
+
+    @abstractmethod
+    def pop(self, key: str):
+        """Atomically remove ``key`` and return its value (None if missing or expired)."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove ``key`` if present."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every key owned by this store."""
+
+    def close(self) -> None:
+        """Release connections or background threads."""
+
+
+class MemoryStore(ExpiringStore):
+    """
+    Process-local store bounded by ``max_entries``.
+
+    Entries are kept in insertion order, so when the store is full the oldest entry is
+    evicted in O(1). A daemon thread removes expired entries every ``sweep_interval``
+    seconds; it is started lazily so it always belongs to the current (forked) process.
+    """
+
+    shared = False
+
+    def __init__(self, max_entries: int = 100_000, sweep_interval: float = 30.0):
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sweeper_pid = None
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                return None
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        self._ensure_sweeper()
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (time.monotonic() + ttl, value)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def add(self, key, value, ttl):
+        self._ensure_sweeper()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                return False
+            self._data.pop(key, None)
+            self._data[key] = (now + ttl, value)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def incr(self, key, ttl):
+        self._ensure_sweeper()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                value = entry[1] + 1
+                self._data[key] = (entry[0], value)
+                return value
+            self._data.pop(key, None)
+            self._data[key] = (now + ttl, 1)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return 1
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def close(self):
+        self._stop.set()
+
+    def __len__(self):
+        return len(self._data)
+
+    def sweep(self) -> int:
+        """Remove all expired entries and return how many were dropped."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._data.items() if expires_at <= now]
+            for key in expired:
+                del self._data[key]
+        return len(expired)
+
+    def _ensure_sweeper(self):
+        if self._sweeper_pid == os.getpid() or self.sweep_interval <= 0:
+            return
+        self._sweeper_pid = os.getpid()
+        self._stop.clear()
+        thread = threading.Thread(target=self._sweep_loop, name="ttl-store-sweeper", daemon=True)
+        thread.start()
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            self.sweep()
+
+
+class SQLiteStore(ExpiringStore):
+    """
+    Host-wide store backed by a SQLite database in WAL mode.
+
+    Each thread of each process opens its own connection. Expired rows are filtered on
+    read and purged opportunistically on write, at most once per ``sweep_interval``.
+    """
+
+    def __init__(self, path: str, sweep_interval: float = 30.0):
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._next_sweep = 0.0
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ttl_store "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ttl_store_expires_at_idx ON ttl_store (expires_at)"
+            )
+
+    def get(self, key):
+        row = (
+            self._connection()
+            .execute(
+                "SELECT value FROM ttl_store WHERE key = ? AND expires_at > ?", (key, time.time())
+            )
+            .fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ttl_store (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), now + ttl),
+            )
+            if now >= self._next_sweep:
+                self._next_sweep = now + self.sweep_interval
+                conn.execute("DELETE FROM ttl_store WHERE expires_at <= ?", (now,))
+
+    def add(self, key, value, ttl):
+        now = time.time()
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO ttl_store (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, "
+                "expires_at = excluded.expires_at WHERE ttl_store.expires_at <= ?",
+                (key, json.dumps(value), now + ttl, now),
+            )
+        return cursor.rowcount == 1
+
+    def incr(self, key, ttl):
+        now = time.time()
+        with self._connection() as conn:
+            row = conn.execute(
+                "INSERT INTO ttl_store (key, value, expires_at) VALUES (?, '1', ?) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "value = CASE WHEN ttl_store.expires_at <= ? THEN '1' "
+                "ELSE CAST(CAST(ttl_store.value AS INTEGER) + 1 AS TEXT) END, "
+                "expires_at = CASE WHEN ttl_store.expires_at <= ? THEN excluded.expires_at "
+                "ELSE ttl_store.expires_at END "
+                "RETURNING value",
+                (key, now + ttl, now, now),
+            ).fetchone()
+        return int(row[0])
+
+    def pop(self, key):
+        with self._connection() as conn:
+            row = conn.execute(
+                "DELETE FROM ttl_store WHERE key = ? RETURNING value, expires_at", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def delete(self, key):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM ttl_store WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM ttl_store")
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+
+class RedisError(Exception):
+    """Raised when the Redis server replies with an error."""
+
+
+class RedisStore(ExpiringStore):
+    """
+    Store backed by a Redis-protocol server, using a minimal RESP2 client.
+
+    One socket is kept per thread per process. Keys are namespaced with ``prefix`` so
+    ``clear()`` only touches this store's keys.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        password: str | None = None,
+        prefix: str = "ah-aihms:",
+        socket_timeout: float = 2.0,
+    ):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.prefix = prefix
+        self.socket_timeout = socket_timeout
+        self._local = threading.local()
+
+    def get(self, key):
+        raw = self.execute("GET", self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self.execute("SET", self.prefix + key, json.dumps(value), "PX", max(int(ttl * 1000), 1))
+
+    def add(self, key, value, ttl):
+        reply = self.execute(
+            "SET", self.prefix + key, json.dumps(value), "PX", max(int(ttl * 1000), 1), "NX"
+        )
+        return reply == "OK"
+
+    def incr(self, key, ttl):
+        key = self.prefix + key
+        ttl_ms = max(int(ttl * 1000), 1)
+        self.execute("SET", key, "0", "PX", ttl_ms, "NX")
+        value = self.execute("INCR", key)
+        if value == 1:
+            # The counter expired between SET and INCR and was recreated without a TTL.
+            self.execute("PEXPIRE", key, ttl_ms)
+        return value
+
+    def pop(self, key):
+        raw = self.execute("GETDEL", self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def delete(self, key):
+        self.execute("DEL", self.prefix + key)
+
+    def clear(self):
+        cursor = "0"
+        while True:
+            cursor, keys = self.execute("SCAN", cursor, "MATCH", self.prefix + "*", "COUNT", 500)
+            if keys:
+                self.execute("DEL", *keys)
+            if cursor in ("0", b"0"):
+                break
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn[0].close()
+            self._local.conn = None
+
+    def execute(self, *args):
+        """Send one command and return its decoded reply."""
+        sock, reader = self._connection()
+        try:
+            sock.sendall(self._encode(args))
+            return self._read_reply(reader)
+        except (OSError, ConnectionError):
+            self.close()
+            raise
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            sock = socket.create_connection((self.host, self.port), timeout=self.socket_timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = (sock, sock.makefile("rb"))
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            if self.password:
+                self.execute("AUTH", self.password)
+            if self.db:
+                self.execute("SELECT", self.db)
+        return conn
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed.")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode("utf-8")
+        if kind == b"-":
+            raise RedisError(payload.decode("utf-8"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = reader.read(length + 2)[:-2]
+            return data.decode("utf-8")
+        if kind == b"*":
+            length = int(payload)
+            if length == -1:
+                return None
+            return [self._read_reply(reader) for _ in range(length)]
+        raise RedisError(f"Unexpected reply from Redis: {line!r}")
+
+
+def create_store(url: str, max_entries: int = 100_000, sweep_interval: float = 30.0):
+    """
+    Build a store backend from a ``TTL_STORE_URL``.
+
+    Args:
+        url (str): memory://, sqlite:///<path> or redis://[:password@]host[:port][/db].
+        max_entries (int): Size cap for the in-memory backend.
+        sweep_interval (float): Seconds between expiry sweeps (memory and SQLite).
+
+    Returns:
+        ExpiringStore: The configured backend.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemoryStore(max_entries=max_entries, sweep_interval=sweep_interval)
+    if parsed.scheme == "sqlite":
+        return SQLiteStore(parsed.path, sweep_interval=sweep_interval)
+    if parsed.scheme == "redis":
+        db = parsed.path.lstrip("/")
+        return RedisStore(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=int(db) if db else 0,
+            password=unquote(parsed.password) if parsed.password else None,
+        )
+    raise ValueError(f"Unsupported TTL_STORE_URL scheme: {parsed.scheme!r}")
+
+
+class TTLStore:
+    """
+    Flask extension that exposes the configured ExpiringStore backend.
+
+    Configuration:
+    - TTL_STORE_URL: Backend URL (default ``memory://``; see Config for production).
+    - TTL_STORE_MAX_ENTRIES: Size cap for the in-memory backend.
+    - TTL_STORE_SWEEP_INTERVAL: Seconds between expiry sweeps.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("TTL_STORE_URL", "memory://")
+        app.config.setdefault("TTL_STORE_MAX_ENTRIES", 100_000)
+        app.config.setdefault("TTL_STORE_SWEEP_INTERVAL", 30.0)
+        if self.backend is not None:
+            self.backend.close()
+        self.backend = create_store(
+            app.config["TTL_STORE_URL"],
+            max_entries=app.config["TTL_STORE_MAX_ENTRIES"],
+            sweep_interval=app.config["TTL_STORE_SWEEP_INTERVAL"],
+        )
+        workers = int(os.getenv("WEB_CONCURRENCY") or 1)
+        if not self.shared and workers > 1:
+            logger.warning(
+                "TTL_STORE_URL=%s is per process but %d workers serve requests: 2FA codes, "
+                "used links and rate-limit counters are not shared between them. "
+                "Use sqlite:// or redis://.",
+                app.config["TTL_STORE_URL"],
+                workers,
+            )
+        app.extensions["ttl_store"] = self
+
+    @property
+    def shared(self) -> bool:
+        """Whether values are visible to every worker process (not ``memory://``)."""
+        return self.backend.shared
+
+    def get(self, key: str):
+        return self.backend.get(key)
+
+    def set(self, key: str, value, ttl: float) -> None:
+        self.backend.set(key, value, ttl)
+
+    def add(self, key: str, value, ttl: float) -> bool:
+        return self.backend.add(key, value, ttl)
+
+    def incr(self, key: str, ttl: float) -> int:
+        return self.backend.incr(key, ttl)
+
+    def pop(self, key: str):
+        return self.backend.pop(key)
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(key)
+
+    def clear(self) -> None:
+        self.backend.clear()
@@ -0,0 +1,153 @@
+# File: app/services/user_cache.py
+"""
+Process-Local User Cache
+
+A bounded, thread-safe LRU cache with a TTL in front of the ``users`` collection. It stores
+``UserSummary`` read models (id, email, role, first name) and serves lookups by email or
+by id. Password hashes and the verified/two-factor flags are never cached: the login flow
+reads them fresh (``UserCredentials``), so a password reset or 2FA change in one worker
+takes effect in every worker at once.
+
+Invalidation:
+- MongoEngine ``post_save``/``post_delete`` signals on User drop the affected entry.
+- Targeted writes (``update_one``) do not fire signals, so callers must invalidate
+  explicitly after them.
+- Loads run outside the lock. Every invalidation bumps a generation counter, and a load
+  that raced with one is returned but not stored, so it cannot re-cache the old user.
+
+Entries in other worker processes are only refreshed when their TTL expires, so keep
+USER_CACHE_TTL short.
+
+Configuration:
+- USER_CACHE_ENABLED: Turn the cache on or off (lookups go straight to MongoDB when off).
+- USER_CACHE_TTL: Seconds an entry stays valid.
+- USER_CACHE_MAX_SIZE: Maximum number of users held per process.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class UserCache:
+    """Flask extension caching UserSummary read models by email and by id."""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.ttl = 30.0
+        self.max_size = 10_000
+        self._entries = OrderedDict()  # ("email"|"id", value) -> (expires_at, summary)
+        self._lock = threading.Lock()
+        self._signals_connected = False
+        self._generation = 0  # bumped by every invalidation; see _get_or_load
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        # Callables receiving (counter name, amount) whenever a counter grows (metrics).
+        self.event_hooks = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("USER_CACHE_ENABLED", True)
+        app.config.setdefault("USER_CACHE_TTL", 30.0)
+        app.config.setdefault("USER_CACHE_MAX_SIZE", 10_000)
+        self.enabled = app.config["USER_CACHE_ENABLED"]
+        self.ttl = app.config["USER_CACHE_TTL"]
+        self.max_size = app.config["USER_CACHE_MAX_SIZE"]
+        self.clear()
+        self._connect_signals()
+        app.extensions["user_cache"] = self
+
+    def by_email(self, email: str):
+        """Return the UserSummary for ``email`` (None if the user does not exist)."""
+        from app.models.user import UserSummary
+
+        return self._get_or_load(("email", email), lambda: UserSummary.by_email(email))
+
+    def by_id(self, user_id):
+        """Return the UserSummary for a user id (None if the user does not exist)."""
+        from app.models.user import UserSummary
+
+        return self._get_or_load(("id", str(user_id)), lambda: UserSummary.by_id(user_id))
+
+    def invalidate(self, user_id=None, email: str | None = None) -> None:
+        """Drop a user from the cache under both of its keys."""
+        invalidated = 0
+        with self._lock:
+            self._generation += 1
+            for key in (("id", str(user_id)) if user_id else None, ("email", email)):
+                entry = self._entries.pop(key, None) if key else None
+                if entry is not None:
+                    summary = entry[1]
+                    self._entries.pop(("id", str(summary.id)), None)
+                    self._entries.pop(("email", summary.email), None)
+                    invalidated += 1
+            self._counters["invalidations"] += invalidated
+        self._emit("invalidations", invalidated)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss/eviction (users) counters and the current size (keys)."""
+        with self._lock:
+            return dict(self._counters, size=len(self._entries))
+
+    def _get_or_load(self, key, loader):
+        if not self.enabled:
+            return loader()
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            hit = entry is not None and entry[0] > now
+            if hit:
+                self._entries.move_to_end(key)
+            self._counters["hits" if hit else "misses"] += 1
+            generation = self._generation
+        self._emit("hits" if hit else "misses")
+        if hit:
+            return entry[1]
+
+        summary = loader()
+        if summary is not None:
+            self._store(summary, now + self.ttl, generation)
+        return summary
+
+    def _store(self, summary, expires_at, generation):
+        evicted = 0
+        with self._lock:
+            if generation != self._generation:
+                return  # invalidated while loading; the summary may predate that write
+            for key in (("id", str(summary.id)), ("email", summary.email)):
+                self._entries[key] = (expires_at, summary)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size * 2:
+                _, (_, oldest) = self._entries.popitem(last=False)
+                # Drop the user's other key too, unless it has been re-cached since.
+                for key in (("id", str(oldest.id)), ("email", oldest.email)):
+                    if key in self._entries and self._entries[key][1] is oldest:
+                        del self._entries[key]
+                evicted += 1
+            self._counters["evictions"] += evicted
+        self._emit("evictions", evicted)
+
+    def _emit(self, name: str, amount: int = 1):
+        if amount:
+            for hook in self.event_hooks:
+                hook(name, amount)
+
+    def _connect_signals(self):
+        if self._signals_connected:
+            return
+        from mongoengine import signals
+
+        from app.models.user import User
+
+        signals.post_save.connect(self._on_user_changed, sender=User, weak=False)
+        signals.post_delete.connect(self._on_user_changed, sender=User, weak=False)
+        self._signals_connected = True
+
+    def _on_user_changed(self, sender, document, **kwargs):
+        self.invalidate(user_id=document.id, email=document.email)
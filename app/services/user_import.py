@@ -0,0 +1,236 @@
+# File: app/services/user_import.py
+"""
+Bulk User Import
+
+Streams users from an NDJSON or CSV upload into the ``users`` collection:
+
+- Rows are parsed and validated one at a time, so the upload is never held in memory.
+- Passwords of valid rows are hashed through ``PasswordHasher.hash_many`` on a bulk pool
+  of ``hash_workers`` processes, separate from the one serving logins, which is kept busy
+  while earlier rows are written. bcrypt dominates: at cost 12 expect about 4 users/s per
+  hashing process (roughly 30/s on 8 CPUs, so ~1 hour per 100k users).
+- Hashed users are written in chunks with ``insert_many(ordered=False)``; the unique
+  email index rejects duplicates per row without aborting the rest of the chunk.
+
+CSV uploads flatten the emergency contact into ``emergency_contact_name``,
+``emergency_contact_relationship`` and ``emergency_contact_phone_number`` columns.
+"""
+
+import csv
+import io
+from collections import deque
+
+# Parses through the app's JSON provider (orjson) inside a request.
+from flask import json
+from mongoengine import ValidationError
+from pymongo.errors import BulkWriteError
+
+from app.extensions import password_hasher
+from app.models.user import User
+from app.services.passwords import PasswordHashingError
+
+IMPORT_FORMATS = ("ndjson", "csv")
+IMPORTABLE_ROLES = ("patient", "doctor")
+REQUIRED_FIELDS = (
+    "email",
+    "password",
+    "first_name",
+    "last_name",
+    "phone_number",
+    "address",
+    "emergency_contact",
+)
+EMERGENCY_CONTACT_COLUMNS = {
+    "emergency_contact_name": "name",
+    "emergency_contact_relationship": "relationship",
+    "emergency_contact_phone_number": "phone_number",
+}
+DUPLICATE_KEY_ERROR = 11000
+
+
+class ImportInterrupted(Exception):
+    """
+    Raised when password hashing fails part-way through an import.
+
+    ``report`` covers the rows processed until then: users hashed before the failure
+    are inserted, and ``report["last_row"]`` is the last row whose outcome is final.
+    """
+
+    def __init__(self, report: dict, cause: PasswordHashingError):
+        super().__init__(str(cause))
+        self.report = report
+
+
+def read_rows(stream, fmt: str):
+    """
+    Parse an upload into ``(row_number, row)`` pairs.
+
+    Args:
+        stream: Binary file-like object (e.g., ``request.stream``).
+        fmt (str): "ndjson" or "csv".
+
+    Yields:
+        tuple[int, dict | str]: The 1-based data row number and either the row or a
+        parse error message.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            contact = {
+                key: row.pop(column, None) for column, key in EMERGENCY_CONTACT_COLUMNS.items()
+            }
+            if any(contact.values()):
+                row["emergency_contact"] = contact
+            yield number, row
+        return
+
+    number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, "Invalid JSON."
+            continue
+        yield number, row if isinstance(row, dict) else "Expected a JSON object."
+
+
+def build_user(row: dict, default_role: str) -> User:
+    """
+    Validate one row and build an unsaved User (with ``password_hash`` still empty).
+
+    Raises:
+        ValueError: With a client-facing message if the row is invalid.
+    """
+    missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}.")
+    role = row.get("role") or default_role
+    if role not in IMPORTABLE_ROLES:
+        raise ValueError(f"Invalid role: {role}.")
+    if not isinstance(row["emergency_contact"], dict):
+        raise ValueError("emergency_contact must be an object.")
+
+    user = User(
+        email=row["email"],
+        password_hash="-",
+        role=role,
+        first_name=row["first_name"],
+        last_name=row["last_name"],
+        phone_number=row["phone_number"],
+        address=row["address"],
+        emergency_contact=row["emergency_contact"],
+    )
+    try:
+        user.validate()
+    except ValidationError as e:
+        details = "; ".join(f"{field}: {error}" for field, error in e.to_dict().items())
+        raise ValueError(f"Invalid fields: {details}.") from None
+    return user
+
+
+def import_users(
+    rows,
+    default_role: str = "patient",
+    chunk_size: int = 1000,
+    max_errors: int = 1000,
+    on_inserted=None,
+    hash_workers: int | None = None,
+) -> dict:
+    """
+    Validate, hash and insert users from ``(row_number, row)`` pairs.
+
+    Args:
+        rows: Iterable from ``read_rows``.
+        default_role (str): Role for rows that do not name one.
+        chunk_size (int): Users per ``insert_many`` call.
+        max_errors (int): Maximum number of per-row errors listed in the report.
+        on_inserted (callable, optional): Called with the list of inserted User
+            documents after each chunk (e.g., to queue verification emails).
+        hash_workers (int, optional): Size of the bulk hashing pool (default: the
+            request pool).
+
+    Returns:
+        dict: ``total``, ``imported`` and ``failed`` counts, the listed ``errors`` and
+        ``last_row``, the last row number processed.
+
+    Raises:
+        ImportInterrupted: If password hashing fails; carries the partial report. Rows
+        after its ``last_row`` were not imported and can be uploaded again.
+    """
+    report = {"total": 0, "imported": 0, "failed": 0, "errors": [], "last_row": 0}
+
+    def fail(number, email, message):
+        report["failed"] += 1
+        if len(report["errors"]) < max_errors:
+            report["errors"].append({"row": number, "email": email, "error": message})
+
+    # Rows whose passwords have been submitted for hashing, in submission order.
+    hashing = deque()
+
+    def passwords():
+        for number, row in rows:
+            report["total"] += 1
+            report["last_row"] = number
+            if isinstance(row, str):
+                fail(number, None, row)
+                continue
+            try:
+                user = build_user(row, default_role)
+            except ValueError as e:
+                fail(number, row.get("email"), str(e))
+                continue
+            hashing.append((number, user))
+            yield str(row["password"])
+
+    chunk = []
+    try:
+        for password_hash in password_hasher.hash_many(passwords(), workers=hash_workers):
+            number, user = hashing.popleft()
+            user.password_hash = password_hash
+            chunk.append((number, user))
+            if len(chunk) >= chunk_size:
+                _insert_chunk(chunk, report, fail, on_inserted)
+                chunk = []
+    except PasswordHashingError as e:
+        if chunk:
+            _insert_chunk(chunk, report, fail, on_inserted)
+        if hashing:
+            # Rows from the first unhashed one on are left for the next upload, so they
+            # are taken out of the counts (row numbers are consecutive).
+            first_pending = hashing[0][0]
+            left = report["last_row"] - first_pending + 1
+            report["total"] -= left
+            report["failed"] -= left - len(hashing)
+            report["errors"] = [error for error in report["errors"] if error["row"] < first_pending]
+            report["last_row"] = first_pending - 1
+        raise ImportInterrupted(report, e) from e
+    if chunk:
+        _insert_chunk(chunk, report, fail, on_inserted)
+    return report
+
+
+def _insert_chunk(chunk, report, fail, on_inserted):
+    documents = [user.to_mongo().to_dict() for _, user in chunk]
+    failed = {}
+    try:
+        User._get_collection().insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            duplicate = error.get("code") == DUPLICATE_KEY_ERROR
+            failed[error["index"]] = (
+                "User with this email already exists." if duplicate else error.get("errmsg")
+            )
+
+    inserted = []
+    for index, ((number, user), document) in enumerate(zip(chunk, documents)):
+        if index in failed:
+            fail(number, user.email, failed[index])
+        else:
+            user.id = document["_id"]
+            inserted.append(user)
+    report["imported"] += len(inserted)
+    if inserted and on_inserted is not None:
+        on_inserted(inserted)
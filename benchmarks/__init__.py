@@ -0,0 +1,2 @@
+# File: benchmarks/__init__.py
+"""Performance benchmarks with stored baselines (see benchmarks/README.md)."""
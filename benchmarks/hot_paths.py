@@ -0,0 +1,320 @@
+# File: benchmarks/hot_paths.py
+"""
+Auth and Model Hot-Path Benchmark
+
+Times the calls every request pays for, in-process, on the test suite's setup
+(``make_test_app`` and the mongomock database from tests/conftest.py):
+
+- ``auth.login`` and ``auth.register``: full requests through the Flask test client.
+- ``tokens.generate_token`` / ``tokens.confirm_token``: email verification tokens.
+- ``jwt.create_tokens``: the access/refresh pair issued on login.
+- ``validate.<Model>``: ``Document.validate()`` for every model in app/models.
+
+For each case it reports throughput, mean and p50/p95/p99 latency, the peak memory
+allocated during one call (tracemalloc) and the memory blocks still held per call
+afterwards (cache growth and leaks). Results can be written to JSON and are compared
+with benchmarks/baselines/hot_paths.json: the run fails when a case's median latency or
+peak allocation exceeds its baseline by more than ``--tolerance``.
+
+Usage:
+    python -m benchmarks.hot_paths                      # run and compare with the baseline
+    python -m benchmarks.hot_paths --output run.json    # also save the results
+    python -m benchmarks.hot_paths --compare run.json   # compare saved results, no run
+    python -m benchmarks.hot_paths --update-baseline    # record a new baseline
+    python -m benchmarks.hot_paths --filter validate.   # only matching cases
+
+bcrypt runs at ``--bcrypt-rounds`` (default 4, as in the tests) so login and register
+measure the app rather than the hash; rate limiting is off. Timings depend on the host;
+record the baseline on the machine that runs the comparison.
+"""
+
+import argparse
+import array
+import gc
+import itertools
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import UTC, datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "hot_paths.json"
+
+PASSWORD = "BenchPassword1!"
+# Calls measured for tracemalloc peaks (tracing slows calls down, so fewer than timed).
+ALLOCATION_CALLS = 20
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(fn, iterations: int, warmup: int) -> dict:
+    """Time ``iterations`` calls of ``fn`` and trace the memory a few more calls allocate."""
+    for _ in range(warmup):
+        fn()
+
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    # Preallocated, so storing timings does not itself allocate (and count as retained).
+    timings = array.array("q", bytes(8 * iterations))
+    for i in range(iterations):
+        started = time.perf_counter_ns()
+        fn()
+        timings[i] = time.perf_counter_ns() - started
+    gc.collect()
+    retained = (sys.getallocatedblocks() - blocks_before) / iterations
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(ALLOCATION_CALLS):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            fn()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+
+    timings = sorted(timings)
+    total_s = sum(timings) / 1e9
+    return {
+        "iterations": iterations,
+        "ops_per_s": round(iterations / total_s, 1),
+        "mean_us": round(sum(timings) / len(timings) / 1000, 2),
+        "p50_us": round(percentile(timings, 0.50) / 1000, 2),
+        "p95_us": round(percentile(timings, 0.95) / 1000, 2),
+        "p99_us": round(percentile(timings, 0.99) / 1000, 2),
+        "alloc_peak_kib": round(sorted(peaks)[len(peaks) // 2] / 1024, 2),
+        "retained_blocks_per_call": round(retained, 2),
+    }
+
+
+def build_cases(flask_app) -> dict:
+    """Map case names to (callable, iterations); needs an app context and an empty database."""
+    from flask_jwt_extended import create_access_token, create_refresh_token
+
+    import app.models as models
+    from app.extensions import password_hasher
+    from app.models import AnalyticsData, Appointment, MedicalRecord, OutboxEmail, User
+    from app.models.user import EmergencyContact
+    from app.routes.auth import confirm_token, generate_token
+
+    contact = EmergencyContact(name="Kin", relationship="Sibling", phone_number="5550001111")
+
+    def make_user(email, role):
+        return User(
+            email=email,
+            password_hash=password_hasher.hash_password(PASSWORD),
+            role=role,
+            first_name="Bench",
+            last_name=role.title(),
+            phone_number="5551112222",
+            address="1 Bench Street",
+            emergency_contact=contact,
+            verified=True,
+        )
+
+    patient = make_user("patient@bench.example.com", "patient").save()
+    doctor = make_user("doctor@bench.example.com", "doctor").save()
+    now = datetime.now(UTC)
+    documents = {
+        "User": make_user("unsaved@bench.example.com", "patient"),
+        "Appointment": Appointment(
+            patient_id=patient, doctor_id=doctor, appointment_time=now, reason="Check-up"
+        ),
+        "MedicalRecord": MedicalRecord(
+            patient_id=patient,
+            uploaded_by=doctor,
+            document_hash="bench-hash",
+            record_type="report",
+            file_url="https://files.bench.example.com/report.pdf",
+        ),
+        "AnalyticsData": AnalyticsData(
+            patient_id=patient,
+            metrics={"heart_rate": 72, "blood_pressure": "120/80", "glucose_level": 90},
+            prediction_results={"risk_of_diabetes": 0.05},
+            generated_by_model="bench-model",
+        ),
+        "OutboxEmail": OutboxEmail(
+            subject="Verify your email", recipients=[patient.email], body="Hello"
+        ),
+    }
+    missing = set(models.__all__) - set(documents)
+    if missing:
+        raise RuntimeError(f"No benchmark document for {', '.join(sorted(missing))}")
+
+    client = flask_app.test_client()
+    login_body = {"email": patient.email, "password": PASSWORD}
+    registrations = itertools.count()
+
+    def login():
+        response = client.post("/api/auth/login", json=login_body)
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    def register():
+        response = client.post(
+            "/api/auth/register/patient",
+            json={
+                "email": f"new{next(registrations)}@bench.example.com",
+                "password": PASSWORD,
+                "first_name": "New",
+                "last_name": "Patient",
+                "phone_number": "5553334444",
+                "address": "2 Bench Street",
+                "emergency_contact": contact.to_mongo().to_dict(),
+            },
+        )
+        assert response.status_code == 201, response.get_data(as_text=True)
+
+    token = generate_token(patient.email, salt="email-confirm")
+
+    def create_tokens():
+        claims = {"role": "patient"}
+        create_access_token(identity=str(patient.id), additional_claims=claims)
+        create_refresh_token(identity=str(patient.id), additional_claims=claims)
+
+    cases = {
+        "auth.login": (login, 300),
+        "auth.register": (register, 300),
+        "tokens.generate_token": (lambda: generate_token(patient.email, "email-confirm"), 3000),
+        "tokens.confirm_token": (lambda: confirm_token(token, salt="email-confirm"), 3000),
+        "jwt.create_tokens": (create_tokens, 3000),
+    }
+    for name, document in documents.items():
+        cases[f"validate.{name}"] = (document.validate, 3000)
+    return cases
+
+
+def run(patterns: list[str], scale: float, bcrypt_rounds: int) -> dict:
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+    from app.extensions import query_monitor, rate_limiter
+    from tests.conftest import connect_test_db, make_test_app
+
+    logging.getLogger().setLevel(logging.WARNING)
+    flask_app = make_test_app()
+    flask_app.config["BCRYPT_ROUNDS"] = bcrypt_rounds
+    rate_limiter.enabled = False
+    # Verification emails are built but not sent, and per-request log lines are skipped.
+    flask_app.extensions["mail"].suppress = True
+    flask_app.extensions["mail"].default_sender = "bench@example.com"
+    query_monitor.request_log = False
+    connect_test_db()
+
+    results = {}
+    with flask_app.app_context():
+        for name, (fn, iterations) in build_cases(flask_app).items():
+            if patterns and not any(pattern in name for pattern in patterns):
+                continue
+            iterations = max(10, int(iterations * scale))
+            results[name] = measure(fn, iterations, warmup=max(3, iterations // 20))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "bcrypt_rounds": bcrypt_rounds,
+            "scale": scale,
+            "recorded_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return a message for every case whose median latency or peak allocation regressed."""
+    failures = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        if result["p50_us"] > base["p50_us"] * (1 + tolerance):
+            failures.append(
+                f"{name}: p50 {result['p50_us']:.1f} us exceeds baseline "
+                f"{base['p50_us']:.1f} us by more than {tolerance:.0%}"
+            )
+        # Allow 1 KiB of slack: tiny peaks vary with interpreter internals.
+        if result["alloc_peak_kib"] > base["alloc_peak_kib"] * (1 + tolerance) + 1:
+            failures.append(
+                f"{name}: allocates {result['alloc_peak_kib']:.1f} KiB per call, baseline "
+                f"{base['alloc_peak_kib']:.1f} KiB"
+            )
+    return failures
+
+
+def print_table(current: dict, baseline: dict | None):
+    header = f"{'case':<24}{'ops/s':>10}{'mean us':>10}{'p50 us':>10}{'p95 us':>10}"
+    header += f"{'p99 us':>10}{'peak KiB':>10}{'blocks':>8}"
+    if baseline:
+        header += f"{'p50 vs base':>13}"
+    print(header)
+    for name, r in current["results"].items():
+        line = (
+            f"{name:<24}{r['ops_per_s']:>10.0f}{r['mean_us']:>10.1f}{r['p50_us']:>10.1f}"
+            f"{r['p95_us']:>10.1f}{r['p99_us']:>10.1f}{r['alloc_peak_kib']:>10.1f}"
+            f"{r['retained_blocks_per_call']:>8.1f}"
+        )
+        base = (baseline or {}).get("results", {}).get(name)
+        if base:
+            line += f"{(r['p50_us'] / base['p50_us'] - 1):>+13.0%}"
+        print(line)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--filter", action="append", default=[], help="Run cases containing this text."
+    )
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply iteration counts.")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4, help="bcrypt cost factor.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown.")
+    parser.add_argument("--output", type=Path, help="Write the results to this JSON file.")
+    parser.add_argument("--compare", type=Path, help="Compare saved results instead of running.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run.")
+    parser.add_argument("--json", action="store_true", help="Print the raw results as JSON.")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        current = json.loads(args.compare.read_text())
+    else:
+        current = run(args.filter, args.scale, args.bcrypt_rounds)
+    if args.output:
+        args.output.write_text(json.dumps(current, indent=2) + "\n")
+
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else None
+    if args.json:
+        print(json.dumps(current, indent=2))
+    else:
+        print_table(current, None if args.update_baseline else baseline)
+
+    if args.update_baseline:
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"\nBaseline written to {BASELINE_PATH.relative_to(ROOT)}")
+        return 0
+
+    if baseline is None:
+        print("\nNo baseline yet; run with --update-baseline to record one.")
+        return 0
+    if baseline["meta"]["bcrypt_rounds"] != current["meta"]["bcrypt_rounds"]:
+        print(
+            f"\nBaseline used bcrypt rounds {baseline['meta']['bcrypt_rounds']}, this run "
+            f"{current['meta']['bcrypt_rounds']}; login and register are not comparable."
+        )
+    failures = compare(current, baseline, args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if not failures:
+        print("\nWithin baseline.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+# File: benchmarks/json_codec.py
+"""
+JSON Encode/Decode Benchmark
+
+Compares the app's JSON provider (app/json_provider.py) on orjson with the same provider
+on the standard library, on payloads shaped like the API's responses:
+
+- ``status``: a one-key message, like most auth responses and error handlers.
+- ``user``: a profile with an ObjectId, datetimes and an embedded contact.
+- ``appointments``: a page of appointment rows (ObjectIds, datetimes, fees as Decimal).
+- ``analytics``: nested metric series of floats.
+
+Encoding goes through ``provider.response()`` (what ``jsonify`` does), decoding through
+``provider.loads()`` (what ``request.get_json()`` does).
+
+Usage:
+    python -m benchmarks.json_codec [--rows 500] [--min-time 0.5] [--json]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+
+from bson import ObjectId
+from flask import Flask
+
+import app.json_provider as json_provider
+from app.json_provider import FastJSONProvider
+
+
+def make_payloads(rows: int) -> dict:
+    rng = random.Random(7)
+    start = datetime(2025, 1, 1, tzinfo=UTC)
+    appointments = [
+        {
+            "id": ObjectId(),
+            "patient_id": ObjectId(),
+            "doctor_id": ObjectId(),
+            "appointment_time": start + timedelta(minutes=30 * i),
+            "appointment_status": rng.choice(["Scheduled", "Completed", "Cancelled"]),
+            "reason": "Follow-up consultation regarding recent lab results",
+            "fee": Decimal(rng.randrange(5_000, 20_000)) / 100,
+            "created_at": start,
+            "updated_at": start + timedelta(days=1),
+        }
+        for i in range(rows)
+    ]
+    analytics = {
+        "patient_id": ObjectId(),
+        "generated_by_model": "risk-model-v3",
+        "generated_at": start,
+        "metrics": {
+            name: [round(rng.uniform(50, 150), 2) for _ in range(rows)]
+            for name in ("heart_rate", "systolic", "diastolic", "glucose")
+        },
+        "prediction_results": {"risk": 0.27, "labels": ["hypertension", "diabetes"]},
+    }
+    user = {
+        "id": ObjectId(),
+        "email": "patient@example.com",
+        "role": "patient",
+        "first_name": "Pat",
+        "last_name": "Example",
+        "verified": True,
+        "created_at": start,
+        "updated_at": start,
+        "emergency_contact": {"name": "Kin", "relationship": "Sibling", "phone_number": "555"},
+    }
+    return {
+        "status": {"msg": "Login successful."},
+        "user": user,
+        "appointments": {"appointments": appointments, "total": rows},
+        "analytics": analytics,
+    }
+
+
+def _rate(fn, min_time: float) -> float:
+    """Calls per second of ``fn``, timed over at least ``min_time`` seconds."""
+    fn()  # warm up
+    calls, started = 0, time.perf_counter()
+    batch = 1
+    while True:
+        for _ in range(batch):
+            fn()
+        calls += batch
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            return calls / elapsed
+        batch *= 2
+
+
+def measure(provider, payloads: dict, min_time: float) -> dict:
+    results = {}
+    for name, payload in payloads.items():
+        body = provider.response(payload).get_data()
+        results[name] = {
+            "bytes": len(body),
+            "encode_per_s": _rate(lambda: provider.response(payload), min_time),
+            "decode_per_s": _rate(lambda: provider.loads(body), min_time),
+        }
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=500, help="Rows in list payloads.")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds per measurement.")
+    parser.add_argument("--json", action="store_true", help="Print the raw results as JSON.")
+    args = parser.parse_args(argv)
+
+    if json_provider.orjson is None:
+        print("orjson is not installed; nothing to compare.")
+        return 1
+
+    flask_app = Flask(__name__)  # the provider only keeps a weak reference
+    provider = FastJSONProvider(flask_app)
+    payloads = make_payloads(args.rows)
+    fast = measure(provider, payloads, args.min_time)
+    orjson, json_provider.orjson = json_provider.orjson, None
+    try:
+        stdlib = measure(provider, payloads, args.min_time)
+    finally:
+        json_provider.orjson = orjson
+
+    if args.json:
+        print(json.dumps({"orjson": fast, "stdlib": stdlib}, indent=2))
+        return 0
+    print(f"{'payload':<13}{'size':>10}  {'encode/s':>22}  {'decode/s':>22}")
+    print(f"{'':<13}{'':>10}  {'orjson':>10} {'stdlib':>10}  {'orjson':>10} {'stdlib':>10}")
+    for name in payloads:
+        f, s = fast[name], stdlib[name]
+        print(
+            f"{name:<13}{f['bytes']:>9}B  {f['encode_per_s']:>10.0f} {s['encode_per_s']:>10.0f}"
+            f"  {f['decode_per_s']:>10.0f} {s['decode_per_s']:>10.0f}"
+            f"   (x{f['encode_per_s'] / s['encode_per_s']:.1f} / "
+            f"x{f['decode_per_s'] / s['decode_per_s']:.1f})"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
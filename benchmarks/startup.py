@@ -0,0 +1,169 @@
+# File: benchmarks/startup.py
+"""
+Startup-Time Benchmark
+
+Measures what every gunicorn worker, populate script and test session pays before it can
+do any work:
+
+- ``python -X importtime`` for ``import app``, summarized per top-level package and as
+  the slowest modules by cumulative time.
+- Wall time of ``import app`` and of ``create_app()``, each in a fresh interpreter.
+
+Results are compared with benchmarks/baselines/startup.json; the run fails when a median
+exceeds its baseline by more than ``--tolerance``, and packages that were not imported at
+baseline time are listed so new heavy imports are easy to spot.
+
+Usage:
+    python -m benchmarks.startup                    # compare with the baseline
+    python -m benchmarks.startup --update-baseline  # record a new baseline
+
+Timings depend on the host; record the baseline on the machine that runs the comparison.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "startup.json"
+
+# Runs in a fresh interpreter and prints the two timings as JSON.
+TIMING_SNIPPET = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+timings = {"import_ms": imported - started, "create_app_ms": created - imported}
+print(json.dumps({key: seconds * 1000 for key, seconds in timings.items()}))
+"""
+
+
+def _environment() -> dict:
+    env = dict(os.environ)
+    # create_app() requires a URI; MongoEngine does not connect until the first query.
+    env.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    return env
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """Parse ``-X importtime`` output into (module, self_us, cumulative_us) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def import_breakdown(top: int = 15) -> dict:
+    """Import ``app`` once under ``-X importtime`` and summarize where the time went."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        env=_environment(),
+        check=True,
+    )
+    rows = parse_importtime(result.stderr)
+    packages = Counter()
+    for module, self_us, _ in rows:
+        packages[module.split(".")[0]] += self_us
+    slowest = sorted(rows, key=lambda row: row[2], reverse=True)[:top]
+    return {
+        "packages_ms": {name: round(us / 1000, 1) for name, us in packages.most_common()},
+        "slowest_ms": [(module, round(cumulative / 1000, 1)) for module, _, cumulative in slowest],
+    }
+
+
+def startup_timings(runs: int) -> dict:
+    """Median wall time of ``import app`` and ``create_app()`` over fresh interpreters."""
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", TIMING_SNIPPET],
+            capture_output=True,
+            text=True,
+            cwd=ROOT,
+            env=_environment(),
+            check=True,
+        )
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return {
+        key: round(statistics.median(sample[key] for sample in samples), 1)
+        for key in ("import_ms", "create_app_ms")
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return a message for every timing that regressed beyond ``tolerance``."""
+    failures = []
+    for key in ("import_ms", "create_app_ms"):
+        limit = baseline["timings"][key] * (1 + tolerance)
+        if current["timings"][key] > limit:
+            failures.append(
+                f"{key}: {current['timings'][key]:.1f} ms exceeds baseline "
+                f"{baseline['timings'][key]:.1f} ms by more than {tolerance:.0%}"
+            )
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=7, help="Fresh interpreters to time.")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run.")
+    parser.add_argument("--json", action="store_true", help="Print the raw results as JSON.")
+    args = parser.parse_args(argv)
+
+    current = {"timings": startup_timings(args.runs), **import_breakdown(args.top)}
+    if args.json:
+        print(json.dumps(current, indent=2))
+    else:
+        print(f"import app:   {current['timings']['import_ms']:8.1f} ms (median of {args.runs})")
+        print(f"create_app(): {current['timings']['create_app_ms']:8.1f} ms")
+        print("\nSelf import time by package:")
+        for name, ms in list(current["packages_ms"].items())[: args.top]:
+            print(f"  {ms:8.1f} ms  {name}")
+        print("\nSlowest modules (cumulative):")
+        for module, ms in current["slowest_ms"]:
+            print(f"  {ms:8.1f} ms  {module}")
+
+    if args.update_baseline:
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"\nBaseline written to {BASELINE_PATH.relative_to(ROOT)}")
+        return 0
+
+    if not BASELINE_PATH.exists():
+        print("\nNo baseline yet; run with --update-baseline to record one.")
+        return 0
+
+    baseline = json.loads(BASELINE_PATH.read_text())
+    new_packages = [
+        name
+        for name, ms in current["packages_ms"].items()
+        if name not in baseline["packages_ms"] and ms >= 1.0
+    ]
+    if new_packages:
+        print(f"\nPackages imported now but not at baseline: {', '.join(new_packages)}")
+    failures = compare(current, baseline, args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if not failures:
+        print("\nWithin baseline.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+# File: gunicorn.conf.py
+"""
+Gunicorn configuration (picked up automatically from the working directory, or with
+``gunicorn -c gunicorn.conf.py run:app``).
+
+The app is preloaded in the master so workers share its memory copy-on-write, and each
+worker re-creates its MongoDB client right after the fork (``post_fork``). Every setting
+can be overridden through the environment:
+
+- GUNICORN_BIND: Address to listen on (default 0.0.0.0:5000).
+- GUNICORN_WORKER_CLASS: "gthread" (default), "gevent" or "sync". With "gevent" the
+  standard library is monkey-patched here, before the app is loaded.
+- GUNICORN_WORKERS: Worker processes (default: one per CPU for gthread and gevent,
+  2 x CPU + 1 for sync).
+- GUNICORN_THREADS: Threads per gthread worker (default 4; keep MONGODB_MAX_POOL_SIZE >= this).
+- GUNICORN_WORKER_CONNECTIONS: Concurrent requests per gevent worker (default 1000; raise
+  MONGODB_MAX_POOL_SIZE and MONGODB_WAIT_QUEUE_TIMEOUT_MS to match the expected load).
+- GUNICORN_PRELOAD: Load the app once in the master before forking (default true).
+- GUNICORN_MAX_REQUESTS / GUNICORN_MAX_REQUESTS_JITTER: Recycle a worker after this many
+  requests, staggered so workers do not restart together (default 1000 / 100).
+- GUNICORN_TIMEOUT / GUNICORN_GRACEFUL_TIMEOUT / GUNICORN_KEEPALIVE: Seconds.
+- PASSWORD_HASH_WORKERS: bcrypt processes per worker (default: CPUs / workers, at least
+  1, so all workers together run about one hashing process per CPU).
+- PROMETHEUS_MULTIPROC_DIR: Where workers share metrics (default: a fresh directory per
+  master under /dev/shm or the temp dir).
+"""
+
+import os
+
+if os.getenv("GUNICORN_WORKER_CLASS") == "gevent":
+    # Patch before anything else imports socket, ssl or threading: with preload_app the
+    # master imports the app, and so pymongo's pools and locks, before workers fork.
+    from gevent import monkey
+
+    monkey.patch_all()
+
+import gc  # noqa: E402
+import shutil  # noqa: E402
+import tempfile  # noqa: E402
+
+
+def _cpu_count() -> int:
+    # CPUs this container may actually use, rather than every CPU on the host.
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ["true", "1", "yes"]
+
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class == "gthread":
+    workers = int(os.getenv("GUNICORN_WORKERS", _cpu_count()))
+    threads = int(os.getenv("GUNICORN_THREADS", 4))
+elif worker_class == "gevent":
+    # One process per CPU, each serving up to worker_connections requests concurrently.
+    workers = int(os.getenv("GUNICORN_WORKERS", _cpu_count()))
+    threads = 1
+    worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+else:
+    workers = int(os.getenv("GUNICORN_WORKERS", _cpu_count() * 2 + 1))
+    threads = 1
+
+# Each worker runs its own bcrypt pool; split the CPUs between them instead of giving
+# every worker one hashing process per CPU. Read by app/config.py, so set it before the
+# app is loaded.
+os.environ.setdefault("PASSWORD_HASH_WORKERS", str(max(1, _cpu_count() // workers)))
+# Lets the app warn when per-process state (a memory:// TTL store) is split across workers.
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+preload_app = _env_bool("GUNICORN_PRELOAD", "true")
+
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Worker heartbeat files on tmpfs; a disk-backed /tmp in containers can stall workers.
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+# Workers share Prometheus metrics through mmap files in this directory. It is set before
+# the app is loaded (prometheus_client reads it on import); unless given, it is a new
+# directory per master, removed again on exit.
+_own_metrics_dir = not os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+if _own_metrics_dir:
+    _tmp = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(_tmp, f"prometheus-{os.getpid()}")
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    """Master is up; with a preloaded app, freeze it out of the garbage collector."""
+    if server.cfg.preload_app:
+        # Objects created while loading the app are never collected, so the collector
+        # does not write to (and un-share) their pages in every forked worker.
+        gc.freeze()
+
+
+def on_exit(server):
+    if _own_metrics_dir:
+        shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges from the shared metrics."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    """Give each worker its own MongoDB client instead of the one inherited from the master."""
+    if not server.cfg.preload_app:
+        return  # the app (and its connection) is created inside the worker itself
+    from app.services.mongo import reconnect
+
+    reconnect(worker.app.wsgi())
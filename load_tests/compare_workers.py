@@ -0,0 +1,137 @@
+# File: load_tests/compare_workers.py
+"""
+Worker Class Comparison
+
+Starts the app under gunicorn once per worker class (sync, gthread, gevent by default),
+runs the same headless Locust workload against each, and prints throughput, latency and
+failures side by side.
+
+The app needs a reachable MongoDB (MONGODB_URI) seeded with the load test accounts; email
+and Google sign-in go to the stubs the locustfile starts (see load_tests/stubs.py):
+
+    python -m scripts.populate.create_users
+    python load_tests/compare_workers.py --users 500 --spawn-rate 50 --run-time 60s
+
+Every run uses the same number of worker processes (``--workers``) so the comparison shows
+how many concurrent connections each worker can carry, not how many processes there are.
+"""
+
+import argparse
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from load_tests.stubs import app_env  # noqa: E402
+
+LOCUSTFILE = Path(__file__).resolve().parent / "locustfile.py"
+STATUS_PATH = "/api/auth/status"
+
+
+def wait_until_ready(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f"Server did not become ready at {url}")
+
+
+def run_one(worker_class: str, args, port: int, out_dir: str) -> dict:
+    """Run the workload against one worker class and return its aggregated Locust stats."""
+    host = f"http://127.0.0.1:{port}"
+    env = dict(
+        os.environ,
+        **app_env(),
+        GUNICORN_WORKER_CLASS=worker_class,
+        GUNICORN_WORKERS=str(args.workers),
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        # Let workers live through the whole run.
+        GUNICORN_MAX_REQUESTS="0",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "run:app"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(host + STATUS_PATH)
+        prefix = os.path.join(out_dir, worker_class)
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "locust",
+                "-f",
+                str(LOCUSTFILE),
+                "--headless",
+                "--only-summary",
+                "--host",
+                host,
+                "--users",
+                str(args.users),
+                "--spawn-rate",
+                str(args.spawn_rate),
+                "--run-time",
+                args.run_time,
+                "--csv",
+                prefix,
+            ],
+            cwd=ROOT,
+            check=False,
+            stdout=subprocess.DEVNULL,
+        )
+        with open(f"{prefix}_stats.csv", newline="") as f:
+            rows = {row["Name"]: row for row in csv.DictReader(f)}
+        return rows["Aggregated"]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--classes", default="sync,gthread,gevent")
+    parser.add_argument("--workers", type=int, default=2, help="processes per run")
+    parser.add_argument("--users", type=int, default=200, help="concurrent Locust users")
+    parser.add_argument("--spawn-rate", type=float, default=20)
+    parser.add_argument("--run-time", default="60s")
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as out_dir:
+        for worker_class in args.classes.split(","):
+            print(f"Running {worker_class} ({args.workers} workers, {args.users} users)...")
+            results[worker_class] = run_one(worker_class, args, args.port, out_dir)
+
+    columns = [
+        ("Requests/s", "Requests/s"),
+        ("p50 ms", "50%"),
+        ("p95 ms", "95%"),
+        ("p99 ms", "99%"),
+        ("Requests", "Request Count"),
+        ("Failures", "Failure Count"),
+    ]
+    print()
+    print("| Worker | " + " | ".join(title for title, _ in columns) + " |")
+    print("|---" * (len(columns) + 1) + "|")
+    for worker_class, row in results.items():
+        values = [row.get(key, "") for _, key in columns]
+        print(f"| {worker_class} | " + " | ".join(str(value) for value in values) + " |")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,23 +2,69 @@
 """
 Locust Load Test for the Auth Endpoints
 
-This file defines load test scenarios for the authentication endpoints of your Flask application.
-It simulates user behavior by registering new users concurrently.
+Simulates the production traffic mix against seeded accounts:
 
-Key features:
-- Inherits from HttpUser to simulate HTTP requests.
-- The host is configurable (default: http://localhost:5000).
-- Uses the `@task` decorator to mark the registration flow as a task.
-- The registration payload is dynamically modified to avoid duplicate user email issues.
+- Patients, doctors and admins (weighted 10:3:1) log in with the load test accounts
+  created by ``scripts/populate/create_users.py`` (``patient00000@loadtest.example.com``,
+  ...); every fourth account has 2FA enabled and completes ``/verify-2fa`` with the code
+  read from the stub mailbox. Each simulated user holds its own account for its lifetime,
+  so no two users overwrite each other's 2FA code; a user for whom no account is left
+  stops, and the run fails (seed more with LOAD_TEST_ACCOUNTS).
+- Once logged in, users mostly refresh their access token, occasionally log in again,
+  request a password reset or start a Google sign-in, and patients now and then register.
+  Admins also read ``role_required`` endpoints (``/api/admin/profiles``). Task weights
+  approximate production, where token refreshes far outnumber logins and resets; retune
+  them from the access logs when the mix changes.
+- SMTP and Google's OpenID endpoints are replaced by local stubs (load_tests/stubs.py)
+  started in this process, so the run needs no network. Start the app with the settings
+  from ``stubs.app_env`` (``python load_tests/stubs.py`` prints them).
 
-To run this load test, install locust (pip install locust) and run:
-    locust -f locustfile.py
+Headless runs enforce service level objectives: the process exits with 1 if the p95
+response time exceeds ``--slo-p95-ms`` or the failure ratio exceeds ``--slo-error-rate``,
+and with 0 otherwise (failures below the SLO do not fail the run).
+
+Seed the database, start the app, then run:
+    python -m scripts.populate.create_users
+    locust -f load_tests/locustfile.py --headless -u 200 -r 20 -t 5m \\
+        --host http://localhost:5000 --slo-p95-ms 500 --slo-error-rate 0.01
+
+The stubs and the 2FA mailbox live in this process, so run Locust without ``--master``/
+``--worker``, or pass ``--no-stubs`` (2FA accounts are then skipped).
 """
 
+import itertools
+import logging
 import random
 import string
+import sys
+import time
+from pathlib import Path
+
+from locust import HttpUser, between, events, task
+from locust.exception import StopUser
+from locust.runners import WorkerRunner
+
+# Account conventions and stubs are shared with the repository's scripts.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from load_tests.stubs import OIDC_PORT, SMTP_PORT, OIDCStub, SMTPSink, start  # noqa: E402
+from scripts.populate.utils import (  # noqa: E402
+    DEFAULT_PASSWORD,
+    LOAD_TEST_ACCOUNTS,
+    load_test_email,
+    load_test_two_factor,
+)
 
-from locust import HttpUser, between, task
+logger = logging.getLogger(__name__)
+
+OTP_PATTERN = r"code is: (\d{6})"
+# Set by the init hook when the stubs run in this process.
+mailbox = None
+# Next unused account index per role, and accounts handed back by stopped users.
+_account_counters = {role: itertools.count() for role in LOAD_TEST_ACCOUNTS}
+_released_accounts = {role: [] for role in LOAD_TEST_ACCOUNTS}
+# Users that found no free account, per role (reported as an SLO violation).
+_users_without_account = {role: 0 for role in LOAD_TEST_ACCOUNTS}
 
 
 def random_email():
@@ -33,13 +79,229 @@ def random_string(length=10):
     return "".join(random.choices(string.ascii_letters, k=length))
 
 
-class AuthLoadTest(HttpUser):
+def next_account(role: str) -> tuple[str, bool] | None:
+    """
+    An unused seeded account of ``role`` as (email, has 2FA), skipping 2FA accounts
+    without a mailbox, or None once every account is taken.
+    """
+    if _released_accounts[role]:
+        return _released_accounts[role].pop()
+    for index in _account_counters[role]:
+        if index >= LOAD_TEST_ACCOUNTS[role]:
+            return None
+        two_factor = load_test_two_factor(index)
+        if mailbox is not None or not two_factor:
+            return load_test_email(role, index), two_factor
+
+
+def release_account(role: str, account: tuple[str, bool]) -> None:
+    """Hand an account back when its user stops (e.g. when the user count is lowered)."""
+    _released_accounts[role].append(account)
+
+
+@events.init_command_line_parser.add_listener
+def add_arguments(parser):
+    parser.add_argument(
+        "--slo-p95-ms",
+        type=float,
+        default=500.0,
+        env_var="LOCUST_SLO_P95_MS",
+        help="Fail the run if the overall p95 response time exceeds this (ms).",
+    )
+    parser.add_argument(
+        "--slo-error-rate",
+        type=float,
+        default=0.01,
+        env_var="LOCUST_SLO_ERROR_RATE",
+        help="Fail the run if the ratio of failed requests exceeds this.",
+    )
+    parser.add_argument(
+        "--no-stubs",
+        action="store_true",
+        default=False,
+        help="Do not start the SMTP and OpenID stubs (2FA accounts are skipped).",
+    )
+    parser.add_argument("--smtp-stub-port", type=int, default=SMTP_PORT)
+    parser.add_argument("--oidc-stub-port", type=int, default=OIDC_PORT)
+    parser.add_argument(
+        "--otp-timeout",
+        type=float,
+        default=10.0,
+        help="Seconds to wait for a 2FA email before counting the login as failed.",
+    )
+
+
+@events.init.add_listener
+def start_stubs(environment, **kwargs):
+    global mailbox
+    options = environment.parsed_options
+    if options is None or options.no_stubs or isinstance(environment.runner, WorkerRunner):
+        return
+    sink = SMTPSink(options.smtp_stub_port)
+    start(sink)
+    start(OIDCStub(options.oidc_stub_port))
+    mailbox = sink.mailbox
+    logger.info(
+        "SMTP stub on :%d, OpenID stub on :%d", options.smtp_stub_port, options.oidc_stub_port
+    )
+
+
+@events.quitting.add_listener
+def check_slos(environment, **kwargs):
+    """Set the exit code from the SLOs instead of from the mere presence of failures."""
+    options = environment.parsed_options
+    if options is None or isinstance(environment.runner, WorkerRunner):
+        return
+    total = environment.stats.total
+    if total.num_requests == 0:
+        logger.error("SLO check failed: no requests were made.")
+        environment.process_exit_code = 1
+        return
+
+    p95 = total.get_response_time_percentile(0.95)
+    violations = []
+    if p95 > options.slo_p95_ms:
+        slowest = max(
+            environment.stats.entries.values(),
+            key=lambda entry: entry.get_response_time_percentile(0.95),
+        )
+        violations.append(
+            f"p95 {p95:.0f} ms > {options.slo_p95_ms:.0f} ms "
+            f"(slowest: {slowest.method} {slowest.name} "
+            f"at {slowest.get_response_time_percentile(0.95):.0f} ms)"
+        )
+    if total.fail_ratio > options.slo_error_rate:
+        violations.append(f"error rate {total.fail_ratio:.2%} > {options.slo_error_rate:.2%}")
+    for role, missing in _users_without_account.items():
+        if missing:
+            violations.append(
+                f"{missing} {role} user(s) had no seeded account of their own "
+                f"(LOAD_TEST_ACCOUNTS[{role!r}] = {LOAD_TEST_ACCOUNTS[role]})"
+            )
+
+    if violations:
+        logger.error("SLO check failed: %s", "; ".join(violations))
+        environment.process_exit_code = 1
+    else:
+        logger.info(
+            "SLOs met: p95 %.0f ms, error rate %.2f%% over %d requests",
+            p95,
+            total.fail_ratio * 100,
+            total.num_requests,
+        )
+        environment.process_exit_code = 0
+
+
+class AuthenticatedUser(HttpUser):
+    """A user logged in with one of the seeded accounts of ``role``."""
+
+    abstract = True
+    role = "patient"
     # The host URL of the Flask application under test; adjust as needed.
     host = "http://localhost:5000"
     # Wait time between tasks to simulate real user behavior.
     wait_time = between(1, 3)
 
-    @task
+    def on_start(self):
+        self.account = next_account(self.role)
+        if self.account is None:
+            _users_without_account[self.role] += 1
+            logger.error(
+                "No free %s account; users sharing one would overwrite each other's 2FA "
+                "codes. Raise LOAD_TEST_ACCOUNTS and reseed.",
+                self.role,
+            )
+            raise StopUser()
+        self.email, self.two_factor = self.account
+        self.access_token = self.refresh_token = None
+        self.login()
+
+    def on_stop(self):
+        if getattr(self, "account", None) is not None:
+            release_account(self.role, self.account)
+            self.account = None
+
+    def auth_header(self, token):
+        return {"Authorization": f"Bearer {token}"}
+
+    def login(self):
+        """Log in, completing 2FA with the code from the stub mailbox when required."""
+        payload = {"email": self.email, "password": DEFAULT_PASSWORD}
+        with self.client.post("/api/auth/login", json=payload, catch_response=True) as response:
+            if response.status_code != 200:
+                response.failure(f"login returned {response.status_code}")
+                return False
+            body = response.json()
+            if "access_token" in body:
+                self.access_token, self.refresh_token = body["access_token"], body["refresh_token"]
+                return True
+            if not self.two_factor:
+                response.failure("unexpected 2FA challenge")
+                return False
+        return self.verify_2fa()
+
+    def verify_2fa(self):
+        started = time.perf_counter()
+        otp = mailbox.wait_for(self.email, OTP_PATTERN, self.environment.parsed_options.otp_timeout)
+        # Email delivery time is reported as its own entry, so slow outbox delivery shows up.
+        self.environment.events.request.fire(
+            request_type="SMTP",
+            name="2FA email",
+            response_time=(time.perf_counter() - started) * 1000,
+            response_length=0,
+            exception=None if otp else TimeoutError("no 2FA email received"),
+            context={},
+        )
+        if otp is None:
+            return False
+        with self.client.post(
+            "/api/auth/verify-2fa", json={"email": self.email, "otp": otp}, catch_response=True
+        ) as response:
+            if response.status_code != 200:
+                response.failure(f"verify-2fa returned {response.status_code}")
+                return False
+            body = response.json()
+            self.access_token, self.refresh_token = body["access_token"], body["refresh_token"]
+        return True
+
+    @task(8)
+    def refresh(self):
+        """Renew the access token, as clients do every few minutes."""
+        if not self.refresh_token and not self.login():
+            return
+        with self.client.post(
+            "/api/auth/token/refresh",
+            headers=self.auth_header(self.refresh_token),
+            catch_response=True,
+        ) as response:
+            if response.status_code == 200:
+                self.access_token = response.json()["access_token"]
+            else:
+                response.failure(f"refresh returned {response.status_code}")
+                self.refresh_token = None
+
+    @task(3)
+    def relogin(self):
+        self.login()
+
+    @task(1)
+    def request_password_reset(self):
+        self.client.post("/api/auth/password-reset-request", json={"email": self.email})
+
+    @task(1)
+    def start_google_sign_in(self):
+        with self.client.get(
+            "/api/auth/oauth/google", allow_redirects=False, catch_response=True
+        ) as response:
+            if response.status_code != 302:
+                response.failure(f"expected a redirect, got {response.status_code}")
+
+
+class PatientUser(AuthenticatedUser):
+    weight = 10
+    role = "patient"
+
+    @task(1)
     def register_user(self):
         """Simulate a user registration flow by POSTing to /api/auth/register/patient."""
         payload = {
@@ -55,8 +317,35 @@ class AuthLoadTest(HttpUser):
                 "phone_number": "3334445555",
             },
         }
-        # POST request to the registration endpoint.
-        response = self.client.post("/api/auth/register/patient", json=payload)
-        # Optional: Log the result for debugging.
-        if response.status_code != 201:
-            print(f"Registration failed: {response.status_code}, {response.text}")
+        with self.client.post(
+            "/api/auth/register/patient", json=payload, catch_response=True
+        ) as response:
+            if response.status_code != 201:
+                response.failure(f"registration returned {response.status_code}")
+
+
+class DoctorUser(AuthenticatedUser):
+    weight = 3
+    role = "doctor"
+
+
+class AdminUser(AuthenticatedUser):
+    weight = 1
+    role = "admin"
+
+    @task(6)
+    def list_profiles(self):
+        """Read a ``role_required("admin")`` endpoint with the access token."""
+        if not self.access_token and not self.login():
+            return
+        with self.client.get(
+            "/api/admin/profiles?limit=10",
+            headers=self.auth_header(self.access_token),
+            name="/api/admin/profiles",
+            catch_response=True,
+        ) as response:
+            if response.status_code == 401:
+                response.failure("access token rejected")
+                self.access_token = None
+            elif response.status_code != 200:
+                response.failure(f"profiles returned {response.status_code}")
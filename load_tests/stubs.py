@@ -0,0 +1,242 @@
+# File: load_tests/stubs.py
+"""
+Local Stand-ins for External Services
+
+Lets the Locust workload run fully offline:
+
+- ``SMTPSink``: accepts every message the app sends (2FA codes, password reset links)
+  and keeps the latest ones per recipient in a ``Mailbox``, so simulated users can read
+  their 2FA code instead of it going to a real inbox.
+- ``OIDCStub``: serves an OpenID discovery document and an empty JWKS in place of
+  Google's, so the app's OAuth client and metadata cache never reach the internet.
+
+The locustfile starts both in its own process. ``app_env`` gives the settings that point
+the app under test at them, share 2FA codes between its workers through a SQLite TTL
+store, and turn off the per-IP rate limits, which would otherwise throttle every
+simulated user sharing the load generator's address.
+
+To run the stubs on their own (e.g. against a server started by hand):
+
+    python load_tests/stubs.py --smtp-port 2525 --oidc-port 8025
+"""
+
+import argparse
+import email
+import email.policy
+import json
+import os
+import re
+import socketserver
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SMTP_PORT = 2525
+OIDC_PORT = 8025
+# Messages kept per recipient; older ones are dropped.
+MAILBOX_DEPTH = 20
+
+_ADDRESS = re.compile(r"<([^>]*)>")
+
+
+def app_env(smtp_port: int = SMTP_PORT, oidc_port: int = OIDC_PORT) -> dict:
+    """Environment for the app under test: stub services, shared TTL store, no rate limiting."""
+    return {
+        "MAIL_SERVER": "127.0.0.1",
+        "MAIL_PORT": str(smtp_port),
+        "MAIL_USE_TLS": "false",
+        "MAIL_USE_SSL": "false",
+        "MAIL_USERNAME": "",
+        "MAIL_PASSWORD": "",
+        "MAIL_DEFAULT_SENDER": "noreply@loadtest.example.com",
+        "GOOGLE_CLIENT_ID": "loadtest-client",
+        "GOOGLE_CLIENT_SECRET": "loadtest-secret",
+        "GOOGLE_SERVER_METADATA_URL": (
+            f"http://127.0.0.1:{oidc_port}/.well-known/openid-configuration"
+        ),
+        # With several workers a 2FA code must be readable by whichever one serves /verify-2fa.
+        "TTL_STORE_URL": "sqlite:///" + os.path.join(tempfile.gettempdir(), "loadtest-ttl.db"),
+        "RATE_LIMIT_ENABLED": "false",
+    }
+
+
+class Mailbox:
+    """Messages received by the SMTP sink, by recipient."""
+
+    def __init__(self, depth: int = MAILBOX_DEPTH):
+        self._messages = defaultdict(lambda: deque(maxlen=depth))
+        self._changed = threading.Condition()
+        self.received = 0
+
+    def deliver(self, recipients: list[str], subject: str, body: str) -> None:
+        with self._changed:
+            for recipient in recipients:
+                self._messages[recipient.lower()].append((subject, body))
+            self.received += 1
+            self._changed.notify_all()
+
+    def wait_for(self, recipient: str, pattern: str, timeout: float = 10.0) -> str | None:
+        """
+        Wait for a message to ``recipient`` whose body matches ``pattern`` and take it out
+        of the mailbox.
+
+        Returns:
+            str | None: The first group of the match (the whole match without groups), or
+            None if no such message arrived within ``timeout`` seconds.
+        """
+        regex = re.compile(pattern)
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                messages = self._messages[recipient.lower()]
+                for message in reversed(messages):
+                    match = regex.search(message[1])
+                    if match:
+                        messages.remove(message)
+                        return match.group(1) if regex.groups else match.group(0)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._changed.wait(remaining)
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough of SMTP for smtplib: EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT."""
+
+    def handle(self):
+        self._reply("220 loadtest SMTP sink ready")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command[:4].upper()
+            if verb == "EHLO":
+                self._reply("250-loadtest", "250-8BITMIME", "250 SMTPUTF8")
+            elif verb in ("HELO", "NOOP"):
+                self._reply("250 OK")
+            elif verb in ("MAIL", "RSET"):
+                recipients = []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                match = _ADDRESS.search(command)
+                recipients.append(match.group(1) if match else command.split(":", 1)[-1])
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                self._receive(recipients)
+                recipients = []
+                self._reply("250 OK: queued")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+    def _receive(self, recipients: list[str]):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            lines.append(line[1:] if line.startswith(b"..") else line)
+        message = email.message_from_bytes(b"".join(lines), policy=email.policy.default)
+        body = message.get_body(preferencelist=("plain", "html"))
+        self.server.mailbox.deliver(
+            recipients, message.get("Subject", ""), body.get_content() if body else ""
+        )
+
+    def _reply(self, *lines: str):
+        self.wfile.write("".join(f"{line}\r\n" for line in lines).encode())
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """SMTP server that never delivers, only records messages in ``mailbox``."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int = SMTP_PORT, host: str = "127.0.0.1"):
+        self.mailbox = Mailbox()
+        super().__init__((host, port), _SMTPHandler)
+
+
+class _OIDCHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        base = f"http://{self.headers.get('Host', '127.0.0.1')}"
+        path = self.path.split("?", 1)[0]
+        if path == "/.well-known/openid-configuration":
+            self._json(
+                {
+                    "issuer": base,
+                    "authorization_endpoint": f"{base}/authorize",
+                    "token_endpoint": f"{base}/token",
+                    "userinfo_endpoint": f"{base}/userinfo",
+                    "jwks_uri": f"{base}/jwks",
+                    "response_types_supported": ["code"],
+                    "subject_types_supported": ["public"],
+                    "id_token_signing_alg_values_supported": ["RS256"],
+                    "scopes_supported": ["openid", "email", "profile"],
+                }
+            )
+        elif path == "/jwks":
+            self._json({"keys": []})
+        elif path == "/authorize":
+            self._json({"msg": "Sign-in page stub."})
+        else:
+            self.send_error(404)
+
+    def _json(self, document: dict):
+        body = json.dumps(document).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # one line per request would drown the Locust output
+
+
+class OIDCStub(ThreadingHTTPServer):
+    """OpenID provider stub serving discovery metadata and an empty key set."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int = OIDC_PORT, host: str = "127.0.0.1"):
+        super().__init__((host, port), _OIDCHandler)
+
+
+def start(server) -> threading.Thread:
+    """Serve ``server`` on a daemon thread (a greenlet under Locust)."""
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the SMTP and OAuth stubs.")
+    parser.add_argument("--smtp-port", type=int, default=SMTP_PORT)
+    parser.add_argument("--oidc-port", type=int, default=OIDC_PORT)
+    args = parser.parse_args(argv)
+
+    sink, oidc = SMTPSink(args.smtp_port), OIDCStub(args.oidc_port)
+    start(sink)
+    start(oidc)
+    print("Stubs running. Start the app with:")
+    for key, value in app_env(args.smtp_port, args.oidc_port).items():
+        print(f"  export {key}={value}")
+    try:
+        while True:
+            time.sleep(60)
+            print(f"{sink.mailbox.received} messages received")
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
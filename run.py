@@ -1,11 +1,15 @@
-import logging
+import os
 
-from dotenv import load_dotenv  # ✅ Add this
+if os.getenv("GUNICORN_WORKER_CLASS") == "gevent":
+    # Must run before the app (and pymongo, smtplib, requests) import socket or threading.
+    from gevent import monkey
 
-from app import create_app
+    monkey.patch_all()
 
-load_dotenv()  # ✅ Load .env before create_app()
+import logging  # noqa: E402
 
+# app.config loads .env on import
+from app import create_app  # noqa: E402
 
 logger = logging.getLogger(__name__)
 
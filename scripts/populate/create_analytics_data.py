@@ -2,15 +2,10 @@
 import random
 from datetime import UTC, datetime
 
-from dotenv import load_dotenv
-
 from app import create_app
 from app.models.analytics_data import AnalyticsData
 from app.models.user import User
 
-# ✅ Load environment variables before importing the app
-load_dotenv()  # Must be called before create_app()
-
 app = create_app()
 
 
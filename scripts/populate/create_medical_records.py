@@ -2,16 +2,11 @@
 import random
 from datetime import UTC, datetime
 
-from dotenv import load_dotenv
-
 from app import create_app
 from app.models.medical_record import MedicalRecord
 from app.models.user import User
 from scripts.populate.utils import generate_hash, https_url
 
-# ✅ Load environment variables before importing the app
-load_dotenv()  # Must be called before create_app()
-
 app = create_app()
 
 
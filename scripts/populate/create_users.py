@@ -4,93 +4,249 @@
 Creates fake users (doctors and patients) for the AH-AIHMS backend.
 
 Features:
-- 10 fake doctors and 50 patients
-- Securely hashed passwords using bcrypt
-- Realistic user details via Faker
+- Any number of doctors and patients (--doctors, --patients; default 20 and 200)
+- Securely hashed passwords using bcrypt (cost from BCRYPT_ROUNDS; use 4 for fast seeding)
+- Optionally a small pool of precomputed hashes shared by all users (--reuse-hashes),
+  for load test data where hashing millions of passwords is not worth the time
+- Realistic user details via Faker, reproducible per chunk
 - Randomized 2FA flags
 - Mixed patient insurance and doctor-only fields
+- Load test accounts with predictable emails and 2FA flags (see LOAD_TEST_ACCOUNTS)
+- Progress and throughput reporting
+
+Users are built and hashed in chunks (--chunk-size) on a process pool (--workers), since
+both Faker and bcrypt are CPU-bound; the main process inserts each finished chunk with
+one ``insert_many``. Only a few chunks are in flight at a time, so memory stays flat
+however many users are created.
+
+Usage:
+    python -m scripts.populate.create_users
+    BCRYPT_ROUNDS=4 python -m scripts.populate.create_users --patients 1000000 \\
+        --doctors 50000 --reuse-hashes 64
 """
 
+import argparse
+import os
 import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import bcrypt
-from dotenv import load_dotenv
+from pymongo.errors import BulkWriteError
 
 from app import create_app
 from app.models.user import User
 from scripts.populate.utils import (
+    DEFAULT_PASSWORD,
+    LOAD_TEST_ACCOUNTS,
     fake,
     generate_emergency_contact,
     generate_insurance_info,
+    load_test_email,
+    load_test_two_factor,
 )
 
-# Load environment variables early
-load_dotenv()
-
-
 # Constants
 NUM_PATIENTS = 200
 NUM_DOCTORS = 20
-DEFAULT_PASSWORD = "TestPassword123!"  # password used for all fake users
+CHUNK_SIZE = 1000
+# Seconds between progress lines.
+PROGRESS_INTERVAL = 5.0
+# Chunk seeds are offset per kind, so doctors and patients never share Faker sequences.
+KINDS = ("doctor", "patient", "load_test")
 
 # Initialize Flask app context
 app = create_app()
 
 
-def create_users():
-    """
-    Seeds the database with fake users (doctors + patients),
-    each with secure hashed passwords and complete profile details.
-    """
-    with app.app_context():
-        print("🌱 Starting user creation...")
+def hash_password(rounds):
+    return bcrypt.hashpw(DEFAULT_PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds=rounds)).decode(
+        "utf-8"
+    )
 
-        # Optional: Drop existing users
-        User.drop_collection()
-        users = []
 
-        for _ in range(NUM_DOCTORS):
-            hashed = bcrypt.hashpw(DEFAULT_PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode(
-                "utf-8"
-            )
-            user = User(
-                email=fake.unique.email(),
-                password_hash=hashed,
-                role="doctor",
-                first_name=fake.first_name(),
-                last_name=fake.last_name(),
-                phone_number=fake.phone_number(),
-                address=fake.address(),
-                emergency_contact=generate_emergency_contact(),
-                verified=True,
-                two_factor_enabled=random.choice([True, False]),
-            )
-            users.append(user)
+def fake_user(role, index):
+    """A fake user of ``role``; the index in its email keeps it unique."""
+    user = User(
+        email=f"{fake.user_name()}.{role[0]}{index}@{fake.free_email_domain()}",
+        role=role,
+        first_name=fake.first_name(),
+        last_name=fake.last_name(),
+        phone_number=fake.phone_number(),
+        address=fake.address(),
+        emergency_contact=generate_emergency_contact(),
+        verified=True,
+        two_factor_enabled=random.choice([True, False]),
+    )
+    if role == "patient":
+        user.insurance_info = generate_insurance_info()
+    return user
 
-        for _ in range(NUM_PATIENTS):
-            hashed = bcrypt.hashpw(DEFAULT_PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode(
-                "utf-8"
-            )
-            user = User(
-                email=fake.unique.email(),
-                password_hash=hashed,
-                role="patient",
-                first_name=fake.first_name(),
-                last_name=fake.last_name(),
+
+def load_test_user(index):
+    """
+    One of the accounts the Locust workload logs in with: LOAD_TEST_ACCOUNTS per role,
+    verified, with 2FA on every LOAD_TEST_2FA_EVERY-th account.
+    """
+    offset = 0
+    for role, count in LOAD_TEST_ACCOUNTS.items():
+        if index < offset + count:
+            number = index - offset
+            return User(
+                email=load_test_email(role, number),
+                role=role,
+                first_name="Load",
+                last_name=f"{role.title()} {number}",
                 phone_number=fake.phone_number(),
                 address=fake.address(),
                 emergency_contact=generate_emergency_contact(),
-                insurance_info=generate_insurance_info(),
                 verified=True,
-                two_factor_enabled=random.choice([True, False]),
+                two_factor_enabled=load_test_two_factor(number),
             )
-            users.append(user)
+        offset += count
+    raise IndexError(index)
 
-        # Bulk insert users
-        User.objects.insert(users, load_bulk=False)
-        print(f"✅ Created {NUM_DOCTORS} doctors and {NUM_PATIENTS} patients.")
+
+def build_chunk(kind, start, count, rounds, shared_hashes):
+    """
+    Builds users ``start`` to ``start + count`` of ``kind`` as insert-ready documents.
+    Runs on a pool process; passwords are hashed here unless ``shared_hashes`` is given.
+    """
+    seed = KINDS.index(kind) * 1_000_000_000 + start
+    fake.seed_instance(seed)
+    random.seed(seed)
+    documents = []
+    for index in range(start, start + count):
+        user = load_test_user(index) if kind == "load_test" else fake_user(kind, index)
+        if shared_hashes:
+            user.password_hash = shared_hashes[index % len(shared_hashes)]
+        else:
+            user.password_hash = hash_password(rounds)
+        documents.append(user.to_mongo().to_dict())
+    return documents
+
+
+def chunks(counts, chunk_size):
+    """(kind, start, count) for every chunk, in insertion order."""
+    for kind, total in counts.items():
+        for start in range(0, total, chunk_size):
+            yield kind, start, min(chunk_size, total - start)
+
+
+class Progress:
+    """Prints created users, throughput and time left at most every PROGRESS_INTERVAL."""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.started = self.reported = time.perf_counter()
+
+    @property
+    def rate(self):
+        return self.done / max(time.perf_counter() - self.started, 1e-9)
+
+    def update(self, count):
+        self.done += count
+        now = time.perf_counter()
+        if now - self.reported < PROGRESS_INTERVAL and self.done < self.total:
+            return
+        self.reported = now
+        left = (self.total - self.done) / self.rate if self.done else 0
+        print(f"   {self.done:,}/{self.total:,} users, {self.rate:,.0f}/s, ~{left:,.0f}s left")
+
+
+def insert_chunk(documents):
+    """Inserts one chunk; returns how many were skipped as duplicates (e.g. with --append)."""
+    try:
+        User._get_collection().insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        return len(e.details.get("writeErrors", []))
+    return 0
+
+
+def create_users(
+    patients=NUM_PATIENTS,
+    doctors=NUM_DOCTORS,
+    chunk_size=CHUNK_SIZE,
+    reuse_hashes=0,
+    workers=None,
+    append=False,
+):
+    """
+    Seeds the database with fake users (doctors + patients) and the load test accounts,
+    each with a hashed password and complete profile details.
+    """
+    workers = workers or os.cpu_count() or 1
+    rounds = app.config["BCRYPT_ROUNDS"]
+    counts = {"doctor": doctors, "patient": patients, "load_test": sum(LOAD_TEST_ACCOUNTS.values())}
+    total = sum(counts.values())
+    with app.app_context():
+        print("🌱 Starting user creation...")
+        if not append:
+            User.drop_collection()
+        User.ensure_indexes()
+
+        mode = f"{reuse_hashes} shared hashes" if reuse_hashes else "one hash per user"
+        print(
+            f"   {total:,} users, {mode}, {workers} processes, bcrypt rounds {rounds}, "
+            f"chunks of {chunk_size:,}"
+        )
+        progress = Progress(total)
+        skipped = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shared = list(pool.map(hash_password, [rounds] * reuse_hashes))
+            # Keep every process busy while the oldest chunk is inserted, no more.
+            pending = deque()
+            for kind, start, count in chunks(counts, chunk_size):
+                pending.append(pool.submit(build_chunk, kind, start, count, rounds, shared))
+                if len(pending) >= workers * 2:
+                    documents = pending.popleft().result()
+                    skipped += insert_chunk(documents)
+                    progress.update(len(documents))
+            while pending:
+                documents = pending.popleft().result()
+                skipped += insert_chunk(documents)
+                progress.update(len(documents))
+
+        print(
+            f"✅ Created {total - skipped:,} users ({doctors:,} doctors, {patients:,} patients, "
+            f"{counts['load_test']:,} load test accounts) in "
+            f"{time.perf_counter() - progress.started:,.1f}s ({progress.rate:,.0f} users/s)."
+        )
+        if skipped:
+            print(f"⚠️ Skipped {skipped:,} users whose email already existed.")
         print(f"🔐 Default password for all users: '{DEFAULT_PASSWORD}'")
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Seed fake doctors and patients.")
+    parser.add_argument("--patients", type=int, default=NUM_PATIENTS)
+    parser.add_argument("--doctors", type=int, default=NUM_DOCTORS)
+    parser.add_argument(
+        "--chunk-size", type=int, default=CHUNK_SIZE, help="Users per insert_many call."
+    )
+    parser.add_argument(
+        "--reuse-hashes",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Hash N passwords and share them between all users (test data only).",
+    )
+    parser.add_argument("--workers", type=int, help="Processes (default: CPU count).")
+    parser.add_argument(
+        "--append", action="store_true", help="Keep existing users instead of dropping them."
+    )
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    create_users()
+    args = parse_args()
+    create_users(
+        patients=args.patients,
+        doctors=args.doctors,
+        chunk_size=args.chunk_size,
+        reuse_hashes=args.reuse_hashes,
+        workers=args.workers,
+        append=args.append,
+    )
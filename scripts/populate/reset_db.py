@@ -12,15 +12,9 @@ Usage:
 """
 
 
-from dotenv import load_dotenv
-
-from app import create_app  # after .env is loaded
+from app import create_app  # app.config loads .env on import
 from app.models import AnalyticsData, Appointment, MedicalRecord, User
 
-# ✅ Load environment variables before importing the app
-load_dotenv()  # Must be called before create_app()
-
-
 # ✅ Create the Flask app after .env is loaded
 app = create_app()
 
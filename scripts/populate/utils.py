@@ -6,6 +6,17 @@ from faker import Faker
 
 fake = Faker()
 
+DEFAULT_PASSWORD = "TestPassword123!"  # password used for all fake users
+
+# Accounts with predictable emails for the Locust workload (load_tests/locustfile.py),
+# e.g. patient00000@loadtest.example.com; all use DEFAULT_PASSWORD. Every simulated user
+# needs an account of its own, so at the locustfile's 10:3:1 weighting these cover up to
+# 1,400 concurrent users (1,050 with --no-stubs, which skips the 2FA accounts).
+LOAD_TEST_DOMAIN = "loadtest.example.com"
+LOAD_TEST_ACCOUNTS = {"patient": 1000, "doctor": 300, "admin": 100}
+# Every Nth load test account has 2FA enabled.
+LOAD_TEST_2FA_EVERY = 4
+
 
 def generate_emergency_contact():
     return {
@@ -31,3 +42,11 @@ def generate_hash():
 
 def https_url(path="records/record.pdf"):
     return f"https://storage.fakehealth.org/{fake.uuid4()}/{path}"
+
+
+def load_test_email(role, index):
+    return f"{role}{index:05d}@{LOAD_TEST_DOMAIN}"
+
+
+def load_test_two_factor(index):
+    return index % LOAD_TEST_2FA_EVERY == 0
@@ -15,15 +15,16 @@ import pytest
 from mongoengine import connect, connection, disconnect
 
 from app import create_app
+from app.extensions import ttl_store, user_cache
 
 # Import the User model and related classes for use in factory fixtures.
 from app.models.user import EmergencyContact, User
 
 
-@pytest.fixture(scope="session")
-def app():
+def make_test_app():
     """
-    Creates and returns a Flask application instance configured for testing.
+    Creates a Flask application instance configured for testing (also used by the
+    benchmarks in benchmarks/hot_paths.py).
 
     The application configuration is loaded from app.config.Config,
     and the TESTING flag is set to True to enable error propagation and disable exception catching.
@@ -33,21 +34,18 @@ def app():
     """
     test_app = create_app()
     test_app.config["TESTING"] = True
+    # Hash passwords on a thread pool so tests do not fork worker processes.
+    test_app.config["PASSWORD_HASH_EXECUTOR"] = "thread"
+    # Minimal bcrypt cost keeps hashing in tests fast.
+    test_app.config["BCRYPT_ROUNDS"] = 4
+    # Send email synchronously; tests patch send_email or exercise the outbox directly.
+    test_app.config["MAIL_OUTBOX_ASYNC"] = False
     return test_app
 
 
-@pytest.fixture(scope="function")
-def db():
+def connect_test_db():
     """
-    Sets up a brand-new in-memory MongoDB database using mongomock for every test function.
-
-    This fixture ensures each test has an isolated database environment,
-    preventing collisions with the global (default) connection created by the application.
-
-    Yields:
-        None: The database connection is available in the background.
-
-    Finally, the MongoDB connection is disconnected to start fresh for the next test.
+    Replaces the default MongoEngine connection with a fresh in-memory mongomock database.
     """
     # Disconnect existing connection if registered to avoid conflicts.
     if "default" in connection._connections:
@@ -60,6 +58,35 @@ def db():
         mongo_client_class=mongomock.MongoClient,
         uuidRepresentation="standard",  # Resolves DeprecationWarning in MongoEngine
     )
+    # Cached users from a previous test's database must not leak into this one.
+    user_cache.clear()
+
+
+@pytest.fixture(scope="session")
+def app():
+    """
+    Creates and returns a Flask application instance configured for testing.
+
+    Returns:
+        Flask: A Flask application instance.
+    """
+    return make_test_app()
+
+
+@pytest.fixture(scope="function")
+def db():
+    """
+    Sets up a brand-new in-memory MongoDB database using mongomock for every test function.
+
+    This fixture ensures each test has an isolated database environment,
+    preventing collisions with the global (default) connection created by the application.
+
+    Yields:
+        None: The database connection is available in the background.
+
+    Finally, the MongoDB connection is disconnected to start fresh for the next test.
+    """
+    connect_test_db()
     yield
     disconnect(alias="default")
 
@@ -75,6 +102,9 @@ def client(app, db):
     Yields:
         FlaskClient: The test client for performing API calls in tests.
     """
+    # Rate-limit counters, used-token markers and pending 2FA codes must not leak between
+    # tests either.
+    ttl_store.clear()
     with app.test_client() as test_client:
         yield test_client
 
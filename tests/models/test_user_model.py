@@ -132,3 +132,44 @@ def test_insurance_info_optional(db):
     )
     user.save()
     assert user.insurance_info is None
+
+
+def test_user_credentials_projection(db):
+    """
+    GIVEN a saved User with embedded profile documents
+    WHEN credentials are loaded by email and by id
+    THEN only the auth fields are returned in a slotted container
+    """
+    from app.models.user import UserCredentials, UserSummary
+
+    user = User(
+        email="creds@example.com",
+        password_hash="hashed_password",
+        role="doctor",
+        first_name="Cred",
+        last_name="User",
+        phone_number="1234567890",
+        address="123 Main Street",
+        emergency_contact=EmergencyContact(
+            name="John Doe", relationship="Father", phone_number="9876543210"
+        ),
+        verified=True,
+    )
+    user.save()
+
+    creds = UserCredentials.by_email("creds@example.com")
+    assert creds.id == user.id
+    assert creds.password_hash == "hashed_password"
+    assert creds.role == "doctor"
+    assert creds.verified is True
+    assert creds.two_factor_enabled is False
+    assert creds.first_name == "Cred"
+    assert not hasattr(creds, "__dict__")
+    assert not hasattr(creds, "emergency_contact")
+
+    assert UserCredentials.by_id(user.id).email == "creds@example.com"
+    assert UserCredentials.by_email("missing@example.com") is None
+
+    summary = UserSummary.by_email("creds@example.com")
+    assert (summary.id, summary.role, summary.first_name) == (user.id, "doctor", "Cred")
+    assert not hasattr(summary, "password_hash")
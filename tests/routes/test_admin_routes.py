@@ -0,0 +1,184 @@
+# File: tests/routes/test_admin_routes.py
+"""
+Tests for the admin routes (app/routes/admin.py).
+
+Covers the bulk user import:
+  - NDJSON and CSV uploads
+  - Per-row errors (invalid rows, duplicate emails) that do not abort the import
+  - Admin-only access
+"""
+
+import json
+
+import bcrypt
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app.models import User
+
+IMPORT_URL = "/api/admin/users/import"
+
+
+def make_row(email, **overrides):
+    row = {
+        "email": email,
+        "password": "ImportedPassword1!",
+        "first_name": "Imported",
+        "last_name": "User",
+        "phone_number": "5550001111",
+        "address": "1 Import Way",
+        "emergency_contact": {
+            "name": "Contact",
+            "relationship": "Friend",
+            "phone_number": "5550002222",
+        },
+    }
+    row.update(overrides)
+    return row
+
+
+def auth_headers(app, role):
+    with app.app_context():
+        token = create_access_token(identity="admin-id", additional_claims={"role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def admin_headers(app):
+    return auth_headers(app, "admin")
+
+
+@pytest.fixture
+def sent_emails(monkeypatch):
+    from app.extensions import outbox
+
+    sent = []
+    monkeypatch.setattr(outbox, "enqueue_many", lambda messages: sent.extend(messages))
+    return sent
+
+
+def test_ndjson_import_reports_row_failures_without_aborting(
+    app, client, db, admin_headers, sent_emails
+):
+    """
+    GIVEN an NDJSON upload with valid rows, an invalid row, malformed JSON and a duplicate
+    WHEN an admin imports it
+    THEN valid users are inserted with bcrypt hashes and every failure is reported by row
+    """
+    lines = [
+        json.dumps(make_row("one@example.com")),
+        json.dumps(make_row("two@example.com", role="doctor")),
+        json.dumps(make_row("bad-email")),
+        "{not json",
+        json.dumps(make_row("one@example.com")),
+        json.dumps(make_row("three@example.com", first_name="")),
+    ]
+    response = client.post(
+        IMPORT_URL,
+        data="\n".join(lines) + "\n",
+        content_type="application/x-ndjson",
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    report = response.get_json()
+    assert (report["total"], report["imported"], report["failed"]) == (6, 2, 4)
+    assert report["last_row"] == 6
+    errors = {error["row"]: error["error"] for error in report["errors"]}
+    assert "email" in errors[3]
+    assert errors[4] == "Invalid JSON."
+    assert "already exists" in errors[5]
+    assert "first_name" in errors[6]
+
+    doctor = User.objects(email="two@example.com").first()
+    assert doctor.role == "doctor" and not doctor.verified
+    assert bcrypt.checkpw(b"ImportedPassword1!", doctor.password_hash.encode())
+    assert User.objects(email="one@example.com").first().role == "patient"
+    assert sorted(message["recipients"][0] for message in sent_emails) == [
+        "one@example.com",
+        "two@example.com",
+    ]
+
+
+def test_csv_import_in_chunks(app, client, db, admin_headers, sent_emails, monkeypatch):
+    """CSV rows are inserted chunk by chunk with flattened emergency contact columns."""
+    monkeypatch.setitem(app.config, "USER_IMPORT_CHUNK_SIZE", 2)
+    header = (
+        "email,password,first_name,last_name,phone_number,address,"
+        "emergency_contact_name,emergency_contact_relationship,emergency_contact_phone_number"
+    )
+    rows = [
+        f"user{i}@example.com,Secret{i}!,First,Last,555000{i},Street {i},Kin,Sibling,5559999"
+        for i in range(5)
+    ]
+    response = client.post(
+        f"{IMPORT_URL}?role=doctor&send_email=false",
+        data="\n".join([header, *rows]),
+        content_type="text/csv",
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    assert response.get_json()["imported"] == 5
+    assert User.objects(role="doctor").count() == 5
+    assert User.objects(email="user3@example.com").first().emergency_contact.relationship == (
+        "Sibling"
+    )
+    assert sent_emails == []
+
+
+def test_interrupted_import_reports_the_rows_already_handled(
+    app, client, db, admin_headers, sent_emails, monkeypatch
+):
+    """
+    GIVEN password hashing that fails while the fourth row is being hashed
+    WHEN an admin imports the upload
+    THEN the 503 carries the report up to the last row handled, whose users are inserted
+    """
+    from app.extensions import password_hasher
+    from app.services.passwords import HashingTimeout
+
+    def hash_two_then_fail(passwords, window=None, workers=None):
+        for index, password in enumerate(passwords):
+            if index == 2:
+                raise HashingTimeout("Password hashing timed out.")
+            yield bcrypt.hashpw(password.encode(), bcrypt.gensalt(4)).decode()
+
+    monkeypatch.setattr(password_hasher, "hash_many", hash_two_then_fail)
+    monkeypatch.setitem(app.config, "USER_IMPORT_CHUNK_SIZE", 10)
+    lines = [
+        json.dumps(make_row("one@example.com")),
+        json.dumps(make_row("two@example.com")),
+        json.dumps(make_row("bad-email")),
+        json.dumps(make_row("four@example.com")),
+        json.dumps(make_row("five@example.com")),
+    ]
+    response = client.post(
+        IMPORT_URL,
+        data="\n".join(lines),
+        content_type="application/x-ndjson",
+        headers=admin_headers,
+    )
+    assert response.status_code == 503
+    report = response.get_json()
+    assert (report["total"], report["imported"], report["failed"]) == (3, 2, 1)
+    assert report["last_row"] == 3
+    assert [error["row"] for error in report["errors"]] == [3]
+    assert sorted(user.email for user in User.objects) == ["one@example.com", "two@example.com"]
+    assert len(sent_emails) == 2
+
+
+def test_import_requires_admin(app, client, db):
+    response = client.post(
+        IMPORT_URL,
+        data=json.dumps(make_row("x@example.com")),
+        content_type="application/x-ndjson",
+        headers=auth_headers(app, "doctor"),
+    )
+    assert response.status_code == 403
+    assert User.objects.count() == 0
+
+
+def test_import_rejects_unknown_format(client, db, admin_headers):
+    response = client.post(
+        IMPORT_URL, data="<users/>", content_type="text/xml", headers=admin_headers
+    )
+    assert response.status_code == 415
@@ -28,6 +28,8 @@ from app.models.user import EmergencyContact
 # --- Helper Fixtures ---
 
 TEST_PASSWORD = os.getenv("TEST_PASSWORD", "test_password_123!@#")
+# Matches BCRYPT_ROUNDS in the test app so fixtures hash quickly and need no rehash.
+TEST_BCRYPT_ROUNDS = 4
 
 
 @pytest.fixture
@@ -36,7 +38,9 @@ def verified_user(db):
     Fixture to create and return a verified user.
     """
     password_bytes = TEST_PASSWORD.encode("utf-8")
-    hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt()).decode("utf-8")
+    hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds=TEST_BCRYPT_ROUNDS)).decode(
+        "utf-8"
+    )
 
     user = User(
         email="verified@example.com",
@@ -62,7 +66,9 @@ def two_factor_user(db):
     Fixture to create a verified user with two-factor enabled.
     """
     password_bytes = TEST_PASSWORD.encode("utf-8")
-    hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt()).decode("utf-8")
+    hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds=TEST_BCRYPT_ROUNDS)).decode(
+        "utf-8"
+    )
 
     user = User(
         email="2fa_user@example.com",
@@ -312,10 +318,12 @@ def test_login_with_unverified_account(client, db):
     """
     import bcrypt
 
-    from tests.routes.test_auth_routes import TEST_PASSWORD
+    from tests.routes.test_auth_routes import TEST_BCRYPT_ROUNDS, TEST_PASSWORD
 
     password = TEST_PASSWORD
-    hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    hashed = bcrypt.hashpw(
+        password.encode("utf-8"), bcrypt.gensalt(rounds=TEST_BCRYPT_ROUNDS)
+    ).decode("utf-8")
 
     user = User(
         email="unverified@example.com",
@@ -379,3 +387,225 @@ def test_registration_xss_injection(client, db, monkeypatch):
     assert user is not None
     assert user.first_name == xss_payload
     # In a real system, your presentation layer should escape such inputs.
+
+
+# --- Single-Round-Trip Write Paths ---
+
+
+def _registration_payload(email):
+    return {
+        "email": email,
+        "password": "StrongPassword123",
+        "first_name": "Dup",
+        "last_name": "User",
+        "phone_number": "5551234567",
+        "address": "1 Unique Way",
+        "emergency_contact": {
+            "name": "Contact",
+            "relationship": "Friend",
+            "phone_number": "5559876543",
+        },
+    }
+
+
+def test_register_duplicate_email_is_rejected_by_unique_index(client, db, monkeypatch):
+    """
+    The second registration for an email fails on insert (NotUniqueError) with a 400,
+    and only one user document exists.
+    """
+    monkeypatch.setattr("app.routes.auth.send_email", lambda *args: None)
+
+    first = client.post("/api/auth/register/patient", json=_registration_payload("dup@ex.com"))
+    second = client.post("/api/auth/register/patient", json=_registration_payload("dup@ex.com"))
+
+    assert first.status_code == 201
+    assert second.status_code == 400
+    assert "already exists" in second.get_json()["msg"]
+    assert User.objects(email="dup@ex.com").count() == 1
+
+
+def test_verify_email_is_idempotent(app, client, db, verified_user):
+    """Verifying an already verified account reports it without failing."""
+    from app.routes.auth import generate_token
+
+    with app.test_request_context():
+        token = generate_token(verified_user.email, salt="email-confirm")
+
+    response = client.get(f"/api/auth/verify-email/{token}")
+    assert response.status_code == 200
+    assert "already verified" in response.get_json()["msg"]
+
+
+def test_verify_email_for_missing_user(app, client, db):
+    from app.routes.auth import generate_token
+
+    with app.test_request_context():
+        token = generate_token("ghost@example.com", salt="email-confirm")
+
+    response = client.get(f"/api/auth/verify-email/{token}")
+    assert response.status_code == 404
+
+
+def test_password_reset_updates_hash_and_allows_login(app, client, db, verified_user):
+    """After a reset, the new password works and the old one does not."""
+    from app.routes.auth import generate_token
+
+    with app.test_request_context():
+        token = generate_token(verified_user.email, salt="password-reset")
+
+    response = client.post(
+        f"/api/auth/password-reset/{token}", json={"new_password": "BrandNewPassword!"}
+    )
+    assert response.status_code == 200
+
+    old_login = client.post(
+        "/api/auth/login", json={"email": verified_user.email, "password": TEST_PASSWORD}
+    )
+    new_login = client.post(
+        "/api/auth/login", json={"email": verified_user.email, "password": "BrandNewPassword!"}
+    )
+    assert old_login.status_code == 401
+    assert new_login.status_code == 200
+
+
+def test_password_reset_for_missing_user(app, client, db):
+    from app.routes.auth import generate_token
+
+    with app.test_request_context():
+        token = generate_token("ghost@example.com", salt="password-reset")
+
+    response = client.post(f"/api/auth/password-reset/{token}", json={"new_password": "x"})
+    assert response.status_code == 404
+
+
+def test_login_rehashes_outdated_cost(app, client, db, verified_user):
+    """
+    A successful login against a hash made with a different cost than BCRYPT_ROUNDS
+    stores a new hash at the configured cost in the background.
+    """
+    import time
+
+    from app.services.passwords import hash_cost
+
+    old_hash = bcrypt.hashpw(TEST_PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds=5)).decode()
+    verified_user.password_hash = old_hash
+    verified_user.save()
+
+    response = client.post(
+        "/api/auth/login", json={"email": verified_user.email, "password": TEST_PASSWORD}
+    )
+    assert response.status_code == 200
+
+    deadline = time.monotonic() + 5
+    while User.objects(id=verified_user.id).first().password_hash == old_hash:
+        assert time.monotonic() < deadline, "password hash was not upgraded"
+        time.sleep(0.01)
+
+    new_hash = User.objects(id=verified_user.id).first().password_hash
+    assert hash_cost(new_hash) == app.config["BCRYPT_ROUNDS"]
+    assert bcrypt.checkpw(TEST_PASSWORD.encode("utf-8"), new_hash.encode("utf-8"))
+
+
+def test_login_is_throttled_per_email_before_any_lookup(client, db, monkeypatch):
+    """
+    GIVEN repeated login attempts for one email
+    WHEN the per-email limit is exceeded
+    THEN the endpoint answers 429 with Retry-After without touching the user store
+    """
+    from app.models.user import UserCredentials
+
+    payload = {"email": "target@example.com", "password": "wrong"}
+    for _ in range(10):
+        assert client.post("/api/auth/login", json=payload).status_code == 401
+
+    def fail_lookup(email):
+        raise AssertionError("throttled requests must not reach the database")
+
+    monkeypatch.setattr(UserCredentials, "by_email", fail_lookup)
+    response = client.post("/api/auth/login", json=payload)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    # Other accounts are unaffected by the per-email counter.
+    monkeypatch.undo()
+    other = client.post("/api/auth/login", json={"email": "other@example.com", "password": "x"})
+    assert other.status_code == 401
+
+
+def _patch_google_identity(monkeypatch, user_info):
+    from app.extensions import oauth
+
+    if "google" not in oauth._registry:
+        oauth.register(
+            name="google",
+            client_id="dummy-client-id",
+            client_secret="dummy-client-secret",
+            client_kwargs={"scope": "openid email profile"},
+        )
+    monkeypatch.setattr(oauth.google, "authorize_access_token", lambda: {"access_token": "t"})
+    monkeypatch.setattr(oauth.google, "parse_id_token", lambda token: user_info)
+
+
+def test_oauth_callback_resolves_users_by_oauth_id(client, db, monkeypatch):
+    """
+    GIVEN a user created through Google whose Google email later changed
+    WHEN they sign in again
+    THEN the account is found through (oauth_provider, oauth_id), not duplicated
+    """
+    info = {"email": "first@example.com", "sub": "google-sub-1", "given_name": "G"}
+    _patch_google_identity(monkeypatch, info)
+    assert client.get("/api/auth/oauth/google/callback").status_code == 200
+
+    info["email"] = "renamed@example.com"
+    assert client.get("/api/auth/oauth/google/callback").status_code == 200
+    assert User.objects(oauth_id="google-sub-1").count() == 1
+    assert User.objects(email="renamed@example.com").count() == 0
+
+
+def test_oauth_callback_links_existing_email_account(client, db, monkeypatch, verified_user):
+    _patch_google_identity(monkeypatch, {"email": verified_user.email, "sub": "google-sub-2"})
+    assert client.get("/api/auth/oauth/google/callback").status_code == 200
+
+    linked = User.objects(id=verified_user.id).first()
+    assert (linked.oauth_provider, linked.oauth_id) == ("google", "google-sub-2")
+    assert User.objects.count() == 1
+
+
+def test_password_reset_link_survives_a_failed_attempt(app, client, db, monkeypatch, verified_user):
+    """A reset that fails after the token is accepted leaves the link usable."""
+    from app.extensions import password_hasher
+    from app.routes.auth import generate_token
+    from app.services.passwords import PasswordHashingError
+
+    with app.test_request_context():
+        token = generate_token(verified_user.email, salt="password-reset")
+
+    def busy(password):
+        raise PasswordHashingError("pool saturated")
+
+    monkeypatch.setattr(password_hasher, "hash_password", busy)
+    response = client.post(
+        f"/api/auth/password-reset/{token}", json={"new_password": "BrandNewPassword!"}
+    )
+    assert response.status_code == 503
+
+    monkeypatch.undo()
+    response = client.post(
+        f"/api/auth/password-reset/{token}", json={"new_password": "BrandNewPassword!"}
+    )
+    assert response.status_code == 200
+    # Once used successfully, the link is spent.
+    response = client.post(
+        f"/api/auth/password-reset/{token}", json={"new_password": "AnotherPassword!"}
+    )
+    assert response.status_code == 400
+
+
+def test_verify_email_link_survives_a_missing_user(app, client, db):
+    from app.routes.auth import generate_token
+
+    with app.test_request_context():
+        token = generate_token("ghost@example.com", salt="email-confirm")
+
+    assert client.get(f"/api/auth/verify-email/{token}").status_code == 404
+    assert client.get(f"/api/auth/verify-email/{token}").status_code == 404
@@ -0,0 +1,87 @@
+# File: tests/routes/test_health_routes.py
+"""
+Tests for the liveness and readiness endpoints (app/routes/health.py).
+"""
+
+import logging
+import socket
+
+import pytest
+
+from app.extensions import health_checks
+from app.services.health import probe_smtp
+from app.services.indexes import apply_plan, index_plan, managed_documents
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    """Fresh probe results, with any probes a test registers dropped afterwards."""
+    monkeypatch.setattr(health_checks, "_probes", dict(health_checks._probes))
+    health_checks.clear()
+    yield health_checks
+    health_checks.clear()
+
+
+def test_healthz_needs_no_dependencies(client):
+    response = client.get("/healthz")
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "ok"}
+
+
+def test_readyz_reports_each_dependency_and_caches_results(client, probes):
+    """
+    GIVEN a reachable database
+    WHEN /readyz is polled twice within the cache TTL
+    THEN it is ready, reports latency per dependency and probes only once
+    """
+    before = probes.stats()
+    first = client.get("/readyz")
+    assert first.status_code == 200
+    body = first.get_json()
+    assert body["status"] == "ready"
+    assert set(body["checks"]) == {"mongo", "indexes"}
+    assert body["checks"]["mongo"]["ok"] is True
+    assert body["checks"]["mongo"]["latency_ms"] >= 0
+
+    client.get("/readyz")
+    after = probes.stats()
+    assert after["probes"] - before["probes"] == 2
+    assert after["cache_hits"] - before["cache_hits"] == 2
+
+
+def test_readyz_is_unavailable_until_indexes_exist(app, client, probes, monkeypatch, caplog):
+    monkeypatch.setitem(app.config, "MONGODB_AUTO_CREATE_INDEX", False)
+
+    with caplog.at_level(logging.WARNING, logger="app.services.health"):
+        response = client.get("/readyz")
+    assert response.status_code == 503
+    indexes = response.get_json()["checks"]["indexes"]
+    # The public endpoint reports the failure; which indexes are missing is only logged.
+    assert indexes == {
+        "ok": False,
+        "latency_ms": indexes["latency_ms"],
+        "critical": True,
+        "age_s": indexes["age_s"],
+    }
+    assert "users.email_1" in caplog.text
+
+    for document in managed_documents():
+        apply_plan(document, index_plan(document))
+    probes.clear()
+    assert client.get("/readyz").status_code == 200
+
+
+def test_unreachable_smtp_is_reported_but_not_critical(app, client, probes, monkeypatch):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]  # nothing listens here once the socket is closed
+    monkeypatch.setitem(app.config, "MAIL_SERVER", "127.0.0.1")
+    monkeypatch.setitem(app.config, "MAIL_PORT", port)
+    probes.register("smtp", probe_smtp, critical=False)
+
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    smtp = response.get_json()["checks"]["smtp"]
+    assert smtp["ok"] is False and smtp["critical"] is False
+    assert "error" not in smtp
+    assert "ConnectionRefusedError" in probes.check("smtp")["error"]
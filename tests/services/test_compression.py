@@ -0,0 +1,132 @@
+# File: tests/services/test_compression.py
+"""
+Tests for the response compression middleware (app/services/compression.py).
+"""
+
+import gzip
+
+import brotli
+import pytest
+from flask import Flask, Response, jsonify, stream_with_context
+
+from app.services.compression import Compression, negotiate_encoding
+
+BIG = {"rows": [{"id": i, "reason": "Follow-up consultation"} for i in range(200)]}
+
+
+@pytest.fixture
+def compressed_app():
+    app = Flask(__name__)
+    app.config["COMPRESS_MIN_SIZE"] = 500
+
+    @app.get("/big")
+    def big():
+        response = jsonify(BIG)
+        response.set_etag("v1")
+        return response
+
+    @app.get("/small")
+    def small():
+        return jsonify({"msg": "ok"})
+
+    @app.get("/stream")
+    def stream():
+        return Response(stream_with_context(iter([b"x" * 1000] * 3)), mimetype="text/plain")
+
+    @app.get("/pre-encoded")
+    def pre_encoded():
+        return Response(
+            gzip.compress(b"y" * 2000), mimetype="text/plain", headers={"Content-Encoding": "gzip"}
+        )
+
+    @app.get("/image")
+    def image():
+        return Response(b"\x89PNG" + b"\0" * 2000, mimetype="image/png")
+
+    compression = Compression(app)
+    return app, compression
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip, deflate, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0.5, gzip;q=0.8", "gzip"),
+        ("br;q=0, *", "gzip"),
+        ("identity", None),
+        ("", None),
+        ("*;q=0", None),
+    ],
+)
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+def test_negotiate_without_brotli_falls_back_to_gzip():
+    assert negotiate_encoding("br, gzip", brotli_available=False) == "gzip"
+    assert negotiate_encoding("br", brotli_available=False) is None
+
+
+def test_large_json_is_compressed_with_the_preferred_encoding(compressed_app):
+    """
+    GIVEN a JSON response above COMPRESS_MIN_SIZE
+    WHEN clients accept brotli or only gzip
+    THEN the body is encoded accordingly, with a matching Content-Length and weak ETag
+    """
+    app, compression = compressed_app
+    client = app.test_client()
+    plain = client.get("/big").get_data()
+
+    br = client.get("/big", headers={"Accept-Encoding": "gzip, br"})
+    assert br.headers["Content-Encoding"] == "br"
+    assert br.headers["Vary"] == "Accept-Encoding"
+    assert br.headers["ETag"] == 'W/"v1"'
+    assert int(br.headers["Content-Length"]) == len(br.get_data()) < len(plain)
+    assert brotli.decompress(br.get_data()) == plain
+
+    gz = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert gz.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(gz.get_data()) == plain
+
+    stats = compression.stats()
+    assert (stats["compressed"], stats["br"], stats["gzip"]) == (2, 1, 1)
+    assert stats["bytes_in"] == 2 * len(plain) and stats["ratio"] > 1
+    assert stats["compress_seconds"] > 0
+
+
+def test_uncompressed_responses(compressed_app):
+    """Small, streamed, already encoded and binary responses are passed through unchanged."""
+    app, compression = compressed_app
+    client = app.test_client()
+    headers = {"Accept-Encoding": "br, gzip"}
+
+    small = client.get("/small", headers=headers)
+    assert "Content-Encoding" not in small.headers
+    assert small.headers["Vary"] == "Accept-Encoding"
+    assert small.get_json() == {"msg": "ok"}
+
+    stream = client.get("/stream", headers=headers)
+    assert "Content-Encoding" not in stream.headers
+    assert stream.get_data() == b"x" * 3000
+
+    pre_encoded = client.get("/pre-encoded", headers=headers)
+    assert pre_encoded.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(pre_encoded.get_data()) == b"y" * 2000
+
+    image = client.get("/image", headers=headers)
+    assert "Content-Encoding" not in image.headers and "Vary" not in image.headers
+
+    assert "Content-Encoding" not in client.head("/big", headers=headers).headers
+    assert "Content-Encoding" not in client.get("/big").headers  # no Accept-Encoding
+
+    stats = compression.stats()
+    assert stats["compressed"] == 0 and stats["ratio"] is None
+    assert (stats["skipped_small"], stats["skipped_streamed"]) == (1, 1)
+
+
+def test_disabled_leaves_the_wsgi_app_alone():
+    app = Flask(__name__)
+    app.config["COMPRESS_ENABLED"] = False
+    Compression(app)
+    assert "wsgi_app" not in vars(app)  # still the class's own method, not a wrapper
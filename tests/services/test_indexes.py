@@ -0,0 +1,138 @@
+# File: tests/services/test_indexes.py
+"""
+Tests for declared-vs-live index management (app/services/indexes.py) and the
+`flask db ensure-indexes` command.
+"""
+
+import pytest
+
+from app.models import Appointment, User
+from app.services.indexes import apply_plan, index_plan, set_auto_create_index
+
+
+@pytest.fixture
+def manual_indexes(db):
+    """Models with auto index creation off, as in production workers."""
+    set_auto_create_index(False)
+    for document in (User, Appointment):
+        document._collection = None
+    yield
+    set_auto_create_index(True)
+
+
+def _collection(document):
+    return document._get_db()[document._get_collection_name()]
+
+
+def test_workers_do_not_create_indexes_when_disabled(manual_indexes):
+    User.objects(email="nobody@example.com").first()
+    assert set(_collection(User).index_information()) <= {"_id_"}
+
+
+def test_plan_creates_missing_drops_extra_and_rebuilds_changed(manual_indexes):
+    """
+    GIVEN a users collection with one outdated, one extra and one matching index
+    WHEN the index plan is computed
+    THEN missing indexes are created, changed ones rebuilt and extra ones dropped only
+    when asked for
+    """
+    users = _collection(User)
+    users.create_index([("email", 1)], name="email_1")  # declared unique
+    users.create_index([("legacy", 1)], name="legacy_1")
+    users.create_index([("role", 1)], name="role_1")
+
+    plan = index_plan(User, drop_extra=True)
+    assert sorted(plan["drop"]) == ["email_1", "legacy_1"]
+    assert sorted(index["name"] for index in plan["create"]) == [
+        "email_1",
+        "oauth_provider_1_oauth_id_1",
+    ]
+    assert plan["unchanged"] == ["role_1"]
+    default = index_plan(User)
+    assert default["drop"] == ["email_1"]
+    assert default["extra"] == ["legacy_1"]
+
+
+def test_ensure_indexes_command_dry_run_then_apply(app, manual_indexes):
+    runner = app.test_cli_runner()
+
+    dry = runner.invoke(args=["db", "ensure-indexes", "--dry-run", "--model", "Appointment"])
+    assert dry.exit_code == 0, dry.output
+    assert "appointments: create doctor_appointment_idx" in dry.output
+    assert "dry run" in dry.output
+    assert set(_collection(Appointment).index_information()) <= {"_id_"}
+
+    applied = runner.invoke(args=["db", "ensure-indexes", "--model", "Appointment"])
+    assert "Applied 2 change(s)." in applied.output
+    assert set(_collection(Appointment).index_information()) == {
+        "_id_",
+        "doctor_appointment_idx",
+        "patient_appointment_idx",
+    }
+
+    again = runner.invoke(args=["db", "ensure-indexes", "--model", "Appointment"])
+    assert "Indexes are up to date." in again.output
+
+
+def test_ensure_indexes_command_keeps_undeclared_indexes_by_default(app, manual_indexes):
+    users = _collection(User)
+    users.create_index([("legacy", 1)], name="legacy_1")
+    runner = app.test_cli_runner()
+
+    kept = runner.invoke(args=["db", "ensure-indexes", "--model", "User"])
+    assert kept.exit_code == 0, kept.output
+    assert "users: keep undeclared legacy_1" in kept.output
+    assert "legacy_1" in users.index_information()
+
+    dropped = runner.invoke(args=["db", "ensure-indexes", "--model", "User", "--drop-extra"])
+    assert "users: drop legacy_1" in dropped.output
+    assert "legacy_1" not in users.index_information()
+
+
+def test_apply_builds_replacements_before_dropping(manual_indexes, monkeypatch):
+    """
+    GIVEN a users collection whose email index lacks the declared unique option
+    WHEN the plan is applied
+    THEN new indexes are built first and a stand-in covers email while it is rebuilt
+    """
+    users = _collection(User)
+    users.create_index([("email", 1)], name="email_1")
+    users.create_index([("role", 1)], name="role_1")
+    calls = []
+    collection_class = type(users)
+    for method in ("create_index", "drop_index"):
+        original = getattr(collection_class, method)
+
+        def record(self, key_or_name, *args, _method=method, _original=original, **kwargs):
+            calls.append((_method, kwargs.get("name", key_or_name)))
+            return _original(self, key_or_name, *args, **kwargs)
+
+        monkeypatch.setattr(collection_class, method, record)
+
+    apply_plan(User, index_plan(User))
+
+    assert calls == [
+        ("create_index", "oauth_provider_1_oauth_id_1"),
+        ("create_index", "email_1_rebuild"),
+        ("drop_index", "email_1"),
+        ("create_index", "email_1"),
+        ("drop_index", "email_1_rebuild"),
+    ]
+    assert users.index_information()["email_1"]["unique"] is True
+    assert index_plan(User)["drop"] == []
+
+
+def test_ensure_indexes_command_keeps_changed_unique_indexes_by_default(app, manual_indexes):
+    users = _collection(User)
+    users.create_index([("email", 1)], name="email_1", unique=True, sparse=True)
+    runner = app.test_cli_runner()
+
+    kept = runner.invoke(args=["db", "ensure-indexes", "--model", "User"])
+    assert kept.exit_code == 0, kept.output
+    assert "users: keep unique email_1" in kept.output
+    assert users.index_information()["email_1"].get("sparse") is True
+
+    rebuilt = runner.invoke(args=["db", "ensure-indexes", "--model", "User", "--drop-extra"])
+    assert "users: drop email_1" in rebuilt.output
+    assert users.index_information()["email_1"]["unique"] is True
+    assert not users.index_information()["email_1"].get("sparse")
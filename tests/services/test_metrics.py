@@ -0,0 +1,153 @@
+# File: tests/services/test_metrics.py
+"""
+Tests for Prometheus metrics (app/services/metrics.py) and the /metrics endpoint.
+"""
+
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+from app.extensions import metrics, password_hasher, tokens, user_cache
+
+
+def scrape(client, **headers) -> str:
+    response = client.get("/metrics", headers=headers)
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    return response.get_data(as_text=True)
+
+
+def sample(text: str, name: str, **labels) -> float:
+    """Value of the sample ``name`` whose labels include ``labels`` (0 if absent)."""
+    wanted = [f'{key}="{value}"' for key, value in labels.items()]
+    for line in text.splitlines():
+        if line.startswith(name + "{") and all(label in line for label in wanted):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_requests_are_counted_and_timed_per_endpoint(client):
+    before = scrape(client)
+    client.get("/api/auth/status")
+    client.get("/no-such-page")
+    after = scrape(client)
+
+    labels = {"method": "GET", "blueprint": "auth", "endpoint": "auth.status"}
+    name = "http_requests_total"
+    assert (
+        sample(after, name, status="200", **labels) - sample(before, name, status="200", **labels)
+        == 1
+    )
+    assert sample(after, "http_request_duration_seconds_count", **labels) >= 1
+    assert sample(after, name, endpoint="<unmatched>", status="404") >= 1
+    assert "email_outbox_queue_depth" in after
+
+
+def test_password_hashing_and_mongo_commands_are_recorded(app, client):
+    with app.app_context():
+        password_hasher.hash_password("a password")
+
+    listener = metrics._listener
+    command = {"find": "users", "filter": {}}
+    event = SimpleNamespace(
+        command=command, command_name="find", request_id=1, connection_id=("h", 1)
+    )
+    listener.started(event)
+    listener.succeeded(SimpleNamespace(duration_micros=2500, **vars(event)))
+    listener.started(event)
+    listener.failed(SimpleNamespace(duration_micros=1000, **vars(event)))
+
+    text = scrape(client)
+    assert sample(text, "password_hash_duration_seconds_count", operation="hash") >= 1
+    assert (
+        sample(text, "mongodb_command_duration_seconds_count", collection="users", command="find")
+        >= 2
+    )
+    assert sample(text, "mongodb_command_failures_total", collection="users", command="find") >= 1
+
+
+def test_link_tokens_are_counted_and_timed(app, client):
+    before = scrape(client)
+    with app.app_context():
+        token = tokens.issue("metrics@example.com", salt="email-confirm")
+        tokens.verify(token, salt="email-confirm")
+        tokens.verify("not-a-token", salt="email-confirm")
+    after = scrape(client)
+
+    def delta(name, **labels):
+        return sample(after, name, **labels) - sample(before, name, **labels)
+
+    assert delta("link_tokens_total", operation="issue", outcome="issued") == 1
+    assert delta("link_tokens_total", operation="verify", outcome="verified") == 1
+    assert delta("link_tokens_total", operation="verify", outcome="rejected") == 1
+    assert delta("link_token_duration_seconds_count", operation="verify") == 2
+
+
+def test_token_is_required_when_configured(client, monkeypatch):
+    monkeypatch.setattr(metrics, "token", "s3cret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer nope"}).status_code == 401
+    scrape(client, Authorization="Bearer s3cret")
+
+
+def test_metrics_are_refused_without_a_token_unless_public(client, monkeypatch):
+    monkeypatch.setattr(metrics, "token", None)
+    monkeypatch.setattr(metrics, "public", False)
+    assert client.get("/metrics").status_code == 403
+
+    monkeypatch.setattr(metrics, "public", True)
+    scrape(client)
+
+
+WORKER = """
+import sys
+from flask import Flask
+from app.services.metrics import Metrics
+
+metrics = Metrics(app=Flask(__name__))
+for _ in range(int(sys.argv[1])):
+    metrics.requests.labels("GET", "auth", "auth.login", "200").inc()
+if len(sys.argv) > 2:
+    print(metrics.render()[0].decode())
+"""
+
+
+def test_scrapes_aggregate_over_worker_processes(tmp_path):
+    """
+    GIVEN two worker processes sharing PROMETHEUS_MULTIPROC_DIR
+    WHEN each counts requests and a third process renders the metrics
+    THEN the scrape reports the sum over all of them
+    """
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+
+    def run(*args):
+        return subprocess.run(
+            [sys.executable, "-c", WORKER, *args],
+            capture_output=True,
+            text=True,
+            env=env,
+            check=True,
+        ).stdout
+
+    run("2")
+    run("3")
+    text = run("0", "render")
+    assert sample(text, "http_requests_total", endpoint="auth.login", status="200") == 5
+
+
+def test_compression_and_user_cache_counters_are_exported(app, client):
+    before = scrape(client)
+    client.get("/metrics", headers={"Accept-Encoding": "gzip"})
+    with app.app_context():
+        user_cache.by_email("nobody-metrics@example.com")
+    after = scrape(client)
+
+    def delta(name, **labels):
+        return sample(after, name, **labels) - sample(before, name, **labels)
+
+    assert delta("http_compression_duration_seconds_count", encoding="gzip") == 1
+    bytes_in = delta("http_compression_input_bytes_total", encoding="gzip")
+    assert 0 < delta("http_compression_output_bytes_total", encoding="gzip") < bytes_in
+    assert delta("user_cache_events_total", event="misses") == 1
+    assert "user_cache_entries" in after
@@ -0,0 +1,91 @@
+# File: tests/services/test_oauth_metadata.py
+"""
+Tests for the OAuth discovery metadata/JWKS cache (app/services/oauth_metadata.py).
+
+Providers are served from local stub documents through file:// URLs.
+"""
+
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.oauth_metadata import OAuthMetadataCache
+
+STUB_JWKS = {"keys": [{"kty": "RSA", "kid": "stub-key", "n": "AQAB", "e": "AQAB"}]}
+
+
+@pytest.fixture
+def stub_url(tmp_path):
+    """A discovery document whose jwks_uri points at a second local file."""
+    jwks_path = tmp_path / "jwks.json"
+    jwks_path.write_text(json.dumps(STUB_JWKS))
+    metadata_path = tmp_path / "openid-configuration.json"
+    metadata_path.write_text(
+        json.dumps(
+            {
+                "issuer": "https://accounts.example.com",
+                "authorization_endpoint": "https://accounts.example.com/auth",
+                "token_endpoint": "https://accounts.example.com/token",
+                "jwks_uri": jwks_path.as_uri(),
+            }
+        )
+    )
+    return metadata_path.as_uri()
+
+
+def make_client():
+    """Stands in for an Authlib client, which keeps metadata in ``server_metadata``."""
+    return SimpleNamespace(server_metadata={})
+
+
+def test_prewarm_loads_metadata_and_keys_into_the_client(stub_url):
+    cache, client = OAuthMetadataCache(), make_client()
+    cache.register("google", client, stub_url)
+
+    assert client.server_metadata["token_endpoint"] == "https://accounts.example.com/token"
+    assert client.server_metadata["jwks"] == STUB_JWKS
+    # Authlib treats metadata carrying "_loaded_at" as already fetched.
+    assert "_loaded_at" in client.server_metadata
+    assert cache.stats()["fetches"] == 1
+
+
+def test_failed_prewarm_is_retried_on_first_use(tmp_path, stub_url):
+    cache, client = OAuthMetadataCache(), make_client()
+    cache.register("google", client, (tmp_path / "missing.json").as_uri())
+    assert client.server_metadata == {}
+    assert cache.stats()["errors"] == 1
+
+    cache._providers["google"]["url"] = stub_url
+    cache.ensure_fresh("google")
+    assert client.server_metadata["jwks"] == STUB_JWKS
+
+
+def test_stale_metadata_is_refreshed_in_the_background(stub_url):
+    cache, client = OAuthMetadataCache(), make_client()
+    cache.register("google", client, stub_url)
+    cache.ttl = 0.05
+    time.sleep(0.1)
+
+    cache.ensure_fresh("google")  # returns immediately with the stale copy in place
+    assert client.server_metadata["jwks"] == STUB_JWKS
+    deadline = time.monotonic() + 5
+    while cache.stats()["refreshes"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.stats()["fetches"] == 2
+
+
+def test_disk_cache_is_shared_between_workers(tmp_path, stub_url):
+    """A second worker reuses the document the first one wrote instead of fetching it."""
+    first, second = OAuthMetadataCache(), OAuthMetadataCache()
+    first.cache_dir = second.cache_dir = str(tmp_path / "cache")
+
+    first.register("google", make_client(), stub_url)
+    client = make_client()
+    second.register("google", client, stub_url)
+
+    assert client.server_metadata["jwks"] == STUB_JWKS
+    assert first.stats()["fetches"] == 1
+    stats = second.stats()
+    assert (stats["fetches"], stats["disk_hits"]) == (0, 1)
@@ -0,0 +1,204 @@
+# File: tests/services/test_outbox.py
+"""
+Tests for the background email outbox (app/services/outbox.py).
+
+A minimal in-process SMTP server acts as the test double, so delivery goes through
+real smtplib connections without leaving the machine.
+"""
+
+import socketserver
+import threading
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from app.extensions import mail
+from app.models.email_outbox import OutboxEmail
+from app.services.outbox import EmailOutbox
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.wfile.write(b"220 localhost ESMTP test\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command in (b"EHLO", b"HELO"):
+                self.wfile.write(b"250 localhost\r\n")
+            elif command == b"MAIL":
+                with server.lock:
+                    reject = server.reject_mail > 0
+                    server.reject_mail -= 1
+                self.wfile.write(b"451 try again later\r\n" if reject else b"250 OK\r\n")
+            elif command in (b"RCPT", b"RSET", b"NOOP"):
+                self.wfile.write(b"250 OK\r\n")
+            elif command == b"DATA":
+                self.wfile.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                lines = []
+                while (data := self.rfile.readline()) not in (b".\r\n", b""):
+                    lines.append(data)
+                with server.lock:
+                    server.messages.append(b"".join(lines))
+                self.wfile.write(b"250 OK queued\r\n")
+            elif command == b"QUIT":
+                self.wfile.write(b"221 Bye\r\n")
+                return
+            else:
+                self.wfile.write(b"502 not implemented\r\n")
+
+
+class DebuggingSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = []
+        self.reject_mail = 0
+
+
+@pytest.fixture
+def smtp_server():
+    server = DebuggingSMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def outbox(app, monkeypatch, smtp_server):
+    """An async outbox delivering to the local SMTP server."""
+    mail_state = mail.init_mail(
+        {
+            "MAIL_SERVER": "127.0.0.1",
+            "MAIL_PORT": smtp_server.server_address[1],
+            "MAIL_USE_TLS": False,
+            "MAIL_USE_SSL": False,
+            "MAIL_DEFAULT_SENDER": "noreply@example.com",
+        }
+    )
+    monkeypatch.setitem(app.extensions, "mail", mail_state)
+    monkeypatch.setitem(app.config, "MAIL_DEFAULT_SENDER", "noreply@example.com")
+    monkeypatch.setitem(app.config, "MAIL_OUTBOX_ASYNC", True)
+    monkeypatch.setitem(app.config, "MAIL_OUTBOX_RETRY_BACKOFF", 0.01)
+
+    email_outbox = EmailOutbox(mail_state)
+    email_outbox.app = app
+    with app.app_context():
+        yield email_outbox
+    email_outbox.close()
+
+
+def test_messages_are_batched_over_one_connection(outbox, smtp_server):
+    """
+    GIVEN several queued messages from the same sender
+    WHEN the dispatcher delivers them
+    THEN they all travel over a single reused SMTP connection
+    """
+    for i in range(5):
+        outbox.enqueue(f"Subject {i}", [f"user{i}@example.com"], "Hello")
+
+    assert outbox.flush(timeout=5)
+    assert len(smtp_server.messages) == 5
+    assert smtp_server.connections == 1
+
+    stats = outbox.stats()
+    assert stats["sent"] == 5
+    assert stats["connections"] == 1
+    assert stats["queue_depth"] == 0
+
+
+def test_transient_failures_are_retried(outbox, smtp_server):
+    """A message refused with a transient error is retried with backoff and delivered."""
+    smtp_server.reject_mail = 2
+
+    outbox.enqueue("Retry me", ["user@example.com"], "Hello")
+
+    assert outbox.flush(timeout=5)
+    assert len(smtp_server.messages) == 1
+    assert outbox.stats()["retried"] == 2
+    assert outbox.stats()["sent"] == 1
+
+
+def test_gives_up_after_max_retries(app, outbox, smtp_server, monkeypatch):
+    monkeypatch.setitem(app.config, "MAIL_OUTBOX_MAX_RETRIES", 1)
+    smtp_server.reject_mail = 100
+
+    outbox.enqueue("Never delivered", ["user@example.com"], "Hello")
+
+    assert outbox.flush(timeout=5)
+    assert smtp_server.messages == []
+    assert outbox.stats()["failed"] == 1
+
+
+def test_persisted_messages_are_marked_sent(app, db, outbox, smtp_server, monkeypatch):
+    """With persistence on, each message is stored and its status tracked in MongoDB."""
+    monkeypatch.setitem(app.config, "MAIL_OUTBOX_PERSIST", True)
+
+    outbox.enqueue_many(
+        [
+            {"subject": "A", "recipients": ["a@example.com"], "body": "Hi"},
+            {"subject": "B", "recipients": ["b@example.com"], "body": "Hi"},
+        ]
+    )
+
+    assert outbox.flush(timeout=5)
+    assert OutboxEmail.objects(status="sent").count() == 2
+    assert len(smtp_server.messages) == 2
+
+
+def test_stale_persisted_messages_are_recovered(app, db, outbox, smtp_server, monkeypatch):
+    """Messages left queued by a dispatcher that died are claimed and delivered."""
+    monkeypatch.setitem(app.config, "MAIL_OUTBOX_PERSIST", True)
+    OutboxEmail(
+        subject="Left behind",
+        recipients=["late@example.com"],
+        body="Hi",
+        sender="noreply@example.com",
+        claimed_by="dead-host:1",
+        claimed_at=datetime.now(UTC) - timedelta(hours=1),
+    ).save()
+
+    # Any enqueue starts the dispatcher, which recovers stale messages first.
+    outbox.enqueue("Fresh", ["fresh@example.com"], "Hi")
+
+    assert outbox.flush(timeout=5)
+    recovered = OutboxEmail.objects(subject="Left behind").first()
+    assert recovered.status == "sent"
+    assert recovered.claimed_by == outbox.owner
+
+
+def test_sync_mode_sends_inline(app, monkeypatch):
+    """With MAIL_OUTBOX_ASYNC off, enqueue hands the message straight to Flask-Mail."""
+    sent = []
+
+    class FakeMail:
+        def send(self, message):
+            sent.append(message)
+
+    monkeypatch.setitem(app.config, "MAIL_OUTBOX_ASYNC", False)
+    monkeypatch.setitem(app.config, "MAIL_DEFAULT_SENDER", "noreply@example.com")
+    with app.app_context():
+        EmailOutbox(FakeMail()).enqueue("Now", ["now@example.com"], "Hi")
+
+    assert [message.subject for message in sent] == ["Now"]
+
+
+def test_close_is_registered_at_exit_once(app, monkeypatch):
+    registered = []
+    monkeypatch.setattr("app.services.outbox.atexit.register", registered.append)
+    monkeypatch.setitem(app.extensions, "email_outbox", app.extensions["email_outbox"])
+    outbox = EmailOutbox(mail)
+
+    outbox.init_app(app)
+    outbox.init_app(app)
+    assert registered == [outbox.close]
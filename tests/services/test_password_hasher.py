@@ -0,0 +1,190 @@
+# File: tests/services/test_password_hasher.py
+"""
+Tests for the password hashing worker pool (app/services/passwords.py).
+
+Covers:
+  - Hashing and verification on every executor type.
+  - Queue-depth limiting and timeouts.
+  - Counters exposed through stats().
+  - Cost-factor detection, background rehashing and calibration.
+"""
+
+import threading
+
+import bcrypt
+import pytest
+
+from app.services import passwords
+from app.services.passwords import (
+    HashingQueueFull,
+    HashingTimeout,
+    PasswordHasher,
+    calibrate_cost,
+    hash_cost,
+)
+
+
+@pytest.fixture
+def hasher(app):
+    """A standalone hasher bound to the test app; its pool is shut down afterwards."""
+    password_hasher = PasswordHasher()
+    with app.app_context():
+        yield password_hasher
+    password_hasher.shutdown()
+
+
+@pytest.mark.parametrize("executor", ["inline", "thread", "process"])
+def test_hash_and_check_roundtrip(app, hasher, monkeypatch, executor):
+    """
+    GIVEN a hasher configured with each executor type
+    WHEN a password is hashed and checked
+    THEN the hash is valid bcrypt and only the right password matches
+    """
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_EXECUTOR", executor)
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_WORKERS", 2)
+
+    hashed = hasher.hash_password("s3cret!")
+    assert bcrypt.checkpw(b"s3cret!", hashed.encode("utf-8"))
+    assert hasher.check_password("s3cret!", hashed) is True
+    assert hasher.check_password("wrong", hashed) is False
+
+    stats = hasher.stats()
+    assert stats["submitted"] == 3
+    assert stats["completed"] == 3
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.parametrize("executor", ["inline", "thread"])
+def test_hash_many_preserves_order(app, hasher, monkeypatch, executor):
+    """Bulk hashing yields one hash per password, in input order, with a small window."""
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_EXECUTOR", executor)
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_WORKERS", 2)
+
+    passwords_in = [f"password-{i}" for i in range(7)]
+    hashes = list(hasher.hash_many(passwords_in, window=3))
+    assert len(hashes) == 7
+    for password, hashed in zip(passwords_in, hashes):
+        assert bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+    assert hasher.stats()["completed"] == 7
+
+
+def test_check_password_rejects_empty_hash(hasher):
+    """OAuth-only accounts store an empty hash, which must never match."""
+    assert hasher.check_password("anything", "") is False
+
+
+def test_queue_full_rejects_new_work(app, hasher, monkeypatch):
+    """
+    GIVEN a pool whose queue limit is already reached
+    WHEN another job is submitted
+    THEN HashingQueueFull is raised without waiting for a worker
+    """
+    release = threading.Event()
+    monkeypatch.setattr(passwords, "_checkpw", lambda *_: release.wait(5))
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_EXECUTOR", "thread")
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_MAX_QUEUE", 1)
+
+    def blocked_check():
+        with app.app_context():
+            hasher.check_password("a", "b")
+
+    worker = threading.Thread(target=blocked_check)
+    worker.start()
+    try:
+        for _ in range(100):
+            if hasher.stats()["in_flight"] == 1:
+                break
+            threading.Event().wait(0.01)
+        with pytest.raises(HashingQueueFull):
+            hasher.check_password("a", "b")
+    finally:
+        release.set()
+        worker.join()
+
+    assert hasher.stats()["rejected"] == 1
+
+
+def test_timeout_raises_and_frees_slot(app, hasher, monkeypatch):
+    """
+    GIVEN a job that runs longer than PASSWORD_HASH_TIMEOUT
+    WHEN the caller waits for it
+    THEN HashingTimeout is raised and the slot is released once the job ends
+    """
+    release = threading.Event()
+    monkeypatch.setattr(passwords, "_checkpw", lambda *_: release.wait(5))
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_EXECUTOR", "thread")
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_TIMEOUT", 0.05)
+
+    with pytest.raises(HashingTimeout):
+        hasher.check_password("a", "b")
+    assert hasher.stats()["timeouts"] == 1
+
+    release.set()
+    hasher.shutdown()
+    assert hasher.stats()["in_flight"] == 0
+
+
+def test_needs_rehash_compares_cost_factor(app, hasher, monkeypatch):
+    monkeypatch.setitem(app.config, "BCRYPT_ROUNDS", 5)
+    assert hasher.needs_rehash(bcrypt.hashpw(b"pw", bcrypt.gensalt(rounds=4)).decode()) is True
+    assert hasher.needs_rehash(bcrypt.hashpw(b"pw", bcrypt.gensalt(rounds=5)).decode()) is False
+    assert hasher.needs_rehash("") is False
+    assert hash_cost("$2b$12$abcdefghijklmnopqrstuu") == 12
+
+
+def test_rehash_in_background_reports_new_hash(app, hasher, monkeypatch):
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_EXECUTOR", "thread")
+    done = threading.Event()
+    results = []
+
+    def on_hashed(new_hash):
+        results.append(new_hash)
+        done.set()
+
+    hasher.rehash_in_background("s3cret!", on_hashed)
+    assert done.wait(5)
+    assert hash_cost(results[0]) == app.config["BCRYPT_ROUNDS"]
+    assert bcrypt.checkpw(b"s3cret!", results[0].encode())
+
+
+def test_calibrate_cost_suggests_highest_cost_under_target():
+    suggested, timings = calibrate_cost(target_ms=10_000, samples=1, min_rounds=4, max_rounds=5)
+    assert suggested == 5
+    assert set(timings) == {4, 5}
+
+    suggested, _ = calibrate_cost(target_ms=0, samples=1, min_rounds=4, max_rounds=6)
+    assert suggested == 4
+
+
+def test_calibrate_bcrypt_cli(app):
+    result = app.test_cli_runner().invoke(
+        args=["auth", "calibrate-bcrypt", "--target-ms", "10000", "--max-rounds", "5"]
+    )
+    assert result.exit_code == 0
+    assert "Suggested BCRYPT_ROUNDS=5" in result.output
+
+
+def test_bulk_hashing_uses_its_own_pool(app, hasher, monkeypatch):
+    """An import's hash_many(workers=...) does not queue behind (or ahead of) logins."""
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_EXECUTOR", "thread")
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_WORKERS", 1)
+
+    hasher.hash_password("login")
+    hashes = list(hasher.hash_many(["a", "b", "c"], workers=3))
+    assert len(hashes) == 3
+
+    request_pool = hasher._executors["requests"][1]
+    bulk_pool = hasher._executors["bulk"][1]
+    assert bulk_pool is not request_pool
+    assert (request_pool._max_workers, bulk_pool._max_workers) == (1, 3)
+
+
+def test_process_pool_does_not_fork_the_worker(app, hasher, monkeypatch):
+    """Pool processes start from a fresh interpreter, not a fork of a threaded worker."""
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_EXECUTOR", "process")
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_WORKERS", 1)
+
+    hasher.hash_password("s3cret!")
+    pool = hasher._executors["requests"][1]
+    assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
@@ -0,0 +1,119 @@
+# File: tests/services/test_profiler.py
+"""
+Tests for on-demand request profiling (app/services/profiler.py) and the admin routes
+serving the stored profiles.
+"""
+
+import json
+import time
+from collections import Counter
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app.extensions import profiler
+from app.services.profiler import StackSampler, sampled_top
+
+STATUS_URL = "/api/auth/status"
+
+
+def auth_headers(app, role):
+    with app.app_context():
+        token = create_access_token(identity="someone", additional_claims={"role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def profiles_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "directory", str(tmp_path))
+    return tmp_path
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_sampler_records_the_stack_of_the_calling_thread():
+    sampler = StackSampler(interval=0.001)
+    sampler.start()
+    busy(0.05)
+    stacks = sampler.stop()
+
+    assert sum(stacks.values()) >= 5
+    assert all("test_sampler_records_the_stack_of_the_calling_thread" in s for s in stacks)
+    top = {row["function"].split(" ")[0]: row for row in sampled_top(stacks, 0.001, 50)}
+    assert top["busy"]["own_ms"] > 0
+
+
+def test_sampled_top_counts_cumulative_and_own_time():
+    stacks = Counter({"main;view;query": 3, "main;view": 1, "main;other": 1})
+    rows = {row["function"]: row for row in sampled_top(stacks, 0.01, 10)}
+    assert rows["main"]["cumulative_ms"] == 50.0 and rows["main"]["own_ms"] == 0
+    assert rows["view"]["cumulative_ms"] == 40.0 and rows["view"]["own_ms"] == 10.0
+    assert rows["query"]["samples"] == 3
+
+
+def test_admin_header_profiles_the_request(app, client, profiles_dir):
+    """
+    GIVEN an admin sending the profiling header
+    WHEN the request completes
+    THEN its profile is stored and readable through the admin routes
+    """
+    headers = auth_headers(app, "admin")
+    response = client.get(STATUS_URL, headers={**headers, "X-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+
+    summary = json.loads((profiles_dir / f"{profile_id}.json").read_text())
+    assert summary["endpoint"] == "auth.status" and summary["mode"] == "cprofile"
+    assert summary["trigger"] == "header" and summary["status"] == 200
+    assert summary["top"] and summary["top"][0]["calls"] >= 1
+    assert (profiles_dir / f"{profile_id}.prof").exists()
+    assert (profiles_dir / f"{profile_id}.collapsed").exists()
+
+    listed = client.get("/api/admin/profiles", headers=headers).get_json()["profiles"]
+    assert [p["id"] for p in listed] == [profile_id]
+    assert client.get(f"/api/admin/profiles/{profile_id}", headers=headers).get_json() == summary
+    collapsed = client.get(f"/api/admin/profiles/{profile_id}?format=collapsed", headers=headers)
+    assert collapsed.content_type.startswith("text/plain")
+    assert client.get("/api/admin/profiles/..%2Fsecret", headers=headers).status_code == 404
+
+
+def test_profiles_record_the_route_not_the_raw_path(app, client, profiles_dir):
+    headers = {**auth_headers(app, "admin"), "X-Profile": "sample"}
+    response = client.post("/api/auth/password-reset/secret-token-value", json={}, headers=headers)
+
+    stored = (profiles_dir / f"{response.headers['X-Profile-Id']}.json").read_text()
+    assert json.loads(stored)["path"] == "/api/auth/password-reset/<token>"
+    assert "secret-token-value" not in stored
+
+
+def test_header_is_ignored_for_non_admins(app, client, profiles_dir):
+    before = profiler.stats()
+    for headers in ({}, auth_headers(app, "doctor"), {"Authorization": "Bearer not-a-jwt"}):
+        response = client.get(STATUS_URL, headers={**headers, "X-Profile": "1"})
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+    assert profiler.stats()["denied"] - before["denied"] == 3
+    assert list(profiles_dir.iterdir()) == []
+    assert client.get("/api/admin/profiles", headers=auth_headers(app, "doctor")).status_code == 403
+
+
+def test_sampling_rate_profiles_requests_and_keeps_the_newest(client, profiles_dir, monkeypatch):
+    monkeypatch.setattr(profiler, "sample_rate", 0.5)
+    monkeypatch.setattr(profiler, "rng", lambda: 0.25)
+    monkeypatch.setattr(profiler, "mode", "sample")
+    monkeypatch.setattr(profiler, "keep", 2)
+
+    for _ in range(3):
+        response = client.get(STATUS_URL)
+        assert "X-Profile-Id" not in response.headers  # stored, not announced
+        time.sleep(0.002)  # profile IDs start with a millisecond timestamp
+
+    stored = sorted(path.name for path in profiles_dir.glob("*.json"))
+    assert len(stored) == 2
+    summary = json.loads((profiles_dir / stored[0]).read_text())
+    assert summary["trigger"] == "sample_rate" and summary["mode"] == "sample"
+    assert not list(profiles_dir.glob("*.prof"))
@@ -0,0 +1,102 @@
+# File: tests/services/test_query_log.py
+"""
+Tests for MongoDB command monitoring (app/services/query_log.py): filter redaction, the
+slow command log and per-request DB totals.
+"""
+
+import logging
+from types import SimpleNamespace
+
+from app.extensions import query_monitor
+from app.services.query_log import current_request_stats, filter_shape, redact_shape
+
+
+def run_command(name: str, command: dict, micros: int, reply: dict | None = None, request_id=1):
+    """Feed one command through the registered listener, as pymongo would."""
+    event = SimpleNamespace(
+        command=command, command_name=name, request_id=request_id, connection_id=("h", 1)
+    )
+    query_monitor._listener.started(event)
+    query_monitor._listener.succeeded(
+        SimpleNamespace(duration_micros=micros, reply=reply or {"ok": 1}, **vars(event))
+    )
+
+
+def test_filter_shapes_keep_operators_but_drop_values():
+    assert redact_shape({"email": "a@b.c", "age": {"$gt": 30}}) == {
+        "email": "?",
+        "age": {"$gt": "?"},
+    }
+    assert redact_shape({"$or": [{"a": 1}, {"b": {"$in": [1, 2, 3]}}]}) == {
+        "$or": [{"a": "?"}, {"b": {"$in": ["?"]}}]
+    }
+    update = {"update": "users", "updates": [{"q": {"_id": 1}, "u": {}}, {"q": {"_id": 2}}]}
+    assert filter_shape("update", update) == {"_id": "?"}
+    assert filter_shape("ping", {"ping": 1}) is None
+
+
+def test_slow_commands_are_logged_without_values(app, caplog):
+    command = {"find": "users", "filter": {"email": "secret@example.com"}}
+    reply = {"cursor": {"firstBatch": [{"_id": 1}, {"_id": 2}]}, "ok": 1}
+    before = query_monitor.stats()
+    with caplog.at_level(logging.WARNING, logger="app.services.query_log"):
+        run_command("find", command, micros=1000)
+        run_command("find", command, micros=250_000, reply=reply)
+
+    records = [r.getMessage() for r in caplog.records if r.name == "app.services.query_log"]
+    assert len(records) == 1
+    assert "Slow MongoDB find on users: 250.0 ms, 2 docs" in records[0]
+    assert "{'email': '?'}" in records[0] and "secret" not in records[0]
+    after = query_monitor.stats()
+    assert after["commands"] - before["commands"] == 2
+    assert after["documents"] - before["documents"] == 2
+    assert after["slow"] - before["slow"] == 1
+
+
+def test_request_db_time_goes_to_server_timing_and_request_log(app, caplog, monkeypatch):
+    """
+    GIVEN a request issuing the same query many times
+    WHEN the response is finalized
+    THEN Server-Timing carries the DB time and the request log flags the repeated query
+    """
+    monkeypatch.setattr(query_monitor, "commands_warn", 3)
+    with (
+        app.test_request_context("/api/auth/status"),
+        caplog.at_level(logging.INFO, logger="app.requests"),
+    ):
+        app.preprocess_request()
+        run_command("find", {"find": "users", "filter": {}}, micros=1500)
+        for _ in range(3):
+            run_command(
+                "find",
+                {"find": "appointments", "filter": {"user": 1}},
+                micros=500,
+                reply={"cursor": {"firstBatch": [{"_id": 1}]}, "ok": 1},
+            )
+        assert current_request_stats().commands == 4
+        assert current_request_stats().documents == 3
+        response = app.process_response(app.response_class("{}"))
+        app.do_teardown_request()
+
+    assert response.headers["Server-Timing"] == 'db;dur=3.0;desc="4 commands"'
+    (record,) = [r for r in caplog.records if r.name == "app.requests"]
+    assert record.levelno == logging.WARNING
+    assert "GET /api/auth/status 200" in record.getMessage()
+    assert "(db: 4 commands, 3 docs, 3.0 ms" in record.getMessage()
+    assert "most repeated: appointments.find x3" in record.getMessage()
+    assert current_request_stats() is None
+
+
+def test_commands_outside_requests_are_not_attributed():
+    run_command("find", {"find": "users", "filter": {}}, micros=100)
+    assert current_request_stats() is None
+
+
+def test_request_log_names_the_route_not_the_raw_path(client, caplog):
+    """Tokens embedded in URLs never reach the request log."""
+    with caplog.at_level(logging.INFO, logger="app.requests"):
+        client.post("/api/auth/password-reset/secret-token-value", json={})
+
+    (record,) = [r for r in caplog.records if r.name == "app.requests"]
+    assert "POST /api/auth/password-reset/<token> 400" in record.getMessage()
+    assert "secret-token-value" not in record.getMessage()
@@ -0,0 +1,89 @@
+# File: tests/services/test_rate_limit.py
+"""
+Tests for the sliding-window rate limiter (app/services/rate_limit.py).
+"""
+
+import pytest
+
+from app.services import rate_limit
+from app.services.rate_limit import RateLimiter, parse_limit
+from app.services.ttl_store import MemoryStore
+
+
+@pytest.fixture
+def limiter():
+    return RateLimiter(MemoryStore(sweep_interval=0))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Pin time.time() inside the limiter so window boundaries are deterministic."""
+    now = [1_000_040.0]  # 20 seconds into a one-minute window
+    monkeypatch.setattr(rate_limit.time, "time", lambda: now[0])
+    return now
+
+
+def test_parse_limit():
+    assert parse_limit("5/minute") == (5, 60)
+    assert parse_limit("10/hours") == (10, 3600)
+    assert parse_limit("3/300") == (3, 300)
+    with pytest.raises(ValueError):
+        parse_limit("often")
+
+
+def test_limit_is_enforced_within_a_window(limiter, clock):
+    results = [limiter.hit("login", "ip:1.2.3.4", "3/minute") for _ in range(4)]
+    assert results[:3] == [None, None, None]
+    # 4 hits (the rejected one included) must decay to 2 so one more fits under 3:
+    # 40s until the next window, then half of it.
+    assert results[3] == 40 + 30
+    assert limiter.stats() == {"allowed": 3, "throttled": 1}
+    # Identities are counted independently.
+    assert limiter.hit("login", "ip:5.6.7.8", "3/minute") is None
+
+
+def test_previous_window_is_weighted_by_overlap(limiter, clock):
+    """
+    GIVEN a full previous window
+    WHEN the next window starts
+    THEN earlier requests still count, proportionally to how much they overlap
+    """
+    for _ in range(4):
+        limiter.hit("login", "email:a@example.com", "4/minute")
+
+    clock[0] += 60  # 20s into the next window: the previous count weighs 2/3
+    assert limiter.hit("login", "email:a@example.com", "4/minute") is None
+    retry_after = limiter.hit("login", "email:a@example.com", "4/minute")
+    assert retry_after is not None
+
+    clock[0] += retry_after
+    assert limiter.hit("login", "email:a@example.com", "4/minute") is None
+
+
+def test_per_ip_limits_use_the_forwarded_client_address(monkeypatch):
+    """
+    GIVEN the app behind one trusted proxy
+    WHEN clients with different X-Forwarded-For addresses log in
+    THEN each is counted under its own address, not the proxy's
+    """
+    from app.config import Config
+    from tests.conftest import make_test_app
+
+    monkeypatch.setattr(Config, "TRUSTED_PROXY_HOPS", 1)
+    proxied_app = make_test_app()
+    hits = []
+    monkeypatch.setattr(
+        "app.extensions.rate_limiter.hit",
+        lambda scope, identity, limit: hits.append(identity),
+    )
+
+    with proxied_app.test_client() as client:
+        for address in ("203.0.113.1", "203.0.113.2"):
+            client.post(
+                "/api/auth/login",
+                json={},
+                headers={"X-Forwarded-For": address},
+                environ_base={"REMOTE_ADDR": "10.0.0.1"},
+            )
+
+    assert hits == ["ip:203.0.113.1", "ip:203.0.113.2"]
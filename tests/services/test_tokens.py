@@ -0,0 +1,64 @@
+# File: tests/services/test_tokens.py
+"""
+Tests for the token service (app/services/tokens.py).
+"""
+
+import pytest
+
+from app.extensions import tokens, ttl_store
+
+
+def test_serializers_are_cached(app):
+    """Serializers are built once per (secrets, salt) and reused."""
+    with app.app_context():
+        first = tokens._serializer("email-confirm")
+        assert tokens._serializer("email-confirm") is first
+        assert tokens._serializer("password-reset") is not first
+
+
+def test_tokens_survive_key_rotation(app, monkeypatch):
+    """
+    GIVEN a token signed with the old SECRET_KEY
+    WHEN the key is rotated and the old one kept in SECRET_KEY_FALLBACKS
+    THEN the token still verifies, and stops verifying once the fallback is dropped
+    """
+    with app.app_context():
+        old_key = app.config["SECRET_KEY"]
+        token = tokens.issue("user@example.com", salt="email-confirm")
+
+        monkeypatch.setitem(app.config, "SECRET_KEY", "rotated-key")
+        monkeypatch.setitem(app.config, "SECRET_KEY_FALLBACKS", [old_key])
+        assert tokens.verify(token, salt="email-confirm") == "user@example.com"
+
+        monkeypatch.setitem(app.config, "SECRET_KEY_FALLBACKS", [])
+        assert tokens.verify(token, salt="email-confirm") is None
+
+
+def test_single_use_tokens_cannot_be_replayed(app):
+    with app.app_context():
+        ttl_store.clear()
+        token = tokens.issue("user@example.com", salt="password-reset")
+        assert tokens.verify(token, salt="password-reset", single_use=True) == "user@example.com"
+        assert tokens.verify(token, salt="password-reset", single_use=True) is None
+        # A token for a different purpose is never accepted.
+        assert tokens.verify(token, salt="email-confirm") is None
+
+        stats = tokens.stats()
+        assert stats["issued"] >= 1
+        assert stats["replayed"] >= 1
+        assert stats["rejected"] >= 1
+
+
+def test_production_refuses_a_per_process_replay_cache():
+    """Single-use links only hold when every worker sees the used-token records."""
+    from flask import Flask
+
+    from app.services.tokens import TokenService
+    from app.services.ttl_store import TTLStore
+
+    app = Flask(__name__)
+    app.config.update(FLASK_ENV="production", TTL_STORE_URL="memory://")
+    store = TTLStore(app)
+    with pytest.raises(RuntimeError, match="TTL_STORE_URL"):
+        TokenService(store, app)
+    store.backend.close()
@@ -0,0 +1,85 @@
+# File: tests/services/test_tracing.py
+"""
+Tests for Sentry trace sampling decisions (app/services/tracing.py).
+
+The sampler hooks are called directly with hand-built contexts and events; no Sentry
+client or network is involved.
+"""
+
+import pytest
+
+from app.services.tracing import TraceSampler, init_sentry, parse_rates
+
+
+def transaction(name, duration=0.01, status="ok"):
+    return {
+        "transaction": name,
+        "start_timestamp": 100.0,
+        "timestamp": 100.0 + duration,
+        "contexts": {"trace": {"status": status}},
+    }
+
+
+def test_parse_rates():
+    assert parse_rates("auth=0.2, auth.login=1") == {"auth": 0.2, "auth.login": 1.0}
+    assert parse_rates({"health": 0}) == {"health": 0.0}
+    assert parse_rates("") == {}
+    with pytest.raises(ValueError):
+        parse_rates("auth=2")
+
+
+def test_endpoint_rate_beats_blueprint_rate_beats_default():
+    sampler = TraceSampler(default_rate=0.05, rates={"auth": 0.2, "auth.login": 1.0})
+    assert sampler.rate_for("auth.login") == 1.0
+    assert sampler.rate_for("auth.status") == 0.2
+    assert sampler.rate_for("admin.import_users_route") == 0.05
+    assert sampler.rate_for(None) == 0.05
+
+
+def test_head_sampling_uses_the_resolved_route():
+    sampler = TraceSampler(
+        default_rate=0.0,
+        rates={"auth.login": 1.0},
+        tail=False,
+        resolve_endpoint=lambda path, method: "auth.login" if path == "/api/auth/login" else None,
+    )
+    login = {"wsgi_environ": {"PATH_INFO": "/api/auth/login", "REQUEST_METHOD": "POST"}}
+    other = {"wsgi_environ": {"PATH_INFO": "/api/auth/status", "REQUEST_METHOD": "GET"}}
+    assert sampler.traces_sampler(login) == 1.0
+    assert sampler.traces_sampler(other) == 0.0
+    # Upstream decisions are honoured.
+    assert sampler.traces_sampler({**other, "parent_sampled": True}) == 1.0
+
+
+def test_tail_sampling_keeps_errors_and_slow_requests():
+    sampler = TraceSampler(default_rate=0.0, tail=True, slow_ms=500, rng=lambda: 0.99)
+    assert sampler.traces_sampler({"wsgi_environ": {}}) == 1.0
+
+    assert sampler.before_send_transaction(transaction("auth.login"), {}) is None
+    assert sampler.before_send_transaction(transaction("auth.login", status="internal_error"), {})
+    assert sampler.before_send_transaction(transaction("auth.login", duration=0.8), {})
+
+
+def test_rate_is_applied_with_the_random_source():
+    draws = iter([0.1, 0.3])
+    sampler = TraceSampler(default_rate=0.25, tail=True, rng=lambda: next(draws))
+    assert sampler.before_send_transaction(transaction("auth.status"), {})
+    assert sampler.before_send_transaction(transaction("auth.status"), {}) is None
+
+
+def test_per_worker_cap_refills_over_time():
+    now = [0.0]
+    sampler = TraceSampler(default_rate=1.0, tail=True, max_per_second=2, clock=lambda: now[0])
+    kept = [sampler.before_send_transaction(transaction("x"), {}) for _ in range(3)]
+    assert [event is not None for event in kept] == [True, True, False]
+    # Errors bypass the cap.
+    assert sampler.before_send_transaction(transaction("x", status="internal_error"), {})
+
+    now[0] += 0.5
+    assert sampler.before_send_transaction(transaction("x"), {}) is not None
+    assert sampler.before_send_transaction(transaction("x"), {}) is None
+
+
+def test_sentry_is_disabled_without_dsn(app, monkeypatch):
+    monkeypatch.setitem(app.config, "SENTRY_DSN", None)
+    assert init_sentry(app) is None
@@ -0,0 +1,242 @@
+# File: tests/services/test_ttl_store.py
+"""
+Tests for the expiring key-value store backends (app/services/ttl_store.py).
+
+The same contract is exercised against:
+  - MemoryStore (per-process, swept on a timer)
+  - SQLiteStore (WAL file shared across processes)
+  - RedisStore, talking to a tiny in-process Redis-protocol stand-in
+"""
+
+import logging
+import socketserver
+import threading
+import time
+
+import pytest
+
+from app.services.ttl_store import MemoryStore, RedisStore, SQLiteStore, TTLStore, create_store
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    """Implements the handful of Redis commands RedisStore relies on."""
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2].decode())
+            self.wfile.write(self.server.dispatch(args))
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _RespHandler)
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def _alive(self, key):
+        entry = self.data.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    @staticmethod
+    def _bulk(value):
+        if value is None:
+            return b"$-1\r\n"
+        data = value.encode()
+        return b"$%d\r\n%s\r\n" % (len(data), data)
+
+    def dispatch(self, args):
+        command = args[0].upper()
+        with self.lock:
+            if command == "SET":
+                options = [arg.upper() for arg in args[3:]]
+                expires = None
+                if "PX" in options:
+                    expires = time.monotonic() + int(args[3 + options.index("PX") + 1]) / 1000
+                if "NX" in options and self._alive(args[1]):
+                    return b"$-1\r\n"
+                self.data[args[1]] = (args[2], expires)
+                return b"+OK\r\n"
+            if command == "GET":
+                entry = self._alive(args[1])
+                return self._bulk(entry[0] if entry else None)
+            if command == "GETDEL":
+                entry = self._alive(args[1])
+                self.data.pop(args[1], None)
+                return self._bulk(entry[0] if entry else None)
+            if command == "INCR":
+                entry = self._alive(args[1])
+                value = int(entry[0]) + 1 if entry else 1
+                self.data[args[1]] = (str(value), entry[1] if entry else None)
+                return b":%d\r\n" % value
+            if command == "PEXPIRE":
+                entry = self._alive(args[1])
+                if entry:
+                    self.data[args[1]] = (entry[0], time.monotonic() + int(args[2]) / 1000)
+                return b":%d\r\n" % bool(entry)
+            if command == "DEL":
+                removed = sum(1 for key in args[1:] if self.data.pop(key, None))
+                return b":%d\r\n" % removed
+            if command == "SCAN":
+                prefix = args[3].rstrip("*")
+                keys = [key for key in self.data if key.startswith(prefix)]
+                body = b"".join(self._bulk(key) for key in keys)
+                return b"*2\r\n" + self._bulk("0") + b"*%d\r\n" % len(keys) + body
+        return b"-ERR unknown command\r\n"
+
+
+@pytest.fixture
+def redis_server():
+    server = FakeRedisServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        backend = MemoryStore(sweep_interval=0)
+    elif request.param == "sqlite":
+        backend = SQLiteStore(str(tmp_path / "ttl.db"))
+    else:
+        server = request.getfixturevalue("redis_server")
+        backend = RedisStore(port=server.server_address[1])
+    yield backend
+    backend.close()
+
+
+def test_set_get_pop_delete(store):
+    """
+    GIVEN any backend
+    WHEN values are stored, read, popped and deleted
+    THEN each operation behaves like a dictionary with single-use pop
+    """
+    store.set("otp:a@example.com", {"otp": "123456"}, ttl=60)
+    assert store.get("otp:a@example.com") == {"otp": "123456"}
+
+    assert store.pop("otp:a@example.com") == {"otp": "123456"}
+    assert store.pop("otp:a@example.com") is None
+    assert store.get("otp:a@example.com") is None
+
+    store.set("k", {"v": 1}, ttl=60)
+    store.delete("k")
+    assert store.get("k") is None
+
+
+def test_add_only_sets_missing_or_expired_keys(store):
+    """add() is an atomic set-if-absent, used for single-use markers."""
+    assert store.add("once", 1, ttl=60) is True
+    assert store.add("once", 2, ttl=60) is False
+    assert store.get("once") == 1
+
+    assert store.add("brief", 1, ttl=0.05) is True
+    time.sleep(0.1)
+    assert store.add("brief", 2, ttl=60) is True
+    assert store.get("brief") == 2
+
+
+def test_incr_counts_until_the_window_expires(store):
+    """incr() starts missing counters at 1 and keeps the original expiry."""
+    assert [store.incr("hits", ttl=60) for _ in range(3)] == [1, 2, 3]
+    assert store.get("hits") == 3
+
+    assert store.incr("window", ttl=0.05) == 1
+    assert store.incr("window", ttl=60) == 2
+    time.sleep(0.1)
+    assert store.incr("window", ttl=60) == 1
+
+
+def test_entries_expire(store):
+    """Values are invisible once their TTL has passed."""
+    store.set("short", {"v": 1}, ttl=0.05)
+    store.set("long", {"v": 2}, ttl=60)
+    time.sleep(0.1)
+    assert store.get("short") is None
+    assert store.pop("short") is None
+    assert store.get("long") == {"v": 2}
+
+
+def test_clear_removes_everything(store):
+    store.set("a", 1, ttl=60)
+    store.set("b", 2, ttl=60)
+    store.clear()
+    assert store.get("a") is None and store.get("b") is None
+
+
+def test_memory_store_is_bounded():
+    """The in-memory backend evicts the oldest entries beyond max_entries."""
+    store = MemoryStore(max_entries=3, sweep_interval=0)
+    for i in range(5):
+        store.set(f"k{i}", i, ttl=60)
+    assert len(store) == 3
+    assert store.evictions == 2
+    assert store.get("k0") is None
+    assert store.get("k4") == 4
+
+
+def test_memory_store_sweeper_removes_expired_entries():
+    """The background sweeper drops expired entries nobody reads."""
+    store = MemoryStore(sweep_interval=0.02)
+    store.set("gone", 1, ttl=0.01)
+    deadline = time.monotonic() + 2
+    while len(store) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    store.close()
+    assert len(store) == 0
+
+
+def test_sqlite_store_is_shared_between_connections(tmp_path):
+    """Two stores on the same file (as two workers would be) see each other's writes."""
+    path = str(tmp_path / "shared.db")
+    writer, reader = SQLiteStore(path), SQLiteStore(path)
+    writer.set("otp:b@example.com", {"otp": "654321"}, ttl=60)
+    assert reader.pop("otp:b@example.com") == {"otp": "654321"}
+    assert writer.get("otp:b@example.com") is None
+
+
+def test_create_store_from_url(tmp_path):
+    assert isinstance(create_store("memory://"), MemoryStore)
+    assert isinstance(create_store(f"sqlite:///{tmp_path}/x.db"), SQLiteStore)
+    redis_store = create_store("redis://:secret@cache:6380/2")
+    assert (redis_store.host, redis_store.port, redis_store.db) == ("cache", 6380, 2)
+    assert redis_store.password == "secret"
+    with pytest.raises(ValueError):
+        create_store("ftp://nope")
+
+
+def test_process_local_store_warns_when_several_workers_run(app, monkeypatch, caplog, tmp_path):
+    """
+    GIVEN gunicorn running two workers (WEB_CONCURRENCY from gunicorn.conf.py)
+    WHEN the TTL store is memory:// or sqlite://
+    THEN only the per-process memory store is flagged, since workers cannot share it
+    """
+    monkeypatch.setenv("WEB_CONCURRENCY", "2")
+    monkeypatch.setitem(app.extensions, "ttl_store", app.extensions["ttl_store"])
+    monkeypatch.setitem(app.config, "TTL_STORE_URL", "memory://")
+    store = TTLStore()
+    with caplog.at_level(logging.WARNING, logger="app.services.ttl_store"):
+        store.init_app(app)
+    assert store.shared is False
+    assert "2 workers" in caplog.text
+
+    caplog.clear()
+    monkeypatch.setitem(app.config, "TTL_STORE_URL", f"sqlite:///{tmp_path}/ttl.db")
+    with caplog.at_level(logging.WARNING, logger="app.services.ttl_store"):
+        store.init_app(app)
+    assert store.shared is True
+    assert caplog.text == ""
+    store.backend.close()
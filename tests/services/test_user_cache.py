@@ -0,0 +1,168 @@
+# File: tests/services/test_user_cache.py
+"""
+Tests for the read-through user cache (app/services/user_cache.py), run against the
+mongomock database from conftest.py.
+"""
+
+import time
+
+import bcrypt
+import pytest
+
+from app.models.user import EmergencyContact, User
+from app.services.user_cache import UserCache
+
+
+def _make_user(email, **overrides):
+    fields = dict(
+        email=email,
+        password_hash="hashed_password",
+        role="patient",
+        first_name="Cache",
+        last_name="User",
+        phone_number="1234567890",
+        address="1 Cache Lane",
+        emergency_contact=EmergencyContact(
+            name="Contact", relationship="Friend", phone_number="1112223333"
+        ),
+    )
+    fields.update(overrides)
+    user = User(**fields)
+    user.save()
+    return user
+
+
+@pytest.fixture
+def cache(app, db):
+    user_cache = UserCache()
+    user_cache.init_app(app)
+    return user_cache
+
+
+def test_lookups_by_email_and_id_share_one_entry(cache):
+    user = _make_user("cached@example.com")
+
+    assert cache.by_email("cached@example.com").id == user.id
+    assert cache.by_id(user.id).email == "cached@example.com"
+    assert cache.by_email("cached@example.com").role == "patient"
+
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 2
+
+
+def test_missing_users_are_not_cached(cache):
+    assert cache.by_email("nobody@example.com") is None
+    _make_user("nobody@example.com")
+    assert cache.by_email("nobody@example.com") is not None
+
+
+def test_entries_expire_after_ttl(cache, monkeypatch):
+    _make_user("ttl@example.com")
+    cache.by_email("ttl@example.com")
+
+    clock = time.monotonic() + cache.ttl + 1
+    monkeypatch.setattr("app.services.user_cache.time.monotonic", lambda: clock)
+    cache.by_email("ttl@example.com")
+    assert cache.stats()["misses"] == 2
+
+
+def test_lru_eviction_is_bounded(cache):
+    cache.max_size = 2
+    for i in range(4):
+        _make_user(f"lru{i}@example.com")
+        cache.by_email(f"lru{i}@example.com")
+
+    stats = cache.stats()
+    assert stats["size"] == 4  # two users, each under an email and an id key
+    assert stats["evictions"] == 2
+
+
+def test_eviction_drops_both_keys_of_a_user(cache):
+    cache.max_size = 2
+    for name in ("a", "b"):
+        _make_user(f"{name}@example.com")
+        cache.by_email(f"{name}@example.com")
+    cache.by_email("a@example.com")  # a's email key is now the most recently used
+
+    _make_user("c@example.com")
+    cache.by_email("c@example.com")  # evicts a (least recently used id key) entirely
+
+    assert cache.stats()["size"] == 4
+    cache.by_email("a@example.com")
+    assert cache.stats()["misses"] == 4
+
+
+def test_invalidation_during_a_load_is_not_overwritten(cache, monkeypatch):
+    from app.models.user import UserSummary
+
+    user = _make_user("race@example.com")
+    load = UserSummary.by_email
+
+    def load_then_promote(email):
+        summary = load(email)
+        user.role = "doctor"
+        user.save()  # another request's write lands between the read and the store
+        return summary
+
+    monkeypatch.setattr(UserSummary, "by_email", load_then_promote)
+    assert cache.by_email("race@example.com").role == "patient"
+    monkeypatch.setattr(UserSummary, "by_email", load)
+
+    assert cache.by_email("race@example.com").role == "doctor"
+
+
+def test_save_and_delete_signals_invalidate(cache):
+    user = _make_user("signal@example.com")
+    assert cache.by_email("signal@example.com").role == "patient"
+
+    user.role = "doctor"
+    user.save()
+    assert cache.by_email("signal@example.com").role == "doctor"
+
+    user.delete()
+    assert cache.by_email("signal@example.com") is None
+    assert cache.stats()["invalidations"] >= 2
+
+
+def test_disabled_cache_always_reads_through(app, db, monkeypatch):
+    monkeypatch.setitem(app.config, "USER_CACHE_ENABLED", False)
+    cache = UserCache(app)
+    _make_user("off@example.com")
+
+    cache.by_email("off@example.com")
+    cache.by_email("off@example.com")
+    assert cache.stats() == {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "size": 0}
+
+
+def _hash(password):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=4)).decode("utf-8")
+
+
+def test_credentials_are_not_cached(cache):
+    _make_user("nocreds@example.com")
+    summary = cache.by_email("nocreds@example.com")
+
+    for field in ("password_hash", "verified", "two_factor_enabled"):
+        assert not hasattr(summary, field)
+
+
+def test_login_sees_credential_changes_made_by_other_workers(app, client, db):
+    """
+    GIVEN a user cached in this process
+    WHEN another worker verifies the account and changes the password (no local invalidation)
+    THEN the next login here checks the new password and verified state right away
+    """
+    from app.extensions import user_cache
+
+    _make_user("stale@example.com", password_hash=_hash("old-pass"))
+    assert user_cache.by_email("stale@example.com") is not None
+
+    User.objects(email="stale@example.com").update_one(
+        set__password_hash=_hash("new-pass"), set__verified=True
+    )
+
+    payload = {"email": "stale@example.com", "password": "old-pass"}
+    assert client.post("/api/auth/login", json=payload).status_code == 401
+    payload["password"] = "new-pass"
+    assert client.post("/api/auth/login", json=payload).status_code == 200
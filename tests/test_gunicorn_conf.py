@@ -0,0 +1,86 @@
+# File: tests/test_gunicorn_conf.py
+"""
+Tests for gunicorn.conf.py and the per-worker MongoDB reconnect it triggers after fork.
+"""
+
+import runpy
+from pathlib import Path
+from types import SimpleNamespace
+
+import mongomock
+from mongoengine import connection
+
+from app.models import User
+from app.services.mongo import reconnect
+
+CONF_PATH = str(Path(__file__).resolve().parent.parent / "gunicorn.conf.py")
+
+
+def load_conf(monkeypatch, tmp_path, **env):
+    # Loading the config must not switch this test process to multiprocess metrics.
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    return runpy.run_path(CONF_PATH)
+
+
+def test_gthread_defaults_with_preload_and_jittered_recycling(monkeypatch, tmp_path):
+    monkeypatch.delenv("GUNICORN_WORKERS", raising=False)
+    conf = load_conf(monkeypatch, tmp_path, GUNICORN_WORKER_CLASS="gthread")
+    assert conf["worker_class"] == "gthread"
+    assert conf["workers"] == conf["_cpu_count"]() and conf["threads"] == 4
+    assert conf["preload_app"] is True
+    assert conf["max_requests"] > conf["max_requests_jitter"] > 0
+
+    sync = load_conf(monkeypatch, tmp_path, GUNICORN_WORKER_CLASS="sync", GUNICORN_WORKERS="3")
+    assert (sync["workers"], sync["threads"]) == (3, 1)
+
+
+def test_hashing_pools_share_the_cpus_between_workers(monkeypatch, tmp_path):
+    monkeypatch.delenv("PASSWORD_HASH_WORKERS", raising=False)
+    conf = load_conf(monkeypatch, tmp_path, GUNICORN_WORKER_CLASS="gthread", GUNICORN_WORKERS="2")
+    expected = max(1, conf["_cpu_count"]() // 2)
+    assert conf["os"].environ["PASSWORD_HASH_WORKERS"] == str(expected)
+
+    # An explicit setting wins, and every worker gets at least one hashing process.
+    monkeypatch.setenv("PASSWORD_HASH_WORKERS", "3")
+    load_conf(monkeypatch, tmp_path, GUNICORN_WORKERS="64")
+    assert conf["os"].environ["PASSWORD_HASH_WORKERS"] == "3"
+    monkeypatch.delenv("PASSWORD_HASH_WORKERS")
+    load_conf(monkeypatch, tmp_path, GUNICORN_WORKERS="1024")
+    assert conf["os"].environ["PASSWORD_HASH_WORKERS"] == "1"
+
+
+def test_post_fork_replaces_the_inherited_client(app, db, monkeypatch, tmp_path):
+    """
+    GIVEN a preloaded app whose documents are bound to the master's client
+    WHEN a worker is forked
+    THEN the worker gets a new client built from MONGODB_SETTINGS, with the pool options
+    """
+    settings = dict(
+        app.config["MONGODB_SETTINGS"], db="testdb", mongo_client_class=mongomock.MongoClient
+    )
+    monkeypatch.setitem(app.config, "MONGODB_SETTINGS", settings)
+    User._get_collection()  # bind the document to the inherited client
+    inherited = connection.get_connection()
+
+    conf = load_conf(monkeypatch, tmp_path)
+    server = SimpleNamespace(cfg=SimpleNamespace(preload_app=True))
+    worker = SimpleNamespace(app=SimpleNamespace(wsgi=lambda: app))
+    conf["post_fork"](server, worker)
+
+    client = connection.get_connection()
+    assert client is not inherited
+    assert User._get_collection().database.client is client
+    assert connection._connection_settings["default"]["maxPoolSize"] == settings["maxPoolSize"]
+
+
+def test_reconnect_is_lazy_by_default(app, db, monkeypatch):
+    settings = {
+        "db": "testdb",
+        "mongo_client_class": mongomock.MongoClient,
+        "uuidRepresentation": "standard",
+    }
+    monkeypatch.setitem(app.config, "MONGODB_SETTINGS", settings)
+    reconnect(app)
+    assert connection._connection_settings["default"]["connect"] is False
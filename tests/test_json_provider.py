@@ -0,0 +1,79 @@
+# File: tests/test_json_provider.py
+"""
+Tests for the orjson-backed JSON provider (app/json_provider.py).
+"""
+
+import json
+from datetime import UTC, datetime
+from decimal import Decimal
+
+import pytest
+from bson import ObjectId
+from flask import jsonify, request
+from werkzeug.exceptions import BadRequest
+
+import app.json_provider as json_provider
+from app.models.user import EmergencyContact
+
+OID = ObjectId("65f000000000000000000001")
+PAYLOAD = {
+    "id": OID,
+    "at": datetime(2025, 1, 2, 3, 4, 5),
+    "aware": datetime(2025, 1, 2, 3, 4, 5, tzinfo=UTC),
+    "fee": Decimal("12.50"),
+    "name": "Zoë",
+}
+EXPECTED = {
+    "id": "65f000000000000000000001",
+    "at": "2025-01-02T03:04:05+00:00",
+    "aware": "2025-01-02T03:04:05+00:00",
+    "fee": "12.50",
+    "name": "Zoë",
+}
+
+
+@pytest.mark.parametrize("fast", [True, False], ids=["orjson", "stdlib"])
+def test_mongo_types_encode_the_same_with_and_without_orjson(app, monkeypatch, fast):
+    if not fast:
+        monkeypatch.setattr(json_provider, "orjson", None)
+    with app.app_context():
+        response = jsonify(PAYLOAD)
+    assert response.mimetype == "application/json"
+    body = response.get_data(as_text=True)
+    assert json.loads(body) == EXPECTED
+    assert body.startswith('{"id":"65f0') and body.endswith("}\n")  # compact, unsorted
+
+
+@pytest.mark.parametrize("fast", [True, False], ids=["orjson", "stdlib"])
+def test_documents_are_not_serialized(app, monkeypatch, fast):
+    if not fast:
+        monkeypatch.setattr(json_provider, "orjson", None)
+    contact = EmergencyContact(name="Kin", relationship="Sibling", phone_number="555")
+    with app.app_context(), pytest.raises(TypeError, match="EmergencyContact"):
+        jsonify({"contact": contact})
+
+
+def test_indented_output_when_not_compact(app, monkeypatch):
+    monkeypatch.setattr(app.json, "compact", False)
+    with app.app_context():
+        body = jsonify({"a": [1]}).get_data(as_text=True)
+    assert body == '{\n  "a": [\n    1\n  ]\n}\n'
+
+
+def test_stdlib_arguments_fall_back_to_json_module(app):
+    assert app.json.dumps({"b": 1, "a": OID}, separators=(", ", ": "), sort_keys=True) == (
+        '{"a": "65f000000000000000000001", "b": 1}'
+    )
+
+
+def test_request_bodies_decode_through_the_provider(app, monkeypatch):
+    calls = []
+    loads = app.json.loads
+    monkeypatch.setattr(app.json, "loads", lambda s, **kw: calls.append(s) or loads(s, **kw))
+
+    with app.test_request_context(json={"x": [1, 2]}):
+        assert request.get_json() == {"x": [1, 2]}
+    with app.test_request_context(data="{nope", content_type="application/json"):
+        with pytest.raises(BadRequest):
+            request.get_json()
+    assert len(calls) == 2
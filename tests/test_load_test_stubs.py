@@ -0,0 +1,68 @@
+# File: tests/test_load_test_stubs.py
+"""
+Tests for the SMTP and OpenID stubs the Locust workload runs against (load_tests/stubs.py).
+"""
+
+import json
+import smtplib
+import threading
+import urllib.request
+from email.message import EmailMessage
+
+import pytest
+
+from load_tests.stubs import Mailbox, OIDCStub, SMTPSink, app_env, start
+
+
+@pytest.fixture
+def sink():
+    server = SMTPSink(port=0)
+    start(server)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def send(port, recipient, body):
+    message = EmailMessage()
+    message["Subject"], message["From"], message["To"] = "Your 2FA Code", "app@x.test", recipient
+    message.set_content(body)
+    with smtplib.SMTP("127.0.0.1", port, timeout=5) as smtp:
+        smtp.send_message(message)
+
+
+def test_sink_hands_out_2fa_codes_per_recipient(sink):
+    port = sink.server_address[1]
+    send(
+        port, "Patient00001@loadtest.example.com", "Your Two-Factor Authentication code is: 123456"
+    )
+    send(port, "other@loadtest.example.com", "Your Two-Factor Authentication code is: 654321")
+
+    mailbox = sink.mailbox
+    assert mailbox.wait_for("patient00001@loadtest.example.com", r"code is: (\d{6})") == "123456"
+    # A code is handed out once.
+    assert mailbox.wait_for("patient00001@loadtest.example.com", r"code is: (\d{6})", 0.05) is None
+    assert mailbox.received == 2
+
+
+def test_wait_for_blocks_until_the_message_arrives():
+    mailbox = Mailbox()
+    timer = threading.Timer(0.05, mailbox.deliver, (["a@x.test"], "Reset", "link: /reset/abc"))
+    timer.start()
+    assert mailbox.wait_for("a@x.test", r"/reset/(\w+)", timeout=5) == "abc"
+
+
+def test_oidc_stub_serves_discovery_metadata_for_the_app():
+    server = OIDCStub(port=0)
+    start(server)
+    try:
+        port = server.server_address[1]
+        url = app_env(oidc_port=port)["GOOGLE_SERVER_METADATA_URL"]
+        with urllib.request.urlopen(url, timeout=5) as response:
+            metadata = json.load(response)
+        assert metadata["authorization_endpoint"] == f"http://127.0.0.1:{port}/authorize"
+        with urllib.request.urlopen(metadata["jwks_uri"], timeout=5) as response:
+            assert json.load(response) == {"keys": []}
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,37 @@
+# File: tests/test_startup.py
+"""
+Startup-cost guards: optional heavy dependencies stay unimported until they are needed.
+"""
+
+import os
+import subprocess
+import sys
+
+from app.extensions import LazyExtension
+
+
+def test_lazy_extension_defers_import_and_replays_init_app():
+    """The wrapped class is created on first attribute access and bound to the app."""
+    extension = LazyExtension("unittest.mock:MagicMock")
+    extension.init_app("app")
+    assert not extension.loaded
+    extension.register("google")
+    assert extension.loaded
+    calls = extension._instance.init_app.call_args_list
+    assert [call.args for call in calls] == [("app",)]
+
+
+def test_create_app_without_dsn_or_oauth_skips_sentry_and_authlib():
+    code = (
+        "import sys\n"
+        "from app import create_app\n"
+        "create_app()\n"
+        "print(sorted(m for m in ('authlib', 'sentry_sdk') if m in sys.modules))\n"
+    )
+    env = dict(os.environ, MONGODB_URI=os.environ.get("MONGODB_URI", "mongodb://localhost"))
+    for name in ("SENTRY_DSN", "GOOGLE_CLIENT_ID", "GOOGLE_CLIENT_SECRET"):
+        env[name] = ""
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True
+    )
+    assert result.stdout.strip().splitlines()[-1] == "[]"